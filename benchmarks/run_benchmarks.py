@@ -0,0 +1,240 @@
+"""
+    But : Ce fichier permet de mesurer les performances du traitement d'inventaire sur une base de substitution
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Les modules de l'application se trouvent dans le dossier parent
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIRECTORY)
+
+from standin import *
+from catalogue import *
+from pipeline import *
+from cli import *
+
+# Tailles mesurées par défaut (articles du catalogue, lignes du fichier scanné)
+DEFAULT_CATALOGUE_SIZES = [1000, 10000, 100000]
+DEFAULT_SCAN_SIZES = [10000, 100000, 1000000]
+
+# Décisions prises pendant les mesures : tous les cas particuliers sont traités sans interruption
+BENCHMARK_POLICY = {
+    "existing_inventory": True,
+    "unknown_article": True,
+    "article_without_family": True,
+    "retry_locked": False,
+    "locked_inventory": True,
+    "open_report": False,
+    "resume_run": False,
+}
+
+# Fichiers nécessaires au traitement, copiés dans le dossier de chaque mesure
+RESOURCE_FILES = ["report_template.html", "family_inventory_template.html"]
+
+# Unité de débit des étapes mesurées : lignes scannées ou articles du catalogue
+THROUGHPUT_UNITS = {
+    "catalogue": "articles",
+    "lecture": "lignes",
+    "familles": "articles",
+    "export": "lignes",
+    "stock": "articles",
+    "rapports": "articles",
+}
+
+# Écart de durée toléré par rapport à la référence avant de signaler une régression
+DEFAULT_THRESHOLD = 0.20
+
+# Durée de référence en dessous de laquelle une étape n'est pas comparée (bruit de mesure)
+MIN_COMPARED_DURATION = 0.01
+
+def run_case(articles, lines, unknown_ratio, render_pdf, seed):
+    """
+    Exécute le traitement d'inventaire complet sur des données synthétiques.
+
+    Chaque mesure est isolée dans un dossier temporaire contenant sa propre base
+    de substitution, son fichier scanné et ses dossiers d'inventaire.
+
+    Args:
+        articles (int): Le nombre d'articles du catalogue.
+        lines (int): Le nombre de lignes du fichier scanné.
+        unknown_ratio (float): La proportion de codes inexistants.
+        render_pdf (bool): Convertir les rapports en PDF.
+        seed (int): La graine des générateurs de données.
+
+    Returns:
+        dict: Le statut de l'exécution, ses mesures par étape et leur débit.
+    """
+    working_directory = os.getcwd()
+    case_directory = tempfile.mkdtemp(prefix="benchmark_inventaire_")
+    try:
+        for resource in RESOURCE_FILES:
+            shutil.copy(os.path.join(ROOT_DIRECTORY, resource), case_directory)
+        os.chdir(case_directory)
+
+        database = os.path.join(case_directory, "batigest.db")
+        connection = standin_connection(database)
+        create_schema(connection)
+        codes = generate_catalogue(connection, articles, seed=seed)
+        connection.close()
+        scan_file = os.path.join(case_directory, "inventaire.txt")
+        generate_scan_file(scan_file, codes, lines, unknown_ratio=unknown_ratio, seed=seed)
+
+        pool = ConnectionPool("sqlite", sqlite_database=database)
+        try:
+            events = PolicyChannel(BENCHMARK_POLICY, quiet=True)
+            pipeline = InventoryPipeline(pool, Catalogue(pool), events, render_pdf=render_pdf)
+            # Les décisions automatiques ne sont pas affichées pour ne pas fausser les mesures
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                started_at = time.perf_counter()
+                status = pipeline.run(scan_file)
+                elapsed = time.perf_counter() - started_at
+        finally:
+            pool.close()
+
+        measures = metrics.to_dict()
+        sizes = {"articles": articles, "lignes": lines}
+        for stage, data in measures["etapes"].items():
+            unit = THROUGHPUT_UNITS.get(stage)
+            data["debit_par_s"] = round(sizes[unit] / data["duree_s"]) if unit and data["duree_s"] > 0 else None
+
+        return {
+            "articles": articles,
+            "lignes": lines,
+            "statut": status,
+            "duree_totale_s": elapsed,
+            "etapes": measures["etapes"],
+        }
+
+    finally:
+        os.chdir(working_directory)
+        shutil.rmtree(case_directory, ignore_errors=True)
+
+def case_key(result):
+    """
+    Renvoie l'identifiant d'une mesure, pour la comparer à la référence.
+
+    Args:
+        result (dict): Le résultat d'une mesure.
+
+    Returns:
+        str: L'identifiant de la mesure.
+    """
+    return f"{result['articles']}x{result['lignes']}"
+
+def print_result(result):
+    """
+    Affiche les mesures d'une exécution, étape par étape.
+
+    Args:
+        result (dict): Le résultat d'une mesure.
+    """
+    print(f"\n{result['articles']} articles, {result['lignes']} lignes scannées "
+          f"(statut {result['statut']}, {result['duree_totale_s']:.2f} s)")
+    print(f"  {'Étape':<12}{'Durée (s)':>12}{'Requêtes':>10}{'Lignes lues':>13}{'Mémoire (Mo)':>14}{'Débit (/s)':>14}")
+    for stage, data in result["etapes"].items():
+        memory = "-" if data["pic_memoire_octets"] is None else f"{data['pic_memoire_octets'] / 1024 / 1024:.1f}"
+        throughput = "-" if data["debit_par_s"] is None else str(data["debit_par_s"])
+        print(f"  {stage:<12}{data['duree_s']:>12.3f}{data['requetes_sql']:>10}{data['lignes_lues']:>13}{memory:>14}{throughput:>14}")
+
+def compare_results(results, baseline, threshold):
+    """
+    Compare les durées de chaque étape avec celles d'une exécution de référence.
+
+    Args:
+        results (list): Les résultats des mesures.
+        baseline (list): Les résultats de référence.
+        threshold (float): L'écart relatif de durée toléré.
+
+    Returns:
+        list: Les régressions constatées, sous forme de messages.
+    """
+    baseline_by_case = {case_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        reference = baseline_by_case.get(case_key(result))
+        if reference is None:
+            continue
+        for stage, data in result["etapes"].items():
+            reference_data = reference["etapes"].get(stage)
+            if reference_data is None or reference_data["duree_s"] < MIN_COMPARED_DURATION:
+                continue
+            ratio = data["duree_s"] / reference_data["duree_s"] - 1
+            if ratio > threshold:
+                regressions.append(
+                    f"{case_key(result)} {stage} : {reference_data['duree_s']:.3f} s -> {data['duree_s']:.3f} s (+{ratio:.0%})"
+                )
+    return regressions
+
+def parse_arguments(argv):
+    """
+    Analyse les arguments de la ligne de commande.
+
+    Args:
+        argv (list): Les arguments de la ligne de commande, sans le nom du programme.
+
+    Returns:
+        argparse.Namespace: Les arguments analysés.
+    """
+    parser = argparse.ArgumentParser(description="Mesure des performances du traitement d'inventaire sur une base SQLite de substitution.")
+    parser.add_argument("--articles", type=int, nargs="+", default=DEFAULT_CATALOGUE_SIZES, help="Tailles de catalogue mesurées (1 000 à 500 000)")
+    parser.add_argument("--lignes", type=int, nargs="+", default=DEFAULT_SCAN_SIZES, help="Tailles de fichier scanné mesurées (10 000 à 5 000 000)")
+    parser.add_argument("--inconnus", type=float, default=0.001, help="Proportion de codes inexistants dans le fichier scanné")
+    parser.add_argument("--pdf", action="store_true", help="Convertir les rapports en PDF (nécessite wkhtmltopdf)")
+    parser.add_argument("--memoire", action="store_true", help="Mesurer le pic de mémoire de chaque étape (ralentit les mesures)")
+    parser.add_argument("--graine", type=int, default=0, help="Graine des générateurs de données")
+    parser.add_argument("--sortie", metavar="FICHIER", help="Fichier JSON où enregistrer les résultats")
+    parser.add_argument("--reference", metavar="FICHIER", help="Fichier JSON de résultats de référence à comparer")
+    parser.add_argument("--seuil", type=float, default=DEFAULT_THRESHOLD, help="Écart de durée toléré par rapport à la référence")
+    return parser.parse_args(argv)
+
+def main(argv):
+    """
+    Exécute l'ensemble des mesures demandées.
+
+    Args:
+        argv (list): Les arguments de la ligne de commande, sans le nom du programme.
+
+    Returns:
+        int: 0 si aucune exécution n'a échoué ni régressé, 1 sinon.
+    """
+    args = parse_arguments(argv)
+    metrics.trace_memory = args.memoire
+
+    results = []
+    for articles in args.articles:
+        for lines in args.lignes:
+            result = run_case(articles, lines, args.inconnus, args.pdf, args.graine)
+            print_result(result)
+            results.append(result)
+
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    exit_code = 0
+    if any(result["statut"] != RUN_SUCCESS for result in results):
+        print("\nAu moins une exécution n'a pas abouti.", file=sys.stderr)
+        exit_code = 1
+
+    if args.reference:
+        with open(args.reference, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.seuil)
+        for regression in regressions:
+            print(f"[REGRESSION] {regression}", file=sys.stderr)
+        if regressions:
+            exit_code = 1
+
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,139 @@
+"""
+    But : Ce fichier contient une base SQLite de substitution à Batigest Connect et les générateurs de données des mesures de performance
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import random
+from db import *
+
+# Schéma réduit aux tables et colonnes de Batigest Connect utilisées par l'inventaire
+SCHEMA = (
+    "CREATE TABLE FamilleArticle ("
+    "Code TEXT PRIMARY KEY, "
+    "Libelle TEXT NOT NULL)",
+
+    "CREATE TABLE ElementDef ("
+    "Code TEXT PRIMARY KEY, "
+    "NumCommercialGlobal TEXT NOT NULL, "
+    "LibelleStd TEXT, "
+    "Famille TEXT)",
+
+    "CREATE INDEX IX_ElementDef_NumCommercialGlobal ON ElementDef (NumCommercialGlobal)",
+
+    "CREATE TABLE ElementStock ("
+    "CodeElem TEXT PRIMARY KEY, "
+    "Depot TEXT, "
+    "QttAppro INTEGER NOT NULL DEFAULT 0, "
+    "QttConso INTEGER NOT NULL DEFAULT 0, "
+    "QttReservee INTEGER NOT NULL DEFAULT 0, "
+    "PAMP REAL NOT NULL DEFAULT 0)",
+
+    "CREATE TABLE ElementMvtStock ("
+    "Id INTEGER PRIMARY KEY AUTOINCREMENT, "
+    "CodeElem TEXT NOT NULL, "
+    "TypeMvt TEXT NOT NULL, "
+    "Provenance TEXT NOT NULL, "
+    "Date TEXT NOT NULL, "
+    "Quantite INTEGER NOT NULL, "
+    "PA REAL, "
+    "Info TEXT)",
+)
+
+# Proportions d'articles générés sans famille et sans ligne de stock
+NO_FAMILY_RATIO = 0.01
+NO_STOCK_RATIO = 0.05
+
+def standin_connection(path=":memory:"):
+    """
+    Ouvre une base SQLite de substitution à Batigest Connect.
+
+    Args:
+        path (str, optional): Le chemin du fichier de base de données. Par défaut, une base en mémoire.
+
+    Returns:
+        sqlite3.Connection: La connexion à la base, dont les lignes sont accessibles par attribut.
+    """
+    return sqlite_connection(path)
+
+def create_schema(connection):
+    """
+    Crée les tables de Batigest Connect utilisées par l'inventaire.
+
+    Args:
+        connection (sqlite3.Connection): La connexion à la base de substitution.
+    """
+    cursor = connection.cursor()
+    for statement in SCHEMA:
+        cursor.execute(statement)
+    connection.commit()
+
+def generate_catalogue(connection, articles, families=40, seed=0):
+    """
+    Remplit la base de substitution avec un catalogue synthétique.
+
+    Une petite partie des articles est générée sans famille ou sans ligne de stock,
+    afin d'exercer les mêmes chemins que les données de production.
+
+    Args:
+        connection (sqlite3.Connection): La connexion à la base de substitution.
+        articles (int): Le nombre d'articles à générer.
+        families (int, optional): Le nombre de familles d'articles. Par défaut, 40.
+        seed (int, optional): La graine du générateur aléatoire. Par défaut, 0.
+
+    Returns:
+        list: Les numéros commerciaux des articles générés.
+    """
+    rng = random.Random(seed)
+    family_codes = [f"F{index:03d}." for index in range(families)]
+
+    definitions = []
+    stocks = []
+    codes = []
+    for index in range(articles):
+        code = f"ART{index:07d}"
+        num_commercial = f"{3000000000000 + index * 7919:013d}"
+        family = None if rng.random() < NO_FAMILY_RATIO else rng.choice(family_codes)
+        definitions.append((code, num_commercial, f"Article de test n°{index}", family))
+        if rng.random() >= NO_STOCK_RATIO:
+            appro = rng.randint(0, 200)
+            stocks.append((code, "PRINCIPAL", appro, rng.randint(0, appro), 0, round(rng.uniform(0.1, 250), 2)))
+        codes.append(num_commercial)
+
+    cursor = connection.cursor()
+    cursor.executemany(
+        "INSERT INTO FamilleArticle (Code, Libelle) VALUES (?, ?)",
+        [(code, f"Famille de test {code[:-1]}") for code in family_codes]
+    )
+    cursor.executemany("INSERT INTO ElementDef (Code, NumCommercialGlobal, LibelleStd, Famille) VALUES (?, ?, ?, ?)", definitions)
+    cursor.executemany("INSERT INTO ElementStock (CodeElem, Depot, QttAppro, QttConso, QttReservee, PAMP) VALUES (?, ?, ?, ?, ?, ?)", stocks)
+    connection.commit()
+    return codes
+
+def generate_scan_file(path, codes, lines, unknown_ratio=0.0, coverage=0.8, crlf=True, seed=0):
+    """
+    Écrit un fichier synthétique extrait de la douchette.
+
+    Les codes scannés sont tirés parmi une partie du catalogue (les articles non
+    couverts seront remis à zéro), avec éventuellement des codes inexistants.
+
+    Args:
+        path (str): Le chemin du fichier à écrire.
+        codes (list): Les numéros commerciaux du catalogue.
+        lines (int): Le nombre de lignes du fichier.
+        unknown_ratio (float, optional): La proportion de codes inexistants. Par défaut, 0.
+        coverage (float, optional): La proportion du catalogue scannée. Par défaut, 0.8.
+        crlf (bool, optional): Fins de ligne Windows, comme la douchette. Par défaut, True.
+        seed (int, optional): La graine du générateur aléatoire. Par défaut, 0.
+    """
+    rng = random.Random(seed)
+    scanned = rng.sample(codes, max(1, int(len(codes) * coverage)))
+    newline = "\r\n" if crlf else "\n"
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for _ in range(lines):
+            if unknown_ratio and rng.random() < unknown_ratio:
+                code = f"{9000000000000 + rng.randrange(1000000):013d}"
+            else:
+                code = rng.choice(scanned)
+            f.write(code + newline)
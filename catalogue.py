@@ -0,0 +1,273 @@
+"""
+    But : Ce fichier contient l'index en mémoire du catalogue d'articles
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import threading
+from db import *
+from catalogue_cache import *
+from triage import *
+
+class Catalogue:
+    """
+    Index en mémoire du catalogue d'articles de Batigest Connect.
+
+    Le catalogue (ElementDef, FamilleArticle et ElementStock) est chargé en une
+    seule requête, sous forme d'articles compacts (Article), puis indexé par
+    numéro commercial, ce qui évite un aller-retour vers la base de données pour
+    chaque code scanné. Le chargement est paresseux : il a lieu au premier accès,
+    ou explicitement via refresh(). Après une écriture en base (mise à jour du
+    stock), invalidate() ou refresh() doivent être appelés pour que les quantités
+    lues soient à jour. Le chargement utilise sa propre connexion de la réserve,
+    et peut donc avoir lieu pendant une écriture.
+
+    Avec un cache local (CatalogueCache), le chargement commence par lire l'empreinte
+    des articles et des familles en base de données : si elle n'a pas changé, le
+    catalogue est relu depuis le cache et seules les quantités en stock sont relues
+    en base, sinon il est rechargé depuis la base puis enregistré dans le cache.
+
+    Attributes:
+        pool (ConnectionPool): Réserve de connexions à la base de données.
+        cache (CatalogueCache): Le cache local du catalogue, ou None.
+    """
+
+    def __init__(self, pool, cache_path=None):
+        """
+        Initialise un catalogue vide, non chargé.
+
+        Args:
+            pool (ConnectionPool): Réserve de connexions à la base de données.
+            cache_path (str, optional): Le chemin du fichier de cache local du catalogue.
+                Par défaut, None (pas de cache).
+        """
+        self.pool = pool
+        self.cache = CatalogueCache(cache_path) if cache_path else None
+        self._lock = threading.RLock()
+        self._articles = None
+        self._families = None
+        self._barcode_index = None
+
+    def refresh(self):
+        """
+        Recharge l'intégralité du catalogue depuis la base de données.
+
+        Si la lecture échoue, elle est retentée une fois sur une nouvelle connexion :
+        la connexion défaillante est écartée par la réserve à sa libération.
+
+        Raises:
+            ConnectionError: Si aucune connexion n'a pu être établie.
+            Exception: Si le catalogue n'a pas pu être récupéré.
+        """
+        with self._lock:
+            self._load()
+
+    def _load(self):
+        """
+        Charge le catalogue et construit ses index.
+
+        Raises:
+            ConnectionError: Si aucune connexion n'a pu être établie.
+            Exception: Si le catalogue n'a pas pu être récupéré.
+        """
+        rows = families = signature = None
+        for attempt in range(2):
+            with self.pool.repository() as repository:
+                # Empreinte lue avant le catalogue : une modification concurrente rendra le cache obsolète
+                if self.cache is not None:
+                    signature = repository.catalogue_signature()
+                    cached = self.cache.load(self.pool.source(), signature) if signature is not None else None
+                    if cached is not None:
+                        # Seules les quantités en stock, modifiées à chaque mouvement, sont relues
+                        stock = repository.stock_levels()
+                        if stock is None:
+                            continue
+                        rows, families = cached
+                        for article in rows:
+                            article.set_stock(stock.get(article.code))
+                        write_log(f"Catalogue d'articles relu depuis le cache {self.cache.path}")
+                        break
+                rows = repository.catalogue()
+                if rows is not None:
+                    families = repository.families()
+            if rows is not None and families is not None:
+                if signature is not None:
+                    self.cache.save(self.pool.source(), signature, rows, families)
+                break
+        if rows is None or families is None:
+            raise Exception("Impossible de récupérer le catalogue d'articles depuis la base de données.")
+
+        articles = {}
+        for article in rows:
+            # En cas de doublon, on conserve la première ligne, comme le faisaient les requêtes unitaires
+            if article.num_commercial not in articles:
+                articles[article.num_commercial] = article
+
+        self._articles = articles
+        self._families = families
+        self._barcode_index = None
+
+    def invalidate(self):
+        """
+        Invalide le catalogue : il sera rechargé au prochain accès.
+        """
+        with self._lock:
+            self._articles = None
+            self._families = None
+            self._barcode_index = None
+
+    def is_loaded(self):
+        """
+        Indique si le catalogue est actuellement chargé en mémoire.
+
+        Returns:
+            bool: True si le catalogue est chargé, False sinon.
+        """
+        return self._articles is not None
+
+    def _get_articles(self):
+        """
+        Renvoie l'index des articles, en le chargeant si nécessaire.
+
+        Returns:
+            dict: Les articles du catalogue (Article) indexés par numéro commercial.
+        """
+        with self._lock:
+            if self._articles is None:
+                self._load()
+            return self._articles
+
+    def exists(self, num_commercial):
+        """
+        Vérifie si un article existe dans le catalogue.
+
+        Args:
+            num_commercial (str): Le numéro commercial de l'article.
+
+        Returns:
+            bool: True si l'article existe, False sinon.
+        """
+        return num_commercial in self._get_articles()
+
+    def codes(self):
+        """
+        Renvoie l'ensemble des numéros commerciaux du catalogue, pour les comparer en une seule
+        différence d'ensembles aux codes scannés.
+
+        Returns:
+            KeysView: Les numéros commerciaux des articles.
+        """
+        return self._get_articles().keys()
+
+    def barcode_index(self):
+        """
+        Renvoie l'index de similarité des numéros commerciaux, construit au premier appel
+        après chaque chargement du catalogue.
+
+        Returns:
+            BarcodeIndex: L'index des numéros commerciaux du catalogue.
+        """
+        with self._lock:
+            articles = self._get_articles()
+            if self._barcode_index is None:
+                self._barcode_index = BarcodeIndex(articles)
+            return self._barcode_index
+
+    def get_family(self, num_commercial):
+        """
+        Récupère la famille d'un article.
+
+        Args:
+            num_commercial (str): Le numéro commercial de l'article.
+
+        Returns:
+            tuple: Un tuple (code, libellé) de la famille, ou None si l'article n'existe pas
+            ou n'a pas de famille valide.
+        """
+        article = self._get_articles().get(num_commercial)
+        if article is None or article.family is None:
+            return None
+        return (article.family, self._families.get(article.family))
+
+    def get_family_name(self, family_code):
+        """
+        Récupère le nom d'une famille à partir de son code sans point final.
+
+        Args:
+            family_code (str): Le code de la famille (ex : "CCOUL").
+
+        Returns:
+            str: Le nom de la famille si trouvée, None sinon.
+        """
+        self._get_articles()
+        return self._families.get(family_code + '.')
+
+    def get_article_name(self, num_commercial):
+        """
+        Récupère le libellé d'un article.
+
+        Args:
+            num_commercial (str): Le numéro commercial de l'article.
+
+        Returns:
+            str: Le libellé de l'article si trouvé, None sinon.
+        """
+        article = self._get_articles().get(num_commercial)
+        if article is None:
+            return None
+        return article.label
+
+    def get_article_stock(self, num_commercial):
+        """
+        Récupère un article géré en stock.
+
+        Args:
+            num_commercial (str): Le numéro commercial de l'article.
+
+        Returns:
+            Article: L'article, ou None si l'article n'existe pas ou n'a pas de stock.
+        """
+        article = self._get_articles().get(num_commercial)
+        if article is None or not article.in_stock:
+            return None
+        return article
+
+    def stock_articles(self):
+        """
+        Parcourt les articles gérés en stock.
+
+        Yields:
+            Article: Chaque article du catalogue possédant une entrée dans ElementStock.
+        """
+        for article in self._get_articles().values():
+            if article.in_stock:
+                yield article
+
+    def family_reports_data(self):
+        """
+        Regroupe en une seule passe les articles en stock par famille, pour les rapports par famille.
+
+        Returns:
+            dict: Pour chaque code de famille sans point final, un dictionnaire contenant
+            le libellé de la famille ("libelle") et ses articles ("articles"), indexés par
+            numéro commercial sous la forme attendue par generate_family_report().
+        """
+        reports_data = {}
+        for article in self.stock_articles():
+            if article.family is None:
+                continue
+            family = article.family.replace(".", "")
+            if family not in reports_data:
+                reports_data[family] = {
+                    "libelle": self._families.get(article.family),
+                    "articles": {},
+                }
+            try:
+                reports_data[family]["articles"][article.num_commercial] = {
+                    "nom": article.label,
+                    "quantite": int(article.stock),
+                    "prix": article.pamp
+                }
+            except Exception as e:
+                write_log(f"[ERREUR] Impossible de récupérer les détails de l'article {article.num_commercial}: {str(e)}")
+        return reports_data
@@ -0,0 +1,153 @@
+"""
+    But : Ce fichier contient le cache local du catalogue d'articles, enregistré dans un fichier SQLite
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from decimal import Decimal
+from db import *
+
+# Version du format du cache : un cache d'une autre version est ignoré
+CATALOGUE_CACHE_VERSION = 2
+
+def _to_sql(value):
+    """
+    Convertit une valeur numérique d'article pour l'enregistrer dans le cache.
+
+    Args:
+        value (int | float | Decimal): La valeur à enregistrer, ou None.
+
+    Returns:
+        La valeur, un Decimal étant enregistré sous forme de texte pour rester exact.
+    """
+    return str(value) if isinstance(value, Decimal) else value
+
+def _from_sql(value):
+    """
+    Relit une valeur numérique d'article enregistrée dans le cache.
+
+    Args:
+        value: La valeur enregistrée.
+
+    Returns:
+        int | float | Decimal: La valeur, un texte redonnant le Decimal d'origine.
+    """
+    return Decimal(value) if isinstance(value, str) else value
+
+class CatalogueCache:
+    """
+    Cache local du catalogue d'articles (ElementDef, FamilleArticle et ElementStock).
+
+    Le catalogue est enregistré avec la base de données dont il provient et avec son
+    empreinte (voir Repository.catalogue_signature) : nombre de lignes et version de
+    ElementDef et FamilleArticle. Le cache n'est relu que si la base et l'empreinte sont
+    identiques, ce qui évite de transférer tout le catalogue à chaque exécution ; les
+    quantités en stock enregistrées sont alors remplacées par celles de la base (voir
+    Repository.stock_levels). Dans tous les autres cas (cache absent, obsolète, d'une
+    autre version ou illisible), le catalogue doit être rechargé depuis la base.
+
+    Attributes:
+        path (str): Le chemin du fichier SQLite du cache.
+    """
+
+    def __init__(self, path):
+        """
+        Initialise le cache, sans ouvrir le fichier.
+
+        Args:
+            path (str): Le chemin du fichier SQLite du cache.
+        """
+        self.path = path
+
+    def load(self, source, signature):
+        """
+        Relit le catalogue enregistré, s'il correspond à la base et à l'empreinte indiquées.
+
+        Args:
+            source (str): La base de données d'origine (voir ConnectionPool.source).
+            signature (list): L'empreinte actuelle du catalogue en base de données.
+
+        Returns:
+            tuple: Les articles (liste d'Article, dans l'ordre de la requête du catalogue) et
+            les libellés des familles (dict), ou None si le cache est absent ou obsolète.
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            connection = sqlite3.connect(self.path)
+            try:
+                meta = dict(connection.execute("SELECT Cle, Valeur FROM Meta").fetchall())
+                if (meta.get("version") != str(CATALOGUE_CACHE_VERSION) or meta.get("source") != source
+                        or meta.get("empreinte") != json.dumps(signature, default=str)):
+                    return None
+                articles = [
+                    Article(code, num_commercial, label, family and sys.intern(family), _from_sql(qtt_appro), _from_sql(qtt_conso), _from_sql(pamp))
+                    for code, num_commercial, label, family, qtt_appro, qtt_conso, pamp in connection.execute(
+                        "SELECT Code, NumCommercial, Libelle, Famille, QttAppro, QttConso, PAMP FROM Article ORDER BY Ordre"
+                    )
+                ]
+                families = dict(connection.execute("SELECT Code, Libelle FROM Famille").fetchall())
+            finally:
+                connection.close()
+        except (sqlite3.Error, ValueError, ArithmeticError) as e:
+            write_log(f"[ERREUR] Cache du catalogue {self.path} illisible : {str(e)}")
+            return None
+        return articles, families
+
+    def save(self, source, signature, articles, families):
+        """
+        Enregistre le catalogue dans le cache, en remplaçant d'un seul coup le cache précédent.
+
+        Le cache est d'abord écrit dans un fichier temporaire : une interruption pendant
+        l'écriture laisse l'ancien cache intact. Un échec d'écriture est journalisé sans
+        interrompre le traitement.
+
+        Args:
+            source (str): La base de données d'origine (voir ConnectionPool.source).
+            signature (list): L'empreinte du catalogue en base de données, lue avant le catalogue.
+            articles (list): Les articles (Article) du catalogue, dans l'ordre de la requête.
+            families (dict): Les libellés des familles, indexés par code de famille.
+        """
+        temp_path = f"{self.path}.tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+            connection = sqlite3.connect(temp_path)
+            try:
+                # Fichier temporaire remplacé d'un seul coup : la journalisation de SQLite est inutile
+                connection.execute("PRAGMA journal_mode = OFF")
+                connection.execute("PRAGMA synchronous = OFF")
+                connection.execute("CREATE TABLE Meta (Cle TEXT PRIMARY KEY, Valeur TEXT)")
+                connection.execute(
+                    "CREATE TABLE Article (Ordre INTEGER PRIMARY KEY, Code, NumCommercial, Libelle, Famille, QttAppro, QttConso, PAMP)"
+                )
+                connection.execute("CREATE TABLE Famille (Code TEXT PRIMARY KEY, Libelle)")
+                connection.executemany("INSERT INTO Meta (Cle, Valeur) VALUES (?, ?)", [
+                    ("version", str(CATALOGUE_CACHE_VERSION)),
+                    ("source", source),
+                    ("empreinte", json.dumps(signature, default=str)),
+                ])
+                connection.executemany(
+                    "INSERT INTO Article (Code, NumCommercial, Libelle, Famille, QttAppro, QttConso, PAMP) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        (article.code, article.num_commercial, article.label, article.family,
+                         _to_sql(article.qtt_appro), _to_sql(article.qtt_conso), _to_sql(article.pamp))
+                        for article in articles
+                    )
+                )
+                connection.executemany("INSERT INTO Famille (Code, Libelle) VALUES (?, ?)", families.items())
+                connection.commit()
+            finally:
+                connection.close()
+            os.replace(temp_path, self.path)
+
+        except (OSError, sqlite3.Error) as e:
+            write_log(f"[ERREUR] Impossible d'enregistrer le cache du catalogue {self.path} : {str(e)}")
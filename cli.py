@@ -0,0 +1,197 @@
+"""
+    But : Ce fichier permet l'exécution de l'inventaire en ligne de commande, sans interface graphique
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import argparse
+import json
+import sys
+from constantes import *
+from db import *
+from utils import *
+from catalogue import *
+from pipeline import *
+
+# Codes de sortie propres à la ligne de commande (les autres sont ceux du traitement)
+EXIT_USAGE = 2
+EXIT_CONNECTION = 4
+
+# Décisions prises par défaut : tout problème interrompt le traitement
+DEFAULT_POLICY = {
+    "existing_inventory": False,
+    "unknown_article": False,
+    "article_without_family": False,
+    "retry_locked": True,
+    "locked_inventory": False,
+    "open_report": False,
+    "resume_run": True,
+}
+
+class PolicyChannel(EventChannel):
+    """
+    Canal d'événements du traitement d'inventaire en ligne de commande.
+
+    Les messages sont écrits sur la sortie standard, et les décisions sont
+    prises automatiquement selon une politique définie à l'avance, sans
+    intervention de l'utilisateur.
+
+    Attributes:
+        policy (dict): La réponse (True ou False) à donner pour chaque décision de DECISIONS.
+        quiet (bool): Si True, seuls les erreurs et les décisions prises sont affichées.
+    """
+
+    def __init__(self, policy, quiet=False):
+        """
+        Initialise le canal avec sa politique de décision.
+
+        Args:
+            policy (dict): La réponse à donner pour chaque décision de DECISIONS.
+            quiet (bool, optional): Si True, n'affiche pas les messages de déroulement. Par défaut, False.
+        """
+        super().__init__()
+        self.policy = policy
+        self.quiet = quiet
+
+    def post(self, event_type, **data):
+        """
+        Affiche les messages de déroulement sur la sortie standard.
+
+        Args:
+            event_type (str): Le type d'événement.
+            **data: Les données associées à l'événement.
+        """
+        if event_type == "log" and not self.quiet:
+            print(data["message"], flush=True)
+
+    def ask(self, kind, title, message, decision=None):
+        """
+        Répond à une demande de décision selon la politique définie.
+
+        Args:
+            kind (str): Le type de dialogue ("yesno", "retrycancel", "question", "info" ou "error").
+            title (str): Le titre du dialogue.
+            message (str): Le message du dialogue.
+            decision (str, optional): La clé de la décision demandée, dans DECISIONS.
+
+        Returns:
+            La réponse dictée par la politique, sous la forme attendue pour ce type de dialogue.
+        """
+        if kind == "error":
+            print(message, file=sys.stderr, flush=True)
+            return None
+        if kind == "info":
+            print(message, flush=True)
+            return None
+
+        answer = bool(self.policy.get(decision, False))
+        write_log(f"Décision automatique [{decision}] : {'oui' if answer else 'non'}")
+        print(f"{title} : {DECISIONS.get(decision, decision)} -> {'oui' if answer else 'non'}", flush=True)
+
+        if kind == "question":
+            return "yes" if answer else "no"
+        return answer
+
+def load_policy(policy_file):
+    """
+    Charge une politique de décision depuis un fichier JSON.
+
+    Le fichier associe à chaque clé de DECISIONS la valeur true ou false, par exemple :
+    {"unknown_article": true, "existing_inventory": false}
+
+    Args:
+        policy_file (str): Le chemin du fichier de politique.
+
+    Returns:
+        dict: Les décisions lues dans le fichier.
+
+    Raises:
+        ValueError: Si le fichier contient une décision inconnue ou une valeur non booléenne.
+    """
+    with open(policy_file, 'r', encoding='utf-8') as f:
+        policy = json.load(f)
+
+    if not isinstance(policy, dict):
+        raise ValueError("La politique doit être un objet JSON")
+    for decision, answer in policy.items():
+        if decision not in DECISIONS:
+            raise ValueError(f"Décision inconnue : {decision}")
+        if not isinstance(answer, bool):
+            raise ValueError(f"La décision {decision} doit valoir true ou false")
+
+    return policy
+
+def parse_arguments(argv):
+    """
+    Analyse les arguments de la ligne de commande.
+
+    Args:
+        argv (list): Les arguments de la ligne de commande, sans le nom du programme.
+
+    Returns:
+        argparse.Namespace: Les arguments analysés.
+    """
+    parser = argparse.ArgumentParser(
+        prog="BUROGRAPHIC_Inventaire",
+        description="Traitement d'un fichier d'inventaire sans interface graphique.",
+        epilog=f"Codes de sortie : {RUN_SUCCESS} succès, {RUN_ERROR} erreur, {EXIT_USAGE} arguments invalides, "
+               f"{RUN_CANCELLED} traitement annulé par la politique, {EXIT_CONNECTION} connexion impossible à la base de données."
+    )
+    parser.add_argument("fichier", nargs="+", help="Fichiers texte extraits des douchettes, ou dossiers les contenant")
+    parser.add_argument("--politique", metavar="FICHIER", help="Fichier JSON de politique de décision")
+    parser.add_argument("--ignorer-inconnus", action="store_true", help="Ignorer les articles inexistants (A001)")
+    parser.add_argument("--ignorer-sans-famille", action="store_true", help="Ignorer les articles sans famille (A002)")
+    parser.add_argument("--ecraser", action="store_true", help="Écraser un inventaire existant à la même date (S001)")
+    parser.add_argument("--nouveau-dossier", action="store_true", help="Créer un nouveau dossier si l'ancien inventaire ne peut être supprimé (S003/S004)")
+    parser.add_argument("--simulation", action="store_true", help="Calculer et exporter le plan des mouvements de stock sans rien modifier")
+    parser.add_argument("--appliquer", action="store_true", help="Appliquer un plan de mouvements (.json) exporté par --simulation, indiqué à la place des fichiers")
+    parser.add_argument("--silencieux", action="store_true", help="N'afficher que les erreurs et les décisions prises")
+    return parser.parse_args(argv)
+
+def run_cli(argv):
+    """
+    Exécute le traitement d'inventaire en ligne de commande.
+
+    Args:
+        argv (list): Les arguments de la ligne de commande, sans le nom du programme.
+
+    Returns:
+        int: Le code de sortie du programme.
+    """
+    args = parse_arguments(argv)
+    if args.appliquer and (args.simulation or len(args.fichier) != 1):
+        print("--appliquer attend un seul plan de mouvements, sans --simulation.", file=sys.stderr)
+        return EXIT_USAGE
+
+    # Construction de la politique de décision : défauts, fichier, puis options
+    policy = dict(DEFAULT_POLICY)
+    if args.politique:
+        try:
+            policy.update(load_policy(args.politique))
+        except (OSError, ValueError) as e:
+            print(f"Politique de décision invalide : {e}", file=sys.stderr)
+            return EXIT_USAGE
+    if args.ignorer_inconnus:
+        policy["unknown_article"] = True
+    if args.ignorer_sans_famille:
+        policy["article_without_family"] = True
+    if args.ecraser:
+        policy["existing_inventory"] = True
+    if args.nouveau_dossier:
+        policy["locked_inventory"] = True
+
+    pool = ConnectionPool()
+    try:
+        # Vérification de la connexion avant de commencer le traitement
+        with pool.repository():
+            pass
+    except ConnectionError:
+        print("Connexion à la base de données impossible.", file=sys.stderr)
+        return EXIT_CONNECTION
+
+    try:
+        events = PolicyChannel(policy, quiet=args.silencieux)
+        pipeline = InventoryPipeline(pool, Catalogue(pool, CATALOGUE_CACHE_FILE), events)
+        return pipeline.run(args.fichier, dry_run=args.simulation, apply=args.appliquer)
+    finally:
+        pool.close()
@@ -7,14 +7,51 @@
 """
 
 # Paramètres de base de données
+DB_BACKEND = "sqlserver" # "sqlserver" (Batigest Connect) ou "sqlite" (base de substitution)
+SQLITE_DATABASE = "" # Chemin de la base SQLite, si DB_BACKEND = "sqlite"
 DB_DRIVER = ""
 DB_SERVER = ""
 DB_NAME = ""
 DB_USER = "" # Facultatif dans le cas de l'authentification Windows
 DB_PASSWORD = "" # Facultatif dans le cas de l'authentification Windows
+DB_POOL_SIZE = 4 # Nombre maximal de connexions simultanées
+DB_HEALTH_CHECK_INTERVAL = 300 # Inactivité (en secondes) au-delà de laquelle une connexion est vérifiée avant usage
+DB_RECONNECT_ATTEMPTS = 3 # Nombre de tentatives de connexion
+DB_RECONNECT_DELAY = 1 # Délai (en secondes) avant la deuxième tentative, doublé à chaque échec
 
 # Fichier de log
 LOG_FILE = ""
+LOG_MAX_BYTES = 5 * 1024 * 1024 # Taille au-delà de laquelle le fichier de log est renouvelé (0 pour jamais)
+LOG_BACKUP_COUNT = 3 # Nombre d'anciens fichiers de log conservés
+
+# Reprise incrémentale d'un inventaire relancé à la même date (seuls les articles modifiés sont retraités)
+INCREMENTAL_REINVENTORY = True
+
+# Mise à jour du stock par lots validés séparément, journalisés pour permettre la reprise d'une exécution interrompue
+STOCK_BATCH_SIZE = 1000 # Nombre d'articles mis à jour par transaction
+STOCK_JOURNAL_DIRECTORY = ".\\inventaires\\journaux"
+
+# Dossier des plans de mouvements produits par les simulations (aucune écriture en base de données)
+DRY_RUN_DIRECTORY = ".\\inventaires\\simulations"
+
+# Cache local du catalogue d'articles, relu tant que l'empreinte du catalogue en base n'a pas changé ("" pour le désactiver)
+CATALOGUE_CACHE_FILE = ".\\cache\\catalogue.sqlite"
+
+# Nombre maximal de fichiers d'inventaire (douchettes) lus simultanément
+SCAN_WORKERS = 4
+
+# Nombre maximal de rapports PDF générés simultanément
+PDF_WORKERS = 4
+
+# Production des rapports PDF :
+#   "separe"          : un fichier par famille, chacun converti par son propre processus wkhtmltopdf
+#   "combine"         : un seul document regroupant toutes les familles, avec un signet par famille, converti en une fois
+#   "combine_decoupe" : comme "combine", puis découpé en un fichier par famille (nécessite pypdf)
+PDF_OUTPUT_MODE = "separe"
+PDF_COMBINED_WITH_REPORT = False # Placer le rapport d'exécution en tête du document combiné
+
+# Mesure du pic de mémoire de chaque étape (ralentit légèrement le traitement)
+METRICS_TRACE_MEMORY = False
 
 # Version de l'application
 VERSION = "v1.0.0"
@@ -26,6 +63,7 @@ ERROR_CODES = {
     "F002": "Fichier inexistant",
     "F003": "Format de fichier invalide",
     "F004": "Erreur lecture fichier",
+    "F005": "Plan de mouvements invalide",
     
     # Erreurs articles (A)
     "A001": "Article inexistant",
@@ -39,5 +77,9 @@ ERROR_CODES = {
     
     # Erreurs base de données (D)
     "D001": "Échec mise à jour stock",
-    "D002": "Transaction annulée"
+    "D002": "Transaction annulée",
+    "D003": "Stock modifié pendant la mise à jour",
+
+    # Erreurs rapports (R)
+    "R001": "Échec génération rapport"
 }
\ No newline at end of file
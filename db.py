@@ -4,8 +4,83 @@
     Date : 11/04/2025
 """
 
-import pyodbc
+import hashlib
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
 from utils import *
+from metrics import *
+
+# pyodbc (et le gestionnaire ODBC du système) n'est nécessaire que pour SQL Server :
+# sans lui, seule la base SQLite de substitution est utilisable
+try:
+    import pyodbc
+except ImportError:
+    pyodbc = None
+
+# Erreurs de base de données gérées, quel que soit le pilote utilisé
+DB_ERRORS = (pyodbc.Error, sqlite3.Error) if pyodbc is not None else (sqlite3.Error,)
+
+def is_sqlite(connection):
+    """
+    Indique si une connexion est une base SQLite, utilisée comme substitut de Batigest Connect
+    pour les mesures de performance.
+
+    Args:
+        connection: La connexion à la base de données.
+
+    Returns:
+        bool: True s'il s'agit d'une connexion SQLite, False sinon.
+    """
+    return isinstance(connection, sqlite3.Connection)
+
+@lru_cache(maxsize=None)
+def _row_type(columns):
+    """
+    Renvoie le type de ligne associé à une liste de colonnes.
+
+    Args:
+        columns (tuple): Les noms des colonnes du résultat.
+
+    Returns:
+        type: Un namedtuple dont les champs sont les colonnes.
+    """
+    return namedtuple("Row", columns, rename=True)
+
+def _row_factory(cursor, row):
+    """
+    Construit les lignes de résultat SQLite avec un accès aux colonnes par attribut,
+    comme les lignes renvoyées par pyodbc.
+
+    Args:
+        cursor (sqlite3.Cursor): Le curseur ayant exécuté la requête.
+        row (tuple): Les valeurs de la ligne.
+
+    Returns:
+        namedtuple: La ligne de résultat.
+    """
+    return _row_type(tuple(column[0] for column in cursor.description))(*row)
+
+def sqlite_connection(path):
+    """
+    Ouvre une base SQLite reprenant les tables de Batigest Connect, utilisée
+    comme substitut pour les tests et les mesures de performance.
+
+    Args:
+        path (str): Le chemin du fichier de base de données (":memory:" pour une base en mémoire).
+
+    Returns:
+        sqlite3.Connection: La connexion à la base, dont les lignes sont accessibles par attribut.
+    """
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.row_factory = _row_factory
+    return connection
 
 def database_connection():
     """
@@ -15,8 +90,10 @@ def database_connection():
         connection (pyodbc.Connection): La connexion à la base de données si réussie, None sinon.
 
     Raises:
-        pyodbc.Error: Si une erreur se produit lors de la connexion à la base de données.
+        ImportError: Si pyodbc n'est pas installé.
     """
+    if pyodbc is None:
+        raise ImportError("pyodbc est nécessaire pour se connecter à SQL Server.")
     try:
         if DB_USER and DB_PASSWORD:
             connection = pyodbc.connect(
@@ -38,210 +115,773 @@ def database_connection():
             connection.autocommit = False
             print("Connexion réussie à la base de données SQL Server")
             return connection
-    except pyodbc.Error as e:
+    except DB_ERRORS as e:
         print(f"Erreur lors de la connexion à SQL Server : {e}")
         return None
 
-def article_exists(connection, num_commercial):
-    """
-    Vérifie si un article existe dans la base de données.
-    
-    Args:
-        connection (pyodbc.Connection): La connexion à la base de données.
-        num_commercial (str): Le numéro commercial de l'article à vérifier.
+# Colonnes projetées pour construire un article (voir Article.from_row)
+ARTICLE_COLUMNS = (
+    "ED.Code, ED.NumCommercialGlobal, ED.LibelleStd, FA.Code AS CodeFamille, "
+    "ES.CodeElem, ES.QttAppro, ES.QttConso, ES.PAMP"
+)
 
-    Returns:
-        bool: True si l'article existe, False sinon.
+# Nombre de lignes lues à la fois lors du chargement du catalogue
+CATALOGUE_FETCH_SIZE = 5000
 
-    Raises:
-        pyodbc.Error: Si une erreur se produit lors de la requête.
+class Article:
     """
-    try:
-        cursor = connection.cursor()
-        query = "SELECT COUNT(*) FROM ElementDef WHERE NumCommercialGlobal = ?"
-        cursor.execute(query, num_commercial)
-        result = cursor.fetchone()
-        return result[0] > 0
+    Article du catalogue, réduit aux colonnes utilisées par l'inventaire.
 
-    except pyodbc.Error as e:
-        write_log(f"[ERREUR] {str(e)}")
-        return False
+    Les lignes renvoyées par le pilote conservent toutes les colonnes de la requête et
+    ne sont lisibles que par position ou par nom de colonne SQL ; un article n'occupe
+    que les emplacements déclarés dans __slots__, ce qui réduit fortement la mémoire
+    d'un catalogue de plusieurs centaines de milliers d'articles.
 
-def get_family(connection, num_commercial):
+    Attributes:
+        code (str): Le code de l'article (ElementDef.Code).
+        num_commercial (str): Le numéro commercial de l'article (code-barres scanné).
+        label (str): Le libellé de l'article.
+        family (str): Le code de la famille de l'article (avec point final), ou None.
+        qtt_appro (int): La quantité approvisionnée, ou None si l'article n'est pas géré en stock.
+        qtt_conso (int): La quantité consommée, ou None si l'article n'est pas géré en stock.
+        pamp (float): Le prix d'achat moyen pondéré, ou None si l'article n'est pas géré en stock.
     """
-    Récupère les informations d'une famille à partir du numéro commercial d'un article.
 
-    Args:
-        connection (pyodbc.Connection): La connexion à la base de données.
-        num_commercial (str): Le numéro commercial de l'article.
+    __slots__ = ("code", "num_commercial", "label", "family", "qtt_appro", "qtt_conso", "pamp")
 
-    Returns:
-        tuple: Un tuple contenant le code de la famille et son libellé, ou None si l'article n'existe pas.
+    def __init__(self, code, num_commercial, label=None, family=None, qtt_appro=None, qtt_conso=None, pamp=None):
+        """
+        Initialise un article.
 
-    Raises:
-        pyodbc.Error: Si une erreur se produit lors de la requête.
-    """
-    try:
-        cursor = connection.cursor()
-        query = "SELECT FA.Code, FA.Libelle FROM FamilleArticle FA JOIN ElementDef ED ON FA.Code = ED.Famille WHERE ED.NumCommercialGlobal = ?"
-        cursor.execute(query, num_commercial)
-        result = cursor.fetchone()
-        if result:
-            return result
+        Args:
+            code (str): Le code de l'article.
+            num_commercial (str): Le numéro commercial de l'article.
+            label (str, optional): Le libellé de l'article. Par défaut, None.
+            family (str, optional): Le code de la famille de l'article. Par défaut, None.
+            qtt_appro (int, optional): La quantité approvisionnée. Par défaut, None (pas de stock).
+            qtt_conso (int, optional): La quantité consommée. Par défaut, None (pas de stock).
+            pamp (float, optional): Le prix d'achat moyen pondéré. Par défaut, None (pas de stock).
+        """
+        self.code = code
+        self.num_commercial = num_commercial
+        self.label = label
+        self.family = family
+        self.qtt_appro = qtt_appro
+        self.qtt_conso = qtt_conso
+        self.pamp = pamp
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Construit un article à partir d'une ligne de résultat.
+
+        Args:
+            row: La ligne de résultat, dont les colonnes (voir ARTICLE_COLUMNS) sont accessibles par attribut.
+
+        Returns:
+            Article: L'article correspondant.
+
+        Raises:
+            AttributeError: Si une colonne de ARTICLE_COLUMNS est absente de la ligne.
+        """
+        family = row.CodeFamille
+        # Les codes de famille, peu nombreux, sont partagés entre les articles
+        article = cls(row.Code, row.NumCommercialGlobal, row.LibelleStd, sys.intern(family) if family is not None else None)
+        article.set_stock(row if row.CodeElem is not None else None)
+        return article
+
+    def set_stock(self, row):
+        """
+        Met à jour les quantités en stock et le PAMP de l'article.
+
+        Args:
+            row: La ligne de ElementStock de l'article (QttAppro, QttConso, PAMP), ou None
+                si l'article n'est pas géré en stock.
+        """
+        if row is None:
+            self.qtt_appro = self.qtt_conso = self.pamp = None
         else:
+            self.qtt_appro = row.QttAppro or 0
+            self.qtt_conso = row.QttConso or 0
+            self.pamp = row.PAMP
+
+    @property
+    def in_stock(self):
+        """
+        bool: True si l'article possède une ligne dans ElementStock.
+        """
+        return self.qtt_appro is not None
+
+    @property
+    def stock(self):
+        """
+        int: Le stock théorique de l'article (approvisionnement - consommation), ou None s'il n'est pas géré en stock.
+        """
+        if self.qtt_appro is None:
             return None
+        return self.qtt_appro - self.qtt_conso
 
-    except pyodbc.Error as e:
-        write_log(f"[ERREUR] {str(e)}")
-        return None
+    def __repr__(self):
+        return f"Article({self.num_commercial!r}, code={self.code!r}, famille={self.family!r}, stock={self.stock!r})"
 
-def get_family_name(connection, family_code):
+def _drop_temp_table(cursor, sqlite, name):
     """
-    Récupère le nom de la famille à partir de son code.
-    
+    Supprime une table temporaire si elle existe, sans lever d'erreur.
+
+    Appelée avant la création d'une table temporaire et à la fin de la requête qui l'utilise,
+    y compris après un échec : une table laissée par une requête interrompue (ou rétablie par
+    l'annulation de la transaction) ne bloque pas la requête suivante sur la même connexion.
+
     Args:
-        connection (pyodbc.Connection): La connexion à la base de données.
-        family_code (str): Le code de la famille.
-        
-    Returns:
-        str: Le nom de la famille si trouvé, None sinon.
-        
-    Raises:
-        pyodbc.Error: Si une erreur se produit lors de la requête.
+        cursor: Le curseur de la connexion.
+        sqlite (bool): True pour une connexion SQLite.
+        name (str): Le nom de la table temporaire, sans préfixe.
     """
     try:
-        cursor = connection.cursor()
-        query = "SELECT Libelle FROM FamilleArticle WHERE Code = ?"
-        cursor.execute(query, family_code + '.')
-        result = cursor.fetchone()
-        if result:
-            return result[0]
+        if sqlite:
+            cursor.execute(f"DROP TABLE IF EXISTS temp.{name}")
         else:
-            return None
-
-    except pyodbc.Error as e:
-        write_log(f"[ERREUR] {str(e)}")
-        return None
+            cursor.execute(f"IF OBJECT_ID('tempdb..#{name}') IS NOT NULL DROP TABLE #{name}")
+    except DB_ERRORS as e:
+        write_log(f"[ERREUR] Impossible de supprimer la table temporaire {name} : {str(e)}")
 
-def get_all_articles(connection):
+def plan_stock(connection, correct_stock, cursor=None, scanned_only=False):
     """
-    Récupère tous les articles de stock à partir de la base de données.
-    
+    Calcule, sans rien écrire, l'écart entre le stock théorique et les quantités scannées.
+
     Args:
-        connection (pyodbc.Connection): La connexion à la base de données.
-        
+        connection (pyodbc.Connection): La connexion à la base de données (ou SQLite).
+        correct_stock (dict): Les quantités scannées, indexées par numéro commercial.
+        cursor (optional): Le curseur à utiliser. Par défaut, un nouveau curseur de la connexion.
+        scanned_only (bool, optional): Si True, seuls les articles présents dans correct_stock sont
+            rapprochés ; sinon, les articles non scannés ont une quantité réelle nulle. Par défaut, False.
+
     Returns:
-        list: Une liste de tuples contenant les informations des articles, ou None si aucun article n'est trouvé.
+        list: Une liste de lignes (CodeElem, NumCommercialGlobal, Stock, Reel, PAMP) pour
+        chaque article rapproché, ou None en cas d'erreur.
 
     Raises:
         pyodbc.Error: Si une erreur se produit lors de la requête.
     """
+    sqlite = is_sqlite(connection)
+    cursor = cursor or connection.cursor()
     try:
-        cursor = connection.cursor()
-        query = "SELECT ES.*, ED.NumCommercialGlobal FROM ElementStock ES JOIN ElementDef ED ON ES.CodeElem = ED.Code"
-        cursor.execute(query)
-        result = cursor.fetchall()
-        if result:
-            return result
+        # Chargement des quantités scannées
+        _drop_temp_table(cursor, sqlite, "InventaireScan")
+        if sqlite:
+            scan_table = "temp.InventaireScan"
+            cursor.execute("CREATE TEMP TABLE InventaireScan (NumCommercialGlobal TEXT PRIMARY KEY, Quantite INTEGER NOT NULL)")
         else:
-            return None
+            scan_table = "#InventaireScan"
+            cursor.fast_executemany = True
+            cursor.execute(
+                "CREATE TABLE #InventaireScan ("
+                "NumCommercialGlobal NVARCHAR(255) COLLATE DATABASE_DEFAULT PRIMARY KEY, "
+                "Quantite INT NOT NULL)"
+            )
+        if correct_stock:
+            cursor.executemany(
+                f"INSERT INTO {scan_table} (NumCommercialGlobal, Quantite) VALUES (?, ?)",
+                list(correct_stock.items())
+            )
 
-    except pyodbc.Error as e:
+        cursor.execute(
+            "SELECT ES.CodeElem, ED.NumCommercialGlobal, ES.QttAppro - ES.QttConso AS Stock, "
+            "COALESCE(S.Quantite, 0) AS Reel, ES.PAMP "
+            "FROM ElementStock ES "
+            "JOIN ElementDef ED ON ES.CodeElem = ED.Code "
+            f"{'' if scanned_only else 'LEFT '}JOIN {scan_table} S ON S.NumCommercialGlobal = ED.NumCommercialGlobal"
+        )
+        deltas = cursor.fetchall()
+        metrics.record_sql(statements=4, rows=len(deltas))
+        return deltas
+
+    except DB_ERRORS as e:
         write_log(f"[ERREUR] {str(e)}")
         return None
 
-def get_article_stock(connection, commercial_num):
+    finally:
+        _drop_temp_table(cursor, sqlite, "InventaireScan")
+
+def apply_movements(connection, movements, inventory_date, cursor=None):
     """
-    Récupère le stock d'un article à partir de son numéro commercial.
-    
+    Applique un lot d'écarts de stock planifiés, sans valider la transaction.
+
+    Chaque écart n'est appliqué que si le stock actuel de l'article est encore égal au
+    stock théorique planifié : un lot déjà appliqué (par exemple avant l'interruption
+    d'une exécution) peut donc être rejoué sans créer de mouvement en double. Un article
+    dont le stock a atteint la quantité réelle est considéré comme déjà traité ; un
+    article dont le stock a changé autrement est signalé comme conflit et laissé intact.
+
     Args:
-        connection (pyodbc.Connection): La connexion à la base de données.
-        commercial_num (str): Le numéro commercial de l'article.
-        
+        connection (pyodbc.Connection): La connexion à la base de données (ou SQLite).
+        movements (list): Les écarts planifiés (CodeElem, Stock, Reel, PAMP), avec Stock différent de Reel.
+        inventory_date (datetime): La date d'inventaire des mouvements.
+        cursor (optional): Le curseur à utiliser. Par défaut, un nouveau curseur de la connexion.
+
     Returns:
-        tuple: Un tuple contenant les informations de stock de l'article, ou None si l'article n'existe pas.
-        
+        dict: Le nombre d'écarts appliqués ("appliques") et déjà appliqués ("deja_appliques"),
+        et les codes des articles en conflit ("conflits"), ou None en cas d'erreur.
+
     Raises:
         pyodbc.Error: Si une erreur se produit lors de la requête.
-    """ 
+    """
+    sqlite = is_sqlite(connection)
+    cursor = cursor or connection.cursor()
     try:
-        cursor = connection.cursor()
-        query = "SELECT ES.*, ED.NumCommercialGlobal, ED.LibelleStd FROM ElementStock ES JOIN ElementDef ED ON ES.CodeElem = ED.Code WHERE ED.NumCommercialGlobal = ?"
-        cursor.execute(query, commercial_num)
-        result = cursor.fetchone()
-        if result:
-            return result
+        # Chargement du lot
+        _drop_temp_table(cursor, sqlite, "LotInventaire")
+        if sqlite:
+            batch_table = "temp.LotInventaire"
+            cursor.execute("CREATE TEMP TABLE LotInventaire (CodeElem TEXT PRIMARY KEY, Stock REAL NOT NULL, Reel REAL NOT NULL, PAMP REAL)")
         else:
-            return None
+            batch_table = "#LotInventaire"
+            cursor.fast_executemany = True
+            cursor.execute(
+                "CREATE TABLE #LotInventaire ("
+                "CodeElem NVARCHAR(255) COLLATE DATABASE_DEFAULT PRIMARY KEY, "
+                "Stock DECIMAL(28, 8) NOT NULL, Reel DECIMAL(28, 8) NOT NULL, PAMP DECIMAL(28, 8))"
+            )
+        cursor.executemany(f"INSERT INTO {batch_table} (CodeElem, Stock, Reel, PAMP) VALUES (?, ?, ?, ?)", [tuple(movement) for movement in movements])
+
+        # Répartition des écarts selon le stock actuel
+        cursor.execute(
+            f"SELECT L.CodeElem, L.Stock, L.Reel, ES.QttAppro - ES.QttConso AS Actuel "
+            f"FROM {batch_table} L JOIN ElementStock ES ON ES.CodeElem = L.CodeElem"
+        )
+        result = {"appliques": 0, "deja_appliques": 0, "conflits": []}
+        found = set()
+        for row in cursor.fetchall():
+            found.add(row.CodeElem)
+            if row.Actuel == row.Stock:
+                result["appliques"] += 1
+            elif row.Actuel == row.Reel:
+                result["deja_appliques"] += 1
+            else:
+                result["conflits"].append(row.CodeElem)
+        result["conflits"].extend(movement[0] for movement in movements if movement[0] not in found)
 
-    except pyodbc.Error as e:
+        # Insertion des mouvements et mise à jour du stock des seuls écarts encore à appliquer
+        pending = "ES.QttAppro - ES.QttConso = L.Stock"
+        info = f"Inventaire manuel du {inventory_date.strftime('%d/%m/%Y')}"
+        cursor.execute(
+            "INSERT INTO ElementMvtStock (CodeElem, TypeMvt, Provenance, Date, Quantite, PA, Info) "
+            "SELECT L.CodeElem, CASE WHEN L.Reel > L.Stock THEN 'E' ELSE 'S' END, 'M', ?, ABS(L.Stock - L.Reel), L.PAMP, ? "
+            f"FROM {batch_table} L JOIN ElementStock ES ON ES.CodeElem = L.CodeElem WHERE {pending}",
+            [inventory_date.isoformat(" ") if sqlite else inventory_date, info]
+        )
+        if sqlite:
+            for column, delta, condition in (("QttAppro", "L.Reel - L.Stock", "L.Reel > L.Stock"), ("QttConso", "L.Stock - L.Reel", "L.Reel < L.Stock")):
+                cursor.execute(
+                    f"UPDATE ElementStock SET {column} = {column} + "
+                    f"(SELECT {delta} FROM {batch_table} L WHERE L.CodeElem = ElementStock.CodeElem) "
+                    f"WHERE CodeElem IN (SELECT L.CodeElem FROM {batch_table} L JOIN ElementStock ES ON ES.CodeElem = L.CodeElem "
+                    f"WHERE {condition} AND {pending})"
+                )
+        else:
+            cursor.execute(
+                "UPDATE ES SET ES.QttAppro = ES.QttAppro + (L.Reel - L.Stock) "
+                "FROM ElementStock ES JOIN #LotInventaire L ON L.CodeElem = ES.CodeElem "
+                f"WHERE L.Reel > L.Stock AND {pending}"
+            )
+            cursor.execute(
+                "UPDATE ES SET ES.QttConso = ES.QttConso + (L.Stock - L.Reel) "
+                "FROM ElementStock ES JOIN #LotInventaire L ON L.CodeElem = ES.CodeElem "
+                f"WHERE L.Reel < L.Stock AND {pending}"
+            )
+
+        metrics.record_sql(statements=7, rows=len(found))
+        return result
+
+    except DB_ERRORS as e:
         write_log(f"[ERREUR] {str(e)}")
         return None
-    
-def get_article_name(connection, commercial_num):
+
+    finally:
+        _drop_temp_table(cursor, sqlite, "LotInventaire")
+
+# Catalogue complet : définition, famille et stock de chaque article
+CATALOGUE_QUERY = (
+    f"SELECT {ARTICLE_COLUMNS} "
+    "FROM ElementDef ED "
+    "LEFT JOIN FamilleArticle FA ON FA.Code = ED.Famille "
+    "LEFT JOIN ElementStock ES ON ES.CodeElem = ED.Code"
+)
+
+# Libellé de chaque famille d'articles
+FAMILIES_QUERY = "SELECT Code, Libelle FROM FamilleArticle"
+
+# Quantités en stock de chaque article, relues à chaque chargement d'un catalogue en cache
+STOCK_QUERY = "SELECT CodeElem, QttAppro, QttConso, PAMP FROM ElementStock"
+
+# Tables dont dépend le catalogue en cache : nom, clé de tri et colonnes signées.
+# ElementStock n'en fait pas partie : ses quantités changent à chaque mouvement et sont relues à part.
+SIGNED_TABLES = (
+    ("ElementDef", "Code", ("Code", "NumCommercialGlobal", "LibelleStd", "Famille")),
+    ("FamilleArticle", "Code", ("Code", "Libelle")),
+)
+
+# Colonnes rowversion des tables signées : leur maximum change à chaque insertion ou modification
+ROWVERSION_COLUMNS_QUERY = (
+    "SELECT OBJECT_NAME(object_id) AS TableName, name AS ColumnName FROM sys.columns "
+    "WHERE object_id IN (OBJECT_ID('ElementDef'), OBJECT_ID('FamilleArticle')) AND system_type_id = 189"
+)
+
+def catalogue_signature_query(sqlite, rowversion_columns=None):
     """
-    Récupère le nom d'un article à partir de son numéro commercial.
-    
+    Construit la requête d'empreinte des tables signées (voir SIGNED_TABLES) : nombre de lignes
+    et version de chaque table.
+
+    La version d'une table est le maximum de sa colonne rowversion si elle en possède une,
+    sinon l'empreinte SHA-256 de l'ensemble de ses lignes, concaténées dans l'ordre de sa clé
+    par le moteur de base de données et hachées en une seule fois.
+
     Args:
-        connection (pyodbc.Connection): La connexion à la base de données.
-        commercial_num (str): Le numéro commercial de l'article.
-        
+        sqlite (bool): True pour une connexion SQLite (fonction EMPREINTE, voir text_fingerprint).
+        rowversion_columns (dict, optional): La colonne rowversion de chaque table qui en possède une.
+            Par défaut, None (aucune).
+
     Returns:
-        str: Le nom de l'article si trouvé, None sinon.
-        
-    Raises:
-        pyodbc.Error: Si une erreur se produit lors de la requête.
+        str: La requête, dont l'unique ligne contient le nombre de lignes et la version de chaque table.
     """
-    try:
-        cursor = connection.cursor()
-        query = "SELECT LibelleStd FROM ElementDef WHERE NumCommercialGlobal = ?"
-        cursor.execute(query, commercial_num)
-        result = cursor.fetchone()
-        if result:
-            return result[0]
+    rowversion_columns = rowversion_columns or {}
+    columns = []
+    for table, key, signed_columns in SIGNED_TABLES:
+        if sqlite:
+            row = " || char(31) || ".join(f"IFNULL({column}, '')" for column in signed_columns)
+            columns.append(f"(SELECT COUNT(*) FROM {table})")
+            columns.append(f"(SELECT EMPREINTE(group_concat({row}, char(30))) FROM (SELECT * FROM {table} ORDER BY {key}))")
+        elif table in rowversion_columns:
+            columns.append(f"(SELECT COUNT_BIG(*) FROM {table})")
+            columns.append(f"(SELECT CONVERT(VARCHAR(18), MAX({rowversion_columns[table]}), 1) FROM {table})")
         else:
+            row = ", NCHAR(31), ".join(signed_columns)
+            columns.append(f"(SELECT COUNT_BIG(*) FROM {table})")
+            columns.append(
+                f"(SELECT CONVERT(VARCHAR(66), HASHBYTES('SHA2_256', "
+                f"STRING_AGG(CAST(CONCAT({row}) AS NVARCHAR(MAX)), NCHAR(30)) WITHIN GROUP (ORDER BY {key})), 1) FROM {table})"
+            )
+    return "SELECT " + ", ".join(columns)
+
+def text_fingerprint(text):
+    """
+    Fonction SQLite EMPREINTE : empreinte SHA-256 d'un texte.
+
+    Args:
+        text (str): Le texte, ou None pour une table vide.
+
+    Returns:
+        str: L'empreinte hexadécimale.
+    """
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+def _fetch_articles(cursor):
+    """
+    Lit par paquets le résultat d'une requête d'articles, sans conserver les lignes du pilote.
+
+    Args:
+        cursor: Le curseur ayant exécuté la requête.
+
+    Returns:
+        list: Les articles (Article) lus.
+    """
+    articles = []
+    while True:
+        rows = cursor.fetchmany(CATALOGUE_FETCH_SIZE)
+        if not rows:
+            return articles
+        articles.extend(Article.from_row(row) for row in rows)
+
+class Repository:
+    """
+    Accès à la base de données de Batigest Connect, quel que soit le pilote utilisé.
+
+    Le dépôt possède un curseur par requête : chaque requête est préparée une seule
+    fois par le pilote puis réexécutée avec de nouveaux paramètres, sans renvoyer
+    son texte SQL.
+
+    Deux moteurs sont pris en charge : SQL Server via pyodbc (production) et
+    SQLite (substitut pour les tests et les mesures de performance).
+
+    Attributes:
+        connection: La connexion à la base de données (pyodbc ou SQLite).
+        backend (str): Le moteur de la connexion, "sqlserver" ou "sqlite".
+        last_used (float): L'instant (time.monotonic) de la dernière restitution à la réserve.
+        suspect (bool): True si une erreur s'est produite depuis la dernière vérification de la connexion.
+    """
+
+    def __init__(self, connection):
+        """
+        Initialise le dépôt sur une connexion ouverte.
+
+        Args:
+            connection: La connexion à la base de données (pyodbc ou SQLite).
+        """
+        self.connection = connection
+        self.backend = "sqlite" if is_sqlite(connection) else "sqlserver"
+        self.last_used = time.monotonic()
+        self.suspect = False
+        self._cursors = {}
+
+    def _failed(self, error):
+        """
+        Journalise une erreur de base de données et marque la connexion comme suspecte :
+        elle sera vérifiée avant d'être de nouveau confiée par la réserve.
+
+        Args:
+            error (Exception): L'erreur survenue.
+        """
+        write_log(f"[ERREUR] {str(error)}")
+        self.suspect = True
+
+    def _cursor(self, name):
+        """
+        Renvoie le curseur dédié à une requête, en le créant si nécessaire.
+
+        Args:
+            name (str): Le nom de la requête.
+
+        Returns:
+            Le curseur de la requête.
+        """
+        if name not in self._cursors:
+            cursor = self.connection.cursor()
+            if self.backend == "sqlserver":
+                cursor.fast_executemany = True
+            self._cursors[name] = cursor
+        return self._cursors[name]
+
+    def catalogue(self):
+        """
+        Récupère en une seule requête l'ensemble du catalogue d'articles.
+
+        Returns:
+            list: Une liste d'articles (Article), ou None en cas d'erreur.
+        """
+        try:
+            cursor = self._cursor("catalogue")
+            cursor.execute(CATALOGUE_QUERY)
+            result = _fetch_articles(cursor)
+            metrics.record_sql(rows=len(result))
+            return result
+
+        except DB_ERRORS as e:
+            self._failed(e)
             return None
 
-    except pyodbc.Error as e:
-        write_log(f"[ERREUR] {str(e)}")
-        return None
+    def families(self):
+        """
+        Récupère le libellé de chaque famille d'articles.
 
-def create_movement(connection, movement_type, article, quantite):
+        Returns:
+            dict: Les libellés indexés par code de famille (avec point final), ou None en cas d'erreur.
+        """
+        try:
+            cursor = self._cursor("families")
+            cursor.execute(FAMILIES_QUERY)
+            result = {row.Code: row.Libelle for row in cursor.fetchall()}
+            metrics.record_sql(rows=len(result))
+            return result
+
+        except DB_ERRORS as e:
+            self._failed(e)
+            return None
+
+    def catalogue_signature(self):
+        """
+        Calcule l'empreinte des définitions d'articles et des familles (voir catalogue_signature_query),
+        pour vérifier la validité d'un catalogue en cache sans le relire.
+
+        Returns:
+            list: Le nombre de lignes et la version de ElementDef et FamilleArticle, ou None en cas d'erreur.
+        """
+        try:
+            if self.backend == "sqlite":
+                self.connection.create_function("EMPREINTE", 1, text_fingerprint, deterministic=True)
+                query = catalogue_signature_query(sqlite=True)
+            else:
+                cursor = self._cursor("rowversion_columns")
+                cursor.execute(ROWVERSION_COLUMNS_QUERY)
+                query = catalogue_signature_query(False, {row.TableName: row.ColumnName for row in cursor.fetchall()})
+            cursor = self._cursor("catalogue_signature")
+            cursor.execute(query)
+            result = list(cursor.fetchone())
+            metrics.record_sql(rows=1)
+            return result
+
+        except DB_ERRORS as e:
+            self._failed(e)
+            return None
+
+    def stock_levels(self):
+        """
+        Récupère en une seule requête les quantités en stock et le PAMP de chaque article.
+
+        Returns:
+            dict: Les lignes (CodeElem, QttAppro, QttConso, PAMP) indexées par code d'article,
+            ou None en cas d'erreur.
+        """
+        try:
+            cursor = self._cursor("stock_levels")
+            cursor.execute(STOCK_QUERY)
+            result = {}
+            for row in cursor.fetchall():
+                # En cas de doublon, on conserve la première ligne, comme pour le catalogue
+                result.setdefault(row.CodeElem, row)
+            metrics.record_sql(rows=len(result))
+            return result
+
+        except DB_ERRORS as e:
+            self._failed(e)
+            return None
+
+    def plan_stock(self, correct_stock, scanned_only=False):
+        """
+        Calcule sans rien écrire l'écart de stock de chaque article (voir plan_stock).
+
+        Args:
+            correct_stock (dict): Les quantités scannées, indexées par numéro commercial.
+            scanned_only (bool, optional): Ne rapprocher que les articles de correct_stock. Par défaut, False.
+
+        Returns:
+            list: Une liste de lignes (CodeElem, NumCommercialGlobal, Stock, Reel, PAMP), ou None en cas d'erreur.
+        """
+        deltas = plan_stock(self.connection, correct_stock, self._cursor("plan"), scanned_only)
+        if deltas is None:
+            self.suspect = True
+        return deltas
+
+    def apply_movements(self, movements, inventory_date):
+        """
+        Applique un lot d'écarts planifiés sans valider la transaction (voir apply_movements).
+
+        Args:
+            movements (list): Les écarts planifiés (CodeElem, Stock, Reel, PAMP).
+            inventory_date (datetime): La date d'inventaire des mouvements.
+
+        Returns:
+            dict: Les nombres d'écarts appliqués et déjà appliqués et les conflits, ou None en cas d'erreur.
+        """
+        result = apply_movements(self.connection, movements, inventory_date, self._cursor("apply"))
+        if result is None:
+            self.suspect = True
+        return result
+
+    def ping(self):
+        """
+        Vérifie que la connexion est toujours utilisable, par une requête triviale.
+
+        Returns:
+            bool: True si la base de données a répondu, False sinon.
+        """
+        try:
+            cursor = self._cursor("ping")
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            self.suspect = False
+            return True
+
+        except DB_ERRORS as e:
+            self._failed(e)
+            return False
+
+    def commit(self):
+        """
+        Valide la transaction en cours.
+        """
+        self.connection.commit()
+
+    def rollback(self):
+        """
+        Annule la transaction en cours.
+        """
+        self.connection.rollback()
+
+    def close(self):
+        """
+        Ferme les curseurs puis la connexion.
+        """
+        for cursor in self._cursors.values():
+            cursor.close()
+        self._cursors = {}
+        self.connection.close()
+
+def open_connection(backend=DB_BACKEND, sqlite_database=SQLITE_DATABASE):
     """
-    Crée un mouvement de stock pour un article donné.
-    Afin de garantir la cohérence des données, met à jour la table ElementStock
-    pour s'assurer que les quantités restent cohérentes entre elles.
+    Ouvre une connexion au moteur de base de données demandé.
 
     Args:
-        connection (pyodbc.Connection): La connexion à la base de données.
-        movement_type (str): Le type de mouvement ('E' pour entrée, 'S' pour sortie).
-        article (tuple): Les informations de l'article.
-        quantite (int): La quantité à ajouter ou à soustraire.
+        backend (str, optional): Le moteur à utiliser, "sqlserver" ou "sqlite". Par défaut, DB_BACKEND.
+        sqlite_database (str, optional): Le chemin de la base SQLite. Par défaut, SQLITE_DATABASE.
 
     Returns:
-        bool: True si le mouvement a été créé avec succès, False sinon.
+        La connexion si elle a réussi, None sinon.
 
     Raises:
-        pyodbc.Error: Si une erreur se produit lors de la requête.
+        ValueError: Si le moteur demandé n'est pas pris en charge.
     """
-    try:
-        cursor = connection.cursor()
-        # Insertion du mouvement de stock
-        query = "INSERT INTO ElementMvtStock (CodeElem, TypeMvt, Provenance, Date, Quantite, PA, Info) VALUES (?, ?, ?, ?, ?, ?, ?)"
-        info = f"Inventaire manuel du {find_closest_date().strftime('%d/%m/%Y')}"
-        cursor.execute(query, [article[0], movement_type, 'M', find_closest_date(), quantite, article[5], info])
-
-        # Mise à jour du stock de l'élément
-        if movement_type == 'E':
-            query = "UPDATE ElementStock SET QttAppro = QttAppro + ? WHERE CodeElem = ?"
-            cursor.execute(query, [quantite, article[0]])
-
-        elif movement_type == 'S':
-            query = "UPDATE ElementStock SET QttConso = QttConso + ? WHERE CodeElem = ?"
-            cursor.execute(query, [quantite, article[0]])
-
-        return True
-    
-    except pyodbc.Error as e:
-        write_log(f"[ERREUR] {str(e)}")
-        return False
\ No newline at end of file
+    if backend == "sqlserver":
+        return database_connection()
+    if backend == "sqlite":
+        try:
+            return sqlite_connection(sqlite_database)
+        except DB_ERRORS as e:
+            print(f"Erreur lors de la connexion à SQLite : {e}")
+            return None
+    raise ValueError(f"Moteur de base de données inconnu : {backend}")
+
+class ConnectionPool:
+    """
+    Réserve de connexions à la base de données, partagée entre les traitements.
+
+    Les connexions sont ouvertes à la demande, dans la limite de la taille de la
+    réserve, ce qui permet à plusieurs lecteurs (chargement du catalogue, rapports)
+    de travailler pendant qu'une transaction d'écriture est en cours sur une autre
+    connexion. Une connexion restée inutilisée plus de DB_HEALTH_CHECK_INTERVAL
+    secondes est vérifiée avant d'être confiée, et remplacée si elle a été perdue
+    (nuit d'inactivité, coupure du VPN...), de même qu'une connexion sur laquelle
+    une erreur s'est produite. Les ouvertures de connexion échouées
+    sont retentées avec un délai croissant.
+
+    Attributes:
+        backend (str): Le moteur des connexions, "sqlserver" ou "sqlite".
+        size (int): Le nombre maximal de connexions ouvertes simultanément.
+        sqlite_database (str): Le chemin de la base SQLite, si backend vaut "sqlite".
+    """
+
+    def __init__(self, backend=DB_BACKEND, size=DB_POOL_SIZE, sqlite_database=SQLITE_DATABASE):
+        """
+        Initialise une réserve vide : aucune connexion n'est ouverte avant la première demande.
+
+        Args:
+            backend (str, optional): Le moteur à utiliser. Par défaut, DB_BACKEND.
+            size (int, optional): Le nombre maximal de connexions. Par défaut, DB_POOL_SIZE.
+            sqlite_database (str, optional): Le chemin de la base SQLite. Par défaut, SQLITE_DATABASE.
+        """
+        self.backend = backend
+        self.size = size
+        self.sqlite_database = sqlite_database
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._repositories = set()
+
+    def source(self):
+        """
+        Identifie la base de données des connexions de la réserve.
+
+        Returns:
+            str: Le chemin de la base SQLite, ou le serveur et le nom de la base SQL Server.
+        """
+        if self.backend == "sqlite":
+            return f"sqlite:{os.path.abspath(self.sqlite_database)}"
+        return f"sqlserver:{DB_SERVER}/{DB_NAME}"
+
+    def _connect(self):
+        """
+        Ouvre une nouvelle connexion, en réessayant avec un délai croissant en cas d'échec.
+
+        Returns:
+            Repository: Le dépôt associé à la nouvelle connexion.
+
+        Raises:
+            ConnectionError: Si la connexion n'a pas pu être établie après DB_RECONNECT_ATTEMPTS tentatives.
+        """
+        delay = DB_RECONNECT_DELAY
+        for attempt in range(1, DB_RECONNECT_ATTEMPTS + 1):
+            connection = open_connection(self.backend, self.sqlite_database)
+            if connection is not None:
+                repository = Repository(connection)
+                with self._lock:
+                    self._repositories.add(repository)
+                return repository
+            write_log(f"[ERREUR] Tentative de connexion {attempt}/{DB_RECONNECT_ATTEMPTS} échouée")
+            if attempt < DB_RECONNECT_ATTEMPTS:
+                time.sleep(delay)
+                delay *= 2
+        raise ConnectionError("Connexion à la base de données impossible.")
+
+    def _discard(self, repository):
+        """
+        Ferme et retire de la réserve une connexion inutilisable.
+
+        Args:
+            repository (Repository): Le dépôt à retirer.
+        """
+        with self._lock:
+            self._repositories.discard(repository)
+        try:
+            repository.close()
+        except DB_ERRORS:
+            pass
+
+    def acquire(self):
+        """
+        Confie une connexion vérifiée, en attendant qu'une connexion se libère si la réserve est pleine.
+
+        Returns:
+            Repository: Le dépôt associé à la connexion.
+
+        Raises:
+            ConnectionError: Si aucune connexion n'a pu être établie.
+        """
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    repository = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                idle_time = time.monotonic() - repository.last_used
+                if (not repository.suspect and idle_time < DB_HEALTH_CHECK_INTERVAL) or repository.ping():
+                    return repository
+                write_log("Connexion à la base de données perdue, reconnexion...")
+                self._discard(repository)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, repository):
+        """
+        Rend une connexion à la réserve. Toute transaction non validée est annulée ;
+        si l'annulation échoue, la connexion est considérée comme perdue et fermée.
+
+        Args:
+            repository (Repository): Le dépôt obtenu par acquire().
+        """
+        try:
+            repository.rollback()
+            repository.last_used = time.monotonic()
+            self._idle.put(repository)
+        except DB_ERRORS as e:
+            write_log(f"[ERREUR] Connexion à la base de données fermée : {str(e)}")
+            self._discard(repository)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def repository(self):
+        """
+        Confie une connexion pour la durée d'un bloc with, puis la rend à la réserve.
+
+        Yields:
+            Repository: Le dépôt associé à la connexion.
+        """
+        repository = self.acquire()
+        try:
+            yield repository
+        finally:
+            self.release(repository)
+
+    def close(self):
+        """
+        Ferme toutes les connexions de la réserve.
+        """
+        with self._lock:
+            repositories = list(self._repositories)
+            self._repositories.clear()
+        for repository in repositories:
+            try:
+                repository.close()
+            except DB_ERRORS:
+                pass
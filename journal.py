@@ -0,0 +1,223 @@
+"""
+    But : Ce fichier contient le journal des mises à jour du stock, qui permet de reprendre une exécution interrompue
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from utils import *
+from movement_plan import *
+
+# Nature d'un journal : mise à jour du stock d'un traitement complet, ou application d'un plan de mouvements
+RUN_JOURNAL = "inventaire"
+PLAN_JOURNAL = "plan_mouvements"
+
+def new_run_id():
+    """
+    Génère l'identifiant unique d'une exécution.
+
+    Returns:
+        str: L'identifiant de l'exécution.
+    """
+    return uuid.uuid4().hex
+
+def file_checksum(file_path):
+    """
+    Calcule l'empreinte SHA-256 d'un fichier, lu par blocs.
+
+    Args:
+        file_path (str): Le chemin du fichier.
+
+    Returns:
+        str: L'empreinte hexadécimale du fichier.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def files_checksum(file_paths):
+    """
+    Calcule l'empreinte SHA-256 des fichiers scannés par une ou plusieurs douchettes.
+
+    Args:
+        file_paths (list): Les chemins des fichiers, dans l'ordre de lecture.
+
+    Returns:
+        str: L'empreinte du fichier s'il est seul, sinon celle des empreintes de chaque fichier.
+    """
+    if len(file_paths) == 1:
+        return file_checksum(file_paths[0])
+    return hashlib.sha256("".join(file_checksum(path) for path in file_paths).encode("ascii")).hexdigest()
+
+class StockJournal:
+    """
+    Journal d'une mise à jour du stock, enregistré ligne par ligne au format JSON.
+
+    La première ligne contient le plan de l'exécution : identifiant, date d'inventaire,
+    empreinte du fichier scanné, quantités retenues, familles, erreurs déjà signalées,
+    valeurs par famille et écarts de stock à appliquer. Chaque lot validé en base de
+    données ajoute ensuite une ligne, et une dernière ligne indique si la mise à jour
+    est terminée ou abandonnée. Chaque ligne est écrite sur le disque avant de
+    poursuivre, de sorte qu'une exécution interrompue peut être reprise au premier
+    lot non journalisé. Les valeurs décimales des écarts sont enregistrées sous forme
+    de texte et relues en Decimal (voir decimal_movements) : un lot repris applique
+    exactement les mêmes valeurs qu'une exécution non interrompue.
+
+    Attributes:
+        path (str): Le chemin du fichier de journal.
+        plan (dict): Le plan de l'exécution.
+        applied_batches (set): Les index des lots validés.
+        status (str): "en_cours", "termine" ou "abandonne".
+    """
+
+    def __init__(self, path, plan, applied_batches=None, status="en_cours"):
+        """
+        Initialise un journal à partir de son contenu.
+
+        Args:
+            path (str): Le chemin du fichier de journal.
+            plan (dict): Le plan de l'exécution.
+            applied_batches (set, optional): Les index des lots validés. Par défaut, aucun.
+            status (str, optional): L'état du journal. Par défaut, "en_cours".
+        """
+        self.path = path
+        self.plan = plan
+        self.applied_batches = applied_batches or set()
+        self.status = status
+
+    @classmethod
+    def create(cls, directory, plan, kind=RUN_JOURNAL):
+        """
+        Crée le journal d'une nouvelle exécution et y enregistre son plan.
+
+        Args:
+            directory (str): Le dossier des journaux.
+            plan (dict): Le plan de l'exécution, contenant au moins "run_id".
+            kind (str, optional): La nature du journal, RUN_JOURNAL ou PLAN_JOURNAL, enregistrée
+                dans le plan ("nature"). Par défaut, RUN_JOURNAL.
+
+        Returns:
+            StockJournal: Le journal créé.
+        """
+        os.makedirs(directory, exist_ok=True)
+        plan = dict(plan, nature=kind)
+        journal = cls(os.path.join(directory, f"journal_{plan['run_id']}.jsonl"), plan)
+        journal._append(dict(plan, type="plan"))
+        return journal
+
+    @classmethod
+    def load(cls, path):
+        """
+        Relit un journal existant.
+
+        Args:
+            path (str): Le chemin du fichier de journal.
+
+        Returns:
+            StockJournal: Le journal, ou None s'il est illisible.
+        """
+        plan = None
+        applied_batches = set()
+        status = "en_cours"
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Dernière ligne incomplète, écrite au moment de l'interruption
+                        break
+                    if entry["type"] == "plan":
+                        plan = entry
+                    elif entry["type"] == "lot":
+                        applied_batches.add(entry["index"])
+                    else:
+                        status = entry["type"]
+        except OSError as e:
+            write_log(f"[ERREUR] Journal {path} illisible : {str(e)}")
+            return None
+
+        if plan is None:
+            return None
+        del plan["type"]
+        plan["mouvements"] = decimal_movements(plan["mouvements"])
+        return cls(path, plan, applied_batches, status)
+
+    @classmethod
+    def find_unfinished(cls, directory, inventory_date, kind=RUN_JOURNAL):
+        """
+        Recherche le journal d'une mise à jour interrompue pour une date d'inventaire.
+
+        Seuls les journaux de la nature demandée sont retenus : l'application interrompue
+        d'un plan de mouvements n'est ni reprise ni abandonnée par un traitement complet.
+
+        Args:
+            directory (str): Le dossier des journaux.
+            inventory_date (str): La date d'inventaire (AAAA-MM-JJ).
+            kind (str, optional): La nature des journaux recherchés. Par défaut, RUN_JOURNAL.
+
+        Returns:
+            StockJournal: Le journal inachevé le plus récent, ou None s'il n'y en a pas.
+        """
+        if not os.path.isdir(directory):
+            return None
+        paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.startswith("journal_") and name.endswith(".jsonl")]
+        for path in sorted(paths, key=os.path.getmtime, reverse=True):
+            journal = cls.load(path)
+            if (journal is not None and journal.status == "en_cours" and journal.plan.get("date") == inventory_date
+                    and journal.plan.get("nature", RUN_JOURNAL) == kind):
+                return journal
+        return None
+
+    def _append(self, entry):
+        """
+        Ajoute une ligne au journal et force son écriture sur le disque.
+
+        Args:
+            entry (dict): La ligne à ajouter.
+        """
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=decimal_to_json) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def batches(self):
+        """
+        Découpe les écarts planifiés en lots de la taille prévue par le plan.
+
+        Returns:
+            list: Les lots d'écarts (CodeElem, Stock, Reel, PAMP).
+        """
+        movements = self.plan["mouvements"]
+        size = self.plan["taille_lot"]
+        return [movements[start:start + size] for start in range(0, len(movements), size)]
+
+    def record_batch(self, index, result):
+        """
+        Enregistre la validation d'un lot.
+
+        Args:
+            index (int): L'index du lot.
+            result (dict): Le résultat de son application (voir apply_movements).
+        """
+        self._append(dict(result, type="lot", index=index))
+        self.applied_batches.add(index)
+
+    def finish(self):
+        """
+        Marque la mise à jour du stock comme terminée.
+        """
+        self._append({"type": "termine"})
+        self.status = "termine"
+
+    def abandon(self):
+        """
+        Marque la mise à jour du stock comme abandonnée : elle ne sera plus proposée à la reprise.
+        """
+        self._append({"type": "abandonne"})
+        self.status = "abandonne"
@@ -4,8 +4,19 @@
     Date : 11/04/2025
 """
 
+import sys
+import time
+
+# Instant de lancement, pour mesurer la durée de démarrage
+STARTED_AT = time.perf_counter()
+
+if len(sys.argv) > 1:
+    # Exécution sans interface graphique
+    from cli import *
+    sys.exit(run_cli(sys.argv[1:]))
+
 from ui import *
 
 root = tk.Tk()
-app = Interface(root)
-root.mainloop()
\ No newline at end of file
+app = Interface(root, started_at=STARTED_AT)
+root.mainloop()
@@ -0,0 +1,168 @@
+"""
+    But : Ce fichier contient la mesure des performances de chaque étape du traitement d'inventaire
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import json
+import threading
+import time
+import tracemalloc
+from constantes import *
+
+class Metrics:
+    """
+    Mesures de performance d'une exécution du traitement d'inventaire.
+
+    Pour chaque étape sont relevés la durée, le nombre de requêtes SQL, le nombre
+    de lignes lues en base de données, le pic de mémoire allouée et des compteurs
+    libres (documents générés...). Une étape se termine au début de la suivante
+    ou à l'appel de end().
+
+    Attributes:
+        stages (dict): Les mesures de chaque étape, dans l'ordre d'exécution.
+        trace_memory (bool): Si True, le pic de mémoire de chaque étape est mesuré.
+    """
+
+    # Nom de l'étape à laquelle sont attribuées les mesures prises hors de toute étape
+    NO_STAGE = "hors_etape"
+
+    def __init__(self, trace_memory=METRICS_TRACE_MEMORY):
+        """
+        Initialise des mesures vides.
+
+        Args:
+            trace_memory (bool, optional): Mesurer le pic de mémoire de chaque étape. Par défaut, METRICS_TRACE_MEMORY.
+        """
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Efface toutes les mesures, avant une nouvelle exécution.
+        """
+        with self._lock:
+            self.stages = {}
+            self._current = None
+            self._started_at = None
+            self._tracing_memory = False
+            self._traced_by_us = False
+
+    def _stage_data(self, stage, label=None):
+        """
+        Renvoie les mesures d'une étape, en les créant si nécessaire.
+
+        Args:
+            stage (str): Le nom de l'étape.
+            label (str, optional): Le libellé de l'étape. Par défaut, son nom.
+
+        Returns:
+            dict: Les mesures de l'étape.
+        """
+        if stage not in self.stages:
+            self.stages[stage] = {
+                "libelle": label or stage,
+                "duree_s": 0.0,
+                "requetes_sql": 0,
+                "lignes_lues": 0,
+                "pic_memoire_octets": None,
+                "compteurs": {},
+            }
+        return self.stages[stage]
+
+    def begin(self, stage, label=None):
+        """
+        Termine l'étape en cours et commence la mesure d'une nouvelle étape.
+
+        Args:
+            stage (str): Le nom de la nouvelle étape.
+            label (str, optional): Le libellé de l'étape, pour l'affichage. Par défaut, son nom.
+        """
+        self.end()
+        with self._lock:
+            self._stage_data(stage, label)
+            self._current = stage
+            if self.trace_memory:
+                # Un suivi de la mémoire démarré par ailleurs n'est pas interrompu : seul son pic est remis à zéro
+                self._traced_by_us = not tracemalloc.is_tracing()
+                if self._traced_by_us:
+                    tracemalloc.start()
+                else:
+                    tracemalloc.reset_peak()
+                self._tracing_memory = True
+            self._started_at = time.perf_counter()
+
+    def end(self):
+        """
+        Termine la mesure de l'étape en cours, s'il y en a une.
+        """
+        with self._lock:
+            if self._current is None:
+                return
+            data = self.stages[self._current]
+            data["duree_s"] += time.perf_counter() - self._started_at
+            if self._tracing_memory and tracemalloc.is_tracing():
+                peak = tracemalloc.get_traced_memory()[1]
+                data["pic_memoire_octets"] = max(peak, data["pic_memoire_octets"] or 0)
+            if self._traced_by_us:
+                tracemalloc.stop()
+            self._tracing_memory = self._traced_by_us = False
+            self._current = None
+            self._started_at = None
+
+    def record_sql(self, statements=1, rows=0):
+        """
+        Comptabilise des requêtes SQL dans l'étape en cours.
+
+        Args:
+            statements (int, optional): Le nombre de requêtes exécutées. Par défaut, 1.
+            rows (int, optional): Le nombre de lignes lues. Par défaut, 0.
+        """
+        with self._lock:
+            data = self._stage_data(self._current or self.NO_STAGE)
+            data["requetes_sql"] += statements
+            data["lignes_lues"] += rows
+
+    def count(self, name, amount=1):
+        """
+        Incrémente un compteur libre de l'étape en cours.
+
+        Args:
+            name (str): Le nom du compteur.
+            amount (int, optional): La valeur à ajouter. Par défaut, 1.
+        """
+        with self._lock:
+            counters = self._stage_data(self._current or self.NO_STAGE)["compteurs"]
+            counters[name] = counters.get(name, 0) + amount
+
+    def to_dict(self):
+        """
+        Renvoie l'ensemble des mesures sous une forme sérialisable.
+
+        Returns:
+            dict: Les mesures de chaque étape et leurs totaux.
+        """
+        with self._lock:
+            stages = {stage: dict(data, compteurs=dict(data["compteurs"])) for stage, data in self.stages.items()}
+        return {
+            "etapes": stages,
+            "total": {
+                "duree_s": sum(data["duree_s"] for data in stages.values()),
+                "requetes_sql": sum(data["requetes_sql"] for data in stages.values()),
+                "lignes_lues": sum(data["lignes_lues"] for data in stages.values()),
+            },
+        }
+
+    def write_json(self, path):
+        """
+        Enregistre les mesures au format JSON.
+
+        Args:
+            path (str): Le chemin du fichier JSON à écrire.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+# Mesures de l'exécution en cours, partagées par l'ensemble du module
+metrics = Metrics()
@@ -0,0 +1,209 @@
+"""
+    But : Ce fichier contient le calcul, l'export, le résumé et l'enregistrement vérifiable du plan des mouvements de stock d'un inventaire
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import hashlib
+import json
+import os
+import stat
+from collections import namedtuple
+from decimal import Decimal
+from valuation import *
+
+# Mouvement de stock prévu pour un article : stock théorique, quantité scannée, écart,
+# type de mouvement ('E' entrée, 'S' sortie), PAMP tel qu'en base (non arrondi, il est repris
+# dans le prix des mouvements) et impact sur la valeur du stock
+PlannedMovement = namedtuple("PlannedMovement", [
+    "code", "num_commercial", "family", "stock", "scanned", "delta", "movement_type", "pamp", "value_impact",
+])
+
+# En-tête du plan exporté au format CSV
+MOVEMENT_PLAN_HEADER = ["Code", "Numéro commercial", "Famille", "Stock théorique", "Quantité scannée", "Écart", "Mouvement", "PAMP", "Impact valeur"]
+
+def build_movement_plan(counts, catalogue):
+    """
+    Calcule les mouvements de stock qu'appliquerait l'inventaire, à partir du catalogue en mémoire.
+
+    Le calcul ne lit que le catalogue, chargé en une seule requête de lecture : il ne crée
+    aucune table temporaire ni transaction d'écriture et ne verrouille donc pas ElementStock.
+    Comme lors d'une exécution réelle, les articles en stock non scannés sont ramenés à zéro.
+
+    Args:
+        counts (dict): Les quantités retenues, indexées par numéro commercial.
+        catalogue (Catalogue): Le catalogue d'articles.
+
+    Returns:
+        list: Les mouvements prévus (PlannedMovement) des articles dont le stock change,
+        dans l'ordre du catalogue.
+    """
+    plan = []
+    for article in catalogue.stock_articles():
+        scanned = counts.get(article.num_commercial, 0)
+        delta = scanned - article.stock
+        if delta == 0:
+            continue
+        plan.append(PlannedMovement(
+            article.code,
+            article.num_commercial,
+            article.family,
+            article.stock,
+            scanned,
+            delta,
+            "E" if delta > 0 else "S",
+            article.pamp,
+            line_value(delta, article.pamp),
+        ))
+    return plan
+
+def write_movement_plan(path, plan):
+    """
+    Exporte un plan de mouvements au format CSV (séparateur ";", montants avec une virgule).
+
+    Args:
+        path (str): Le chemin du fichier CSV.
+        plan (list): Les mouvements prévus (voir build_movement_plan).
+    """
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(";".join(MOVEMENT_PLAN_HEADER) + "\n")
+        file.writelines(
+            f"{movement.code};{movement.num_commercial};{movement.family or ''};{movement.stock};{movement.scanned};"
+            f"{movement.delta};{movement.movement_type};{format_amount(movement.pamp)};{format_amount(movement.value_impact)}\n"
+            for movement in plan
+        )
+
+def summarize_movement_plan(plan):
+    """
+    Résume un plan de mouvements : nombre de mouvements, quantités et impact sur la valeur du stock.
+
+    Args:
+        plan (list): Les mouvements prévus (voir build_movement_plan).
+
+    Returns:
+        dict: Le nombre de mouvements ("mouvements", "entrees", "sorties"), les quantités
+        entrées et sorties ("quantite_entree", "quantite_sortie") et l'impact total sur la
+        valeur du stock ("impact_valeur", Decimal).
+    """
+    summary = {
+        "mouvements": len(plan),
+        "entrees": 0,
+        "sorties": 0,
+        "quantite_entree": 0,
+        "quantite_sortie": 0,
+        "impact_valeur": Decimal(0),
+    }
+    for movement in plan:
+        if movement.movement_type == "E":
+            summary["entrees"] += 1
+            summary["quantite_entree"] += movement.delta
+        else:
+            summary["sorties"] += 1
+            summary["quantite_sortie"] -= movement.delta
+        summary["impact_valeur"] += movement.value_impact
+    summary["impact_valeur"] = to_amount(summary["impact_valeur"])
+    return summary
+
+def stock_movements(plan):
+    """
+    Convertit un plan de mouvements en écarts à appliquer en base de données.
+
+    Args:
+        plan (list): Les mouvements prévus (voir build_movement_plan).
+
+    Returns:
+        list: Les écarts sous la forme [CodeElem, Stock, Reel, PAMP] attendue par apply_movements.
+    """
+    return [[movement.code, movement.stock, movement.scanned, movement.pamp] for movement in plan]
+
+def decimal_to_json(value):
+    """
+    Sérialise les valeurs non prises en charge par JSON d'un fichier de mouvements ou d'un journal.
+
+    Args:
+        value: La valeur à sérialiser.
+
+    Returns:
+        str: L'écriture exacte d'un Decimal, sans passer par un nombre à virgule flottante.
+
+    Raises:
+        TypeError: Si la valeur n'est pas un Decimal.
+    """
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Valeur non sérialisable dans un plan de mouvements : {value!r}")
+
+def decimal_movements(movements):
+    """
+    Relit les écarts enregistrés dans un fichier de mouvements ou dans un journal.
+
+    Args:
+        movements (list): Les écarts relus du JSON, sous la forme [CodeElem, Stock, Reel, PAMP].
+
+    Returns:
+        list: Les écarts, dont les quantités et prix décimaux, enregistrés sous forme de texte
+        (voir decimal_to_json), redeviennent des Decimal.
+    """
+    return [
+        [code, *(Decimal(value) if isinstance(value, str) else value for value in values)]
+        for code, *values in movements
+    ]
+
+def _contents_checksum(contents):
+    """
+    Calcule l'empreinte SHA-256 du contenu d'un fichier de mouvements, sous sa forme JSON canonique.
+
+    Args:
+        contents (dict): Le contenu du fichier.
+
+    Returns:
+        str: L'empreinte hexadécimale du contenu.
+    """
+    canonical = json.dumps(contents, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=decimal_to_json)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def save_movement_file(path, contents):
+    """
+    Enregistre un fichier de mouvements, avec son empreinte, puis le passe en lecture seule.
+
+    Args:
+        path (str): Le chemin du fichier JSON.
+        contents (dict): Le contenu du fichier, contenant au moins "run_id", "date" et "mouvements".
+
+    Returns:
+        str: L'empreinte du contenu enregistré.
+    """
+    checksum = _contents_checksum(contents)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({"empreinte": checksum, "plan": contents}, file, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=decimal_to_json)
+    os.chmod(path, stat.S_IREAD)
+    return checksum
+
+def load_movement_file(path):
+    """
+    Relit un fichier de mouvements et vérifie qu'il n'a pas été modifié depuis son enregistrement.
+
+    Args:
+        path (str): Le chemin du fichier JSON.
+
+    Returns:
+        tuple: L'empreinte du contenu (str) et le contenu du fichier (dict), dont les valeurs
+        décimales des mouvements sont relues en Decimal.
+
+    Raises:
+        OSError: Si le fichier ne peut pas être lu.
+        ValueError: Si le fichier est illisible, incomplet ou si son empreinte ne correspond plus à son contenu.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    if not isinstance(data, dict) or not isinstance(data.get("plan"), dict):
+        raise ValueError("Le fichier n'est pas un plan de mouvements")
+    contents = data["plan"]
+    for key in ("run_id", "date", "mouvements"):
+        if key not in contents:
+            raise ValueError(f"Le plan de mouvements ne contient pas la clé {key}")
+    if _contents_checksum(contents) != data.get("empreinte"):
+        raise ValueError("Le plan de mouvements a été modifié depuis son enregistrement")
+
+    contents["mouvements"] = decimal_movements(contents["mouvements"])
+    return data["empreinte"], contents
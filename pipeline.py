@@ -0,0 +1,1243 @@
+"""
+    But : Ce fichier contient le déroulé du traitement d'inventaire, exécuté en arrière-plan
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import os
+import queue
+import shutil
+from datetime import datetime
+from constantes import *
+from db import *
+from utils import *
+from catalogue import *
+from scan import *
+from snapshot import *
+from journal import *
+from movement_plan import *
+from triage import *
+import webbrowser
+
+# Codes de fin d'exécution du traitement d'inventaire
+RUN_SUCCESS = 0
+RUN_ERROR = 1
+RUN_CANCELLED = 3
+
+# Étapes du traitement d'inventaire
+STAGES = {
+    "catalogue": "Chargement du catalogue d'articles",
+    "lecture": "Lecture du fichier d'inventaire",
+    "tri": "Tri des codes inexistants ou sans famille",
+    "familles": "Récupération des familles",
+    "export": "Création des fichiers par famille",
+    "stock": "Mise à jour du stock",
+    "dossier": "Finalisation du dossier d'inventaire",
+    "rapports": "Génération des rapports par famille",
+    "rapport": "Génération du rapport d'exécution",
+    "simulation": "Calcul du plan de mouvements",
+}
+
+# Décisions pouvant être demandées à l'utilisateur au cours du traitement
+DECISIONS = {
+    "existing_inventory": "Écraser un inventaire existant à la même date",
+    "unknown_article": "Ignorer un article inexistant",
+    "article_without_family": "Ignorer un article sans famille",
+    "retry_locked": "Réessayer la suppression d'un inventaire verrouillé",
+    "locked_inventory": "Créer un nouveau dossier si l'ancien inventaire ne peut être supprimé",
+    "open_report": "Ouvrir le rapport d'exécution",
+    "resume_run": "Reprendre une mise à jour du stock interrompue",
+}
+
+class EventChannel:
+    """
+    Canal de communication entre le traitement d'inventaire et l'interface.
+
+    Le traitement, exécuté sur un thread de travail, publie des événements
+    structurés (messages, étapes, compteurs) dans une file que l'interface
+    consulte à intervalle régulier. Les décisions à prendre par l'utilisateur
+    passent par un échange requête/réponse : le traitement publie une demande
+    de dialogue puis attend la réponse, sans jamais manipuler Tk directement.
+
+    Attributes:
+        events (queue.Queue): File des événements publiés par le traitement.
+    """
+
+    def __init__(self):
+        """
+        Initialise les files d'événements et de réponses.
+        """
+        self.events = queue.Queue()
+        self._responses = queue.Queue()
+
+    def post(self, event_type, **data):
+        """
+        Publie un événement à destination de l'interface.
+
+        Args:
+            event_type (str): Le type d'événement ("log", "stage", "progress", "dialog" ou "done").
+            **data: Les données associées à l'événement.
+        """
+        data["type"] = event_type
+        self.events.put(data)
+
+    def ask(self, kind, title, message, decision=None):
+        """
+        Demande une décision à l'utilisateur et attend sa réponse.
+
+        Args:
+            kind (str): Le type de dialogue ("yesno", "retrycancel", "question", "info" ou "error").
+            title (str): Le titre du dialogue.
+            message (str): Le message du dialogue.
+            decision (str, optional): La clé de la décision demandée, dans DECISIONS.
+                Par défaut None pour les simples messages d'information ou d'erreur.
+
+        Returns:
+            La réponse de l'utilisateur : un booléen pour "yesno" et "retrycancel",
+            "yes" ou "no" pour "question", None pour "info" et "error".
+        """
+        self.post("dialog", kind=kind, title=title, message=message, decision=decision)
+        return self._responses.get()
+
+    def respond(self, answer):
+        """
+        Transmet la réponse de l'utilisateur au traitement en attente.
+
+        Args:
+            answer: La réponse au dernier dialogue demandé.
+        """
+        self._responses.put(answer)
+
+class InventoryPipeline:
+    """
+    Déroulé complet du traitement d'un fichier d'inventaire.
+
+    Cette classe ne dépend d'aucun élément graphique : elle communique
+    exclusivement au travers d'un EventChannel, ce qui permet de l'exécuter
+    sur un thread de travail.
+
+    Attributes:
+        pool (ConnectionPool): Réserve de connexions à la base de données.
+        catalogue (Catalogue): Index en mémoire du catalogue d'articles.
+        events (EventChannel): Canal de communication avec l'interface.
+        render_pdf (bool): Conversion des rapports en PDF.
+        report_data (dict): Données collectées pour le rapport d'exécution.
+        run_id (str): Identifiant unique de l'exécution en cours, repris lors de la reprise d'une exécution interrompue.
+        output_directory (str): Dossier d'inventaire (ou de simulations) produit par l'exécution, None tant qu'il n'est pas finalisé.
+    """
+
+    def __init__(self, pool, catalogue, events, render_pdf=True):
+        """
+        Initialise le traitement d'inventaire.
+
+        Args:
+            pool (ConnectionPool): Réserve de connexions à la base de données.
+            catalogue (Catalogue): Index en mémoire du catalogue d'articles.
+            events (EventChannel): Canal de communication avec l'interface.
+            render_pdf (bool, optional): Si False, les rapports sont construits en HTML
+                sans être convertis en PDF (mesures de performance). Par défaut, True.
+        """
+        self.pool = pool
+        self.catalogue = catalogue
+        self.events = events
+        self.render_pdf = render_pdf
+        self.report_data = {
+            "errors": {},
+            "families_values": {},
+        }
+        self.output_directory = None
+        self.run_id = None
+
+    def stage(self, stage):
+        """
+        Signale le début d'une étape du traitement.
+
+        Args:
+            stage (str): La clé de l'étape dans STAGES.
+        """
+        metrics.begin(stage, STAGES[stage])
+        self.events.post("stage", stage=stage, label=STAGES[stage])
+
+    def progress(self, stage, current, total=None):
+        """
+        Signale l'avancement de l'étape en cours.
+
+        Args:
+            stage (str): La clé de l'étape dans STAGES.
+            current (int): Le nombre d'éléments traités.
+            total (int, optional): Le nombre total d'éléments, s'il est connu. Par défaut None.
+        """
+        self.events.post("progress", stage=stage, current=current, total=total)
+
+    def run(self, file_path, dry_run=False, apply=False):
+        """
+        Exécute le traitement d'inventaire puis signale sa fin à l'interface.
+
+        Args:
+            file_path (str): Le chemin du fichier d'inventaire, ou du plan de mouvements à appliquer.
+            dry_run (bool, optional): Simuler l'inventaire sans rien écrire en base de données
+                (voir simulate). Par défaut, False.
+            apply (bool, optional): Appliquer un plan de mouvements enregistré par une simulation
+                (voir apply_plan). Par défaut, False.
+
+        Returns:
+            int: RUN_SUCCESS, RUN_ERROR ou RUN_CANCELLED.
+        """
+        status = RUN_ERROR
+        metrics.reset()
+        self.output_directory = None
+        self.run_id = new_run_id()
+        mode = " (application d'un plan)" if apply else " (simulation)" if dry_run else ""
+        write_log(f"Début de l'exécution {self.run_id}{mode}")
+        try:
+            if apply:
+                status = self.apply_plan(file_path)
+            elif dry_run:
+                status = self.simulate(file_path)
+            else:
+                status = self.process(file_path)
+        finally:
+            metrics.end()
+            self.write_metrics()
+            self.events.post("done", status=status)
+        return status
+
+    def write_metrics(self):
+        """
+        Enregistre les mesures de performance de l'exécution dans le dossier d'inventaire produit.
+        """
+        if self.output_directory is None:
+            return
+        try:
+            inventory_date = find_closest_date().strftime("%Y-%m-%d")
+            metrics.write_json(os.path.join(self.output_directory, f"metriques_{inventory_date}.json"))
+        except OSError as e:
+            write_log(f"[ERREUR] Impossible d'enregistrer les mesures de performance : {str(e)}")
+
+    def scan_files(self, file_path):
+        """
+        Vérifie la sélection de fichiers d'inventaire et renvoie les fichiers à lire.
+
+        Args:
+            file_path (str | list): Le chemin du fichier d'inventaire, d'un dossier de fichiers,
+                ou les chemins des fichiers de plusieurs douchettes.
+
+        Returns:
+            list: Les chemins des fichiers de chaque douchette, ou None si la sélection est invalide
+            (l'erreur a alors été signalée à l'utilisateur).
+        """
+        # Affichage du message de récupération du fichier d'inventaire
+        log_and_display("Récupération du fichier d'inventaire...", self.events)
+
+        # Vérification du fichier sélectionné
+        if not file_path:
+            error_code = "F001"
+            self.events.ask("error", f"Erreur [{error_code}]", f"[{error_code}] Veuillez sélectionner un fichier d'inventaire.")
+            return None
+
+        # Fichiers de chaque douchette : un fichier, un dossier ou plusieurs fichiers
+        file_paths = resolve_scan_files(file_path)
+        for path in file_paths:
+            if not os.path.exists(path):
+                error_code = "F002"
+                self.events.ask("error", f"Erreur [{error_code}]", f"[{error_code}] Le fichier sélectionné n'existe pas : {path}")
+                return None
+
+            if not is_scan_file(path):
+                error_code = "F003"
+                self.events.ask("error", f"Erreur [{error_code}]", f"[{error_code}] Le fichier sélectionné n'est pas un fichier texte : {path}")
+                return None
+
+        if not file_paths:
+            error_code = "F003"
+            self.events.ask("error", f"Erreur [{error_code}]", f"[{error_code}] Le dossier sélectionné ne contient aucun fichier texte.")
+            return None
+
+        return file_paths
+
+    def simulate(self, file_path):
+        """
+        Simule l'inventaire : calcule et exporte le plan des mouvements de stock, sans rien
+        écrire en base de données ni dans les dossiers d'inventaire.
+
+        Le plan est exporté au format CSV pour être relu, et enregistré avec son empreinte
+        dans un fichier JSON en lecture seule, qui peut ensuite être appliqué par apply_plan().
+        Les mesures de performance sont enregistrées dans le même dossier (metriques_<date>.json,
+        celles de la dernière simulation du jour).
+
+        Le plan est calculé à partir du catalogue, lu en une seule requête, et des quantités
+        scannées : aucune transaction d'écriture n'est ouverte et ElementStock n'est pas
+        verrouillé, ce qui permet de prévisualiser l'inventaire autant de fois que nécessaire.
+        Les articles inexistants ou sans famille valide sont ignorés, comme lors d'une exécution
+        réelle, et signalés dans le résumé sans demande de décision.
+
+        Args:
+            file_path (str | list): Le chemin du fichier d'inventaire, d'un dossier de fichiers,
+                ou les chemins des fichiers de plusieurs douchettes.
+
+        Returns:
+            int: RUN_SUCCESS ou RUN_ERROR.
+        """
+        file_paths = self.scan_files(file_path)
+        if file_paths is None:
+            return RUN_ERROR
+
+        try:
+            inventory_date = find_closest_date().strftime("%Y-%m-%d")
+            log_and_display(f"Simulation de l'inventaire du {inventory_date} : aucune modification ne sera effectuée.", self.events)
+
+            self.stage("catalogue")
+            log_and_display("Chargement du catalogue d'articles...", self.events)
+            self.catalogue.refresh()
+
+            self.stage("lecture")
+            counts = read_scan_files(file_paths, on_file_read=lambda done, total: self.progress("lecture", done, total))[0]
+            unknown_codes = [code for code in counts if not self.catalogue.exists(code)]
+            for code in unknown_codes:
+                del counts[code]
+            familyless_codes = [code for code in counts if self.catalogue.get_family(code) is None]
+            for code in familyless_codes:
+                del counts[code]
+
+            self.stage("simulation")
+            plan = build_movement_plan(counts, self.catalogue)
+            summary = summarize_movement_plan(plan)
+            inventory_value = inventory_total(value_families(counts, self.catalogue))
+
+            os.makedirs(DRY_RUN_DIRECTORY, exist_ok=True)
+            planned_at = datetime.now()
+            plan_name = os.path.join(DRY_RUN_DIRECTORY, f"plan_mouvements_{inventory_date}_{planned_at.strftime('%H%M%S')}")
+            write_movement_plan(f"{plan_name}.csv", plan)
+            save_movement_file(f"{plan_name}.json", {
+                "run_id": self.run_id,
+                "date": inventory_date,
+                "cree_le": planned_at.isoformat(timespec="seconds"),
+                "fichier": [os.path.abspath(path) for path in file_paths],
+                "empreinte": files_checksum(file_paths),
+                "mouvements": stock_movements(plan),
+            })
+
+            # Mesures de performance enregistrées avec les plans, comme dans un dossier d'inventaire
+            self.output_directory = DRY_RUN_DIRECTORY
+
+            log_and_display(f"Plan de mouvements enregistré : {plan_name}.csv", self.events)
+            log_and_display(f"Plan de mouvements applicable enregistré : {plan_name}.json", self.events)
+            log_and_display(
+                f"{len(counts)} article(s) scanné(s), {len(unknown_codes)} code(s) inexistant(s) et "
+                f"{len(familyless_codes)} article(s) sans famille ignoré(s)", self.events
+            )
+            log_and_display(
+                f"{summary['mouvements']} mouvement(s) : {summary['entrees']} entrée(s) (+{summary['quantite_entree']}), "
+                f"{summary['sorties']} sortie(s) (-{summary['quantite_sortie']})", self.events
+            )
+            log_and_display(f"Impact sur la valeur du stock : {format_amount(summary['impact_valeur'])}", self.events)
+            log_and_display(f"Valeur de l'inventaire : {format_amount(inventory_value)}", self.events)
+            return RUN_SUCCESS
+
+        except Exception as e:
+            error_code = "F004"
+            self.events.ask("error",
+                f"Erreur [{error_code}]",
+                f"[{error_code}] Erreur lors de la simulation de l'inventaire : {str(e)}"
+            )
+            write_log(f"[ERREUR] [{error_code}] {str(e)}")
+            return RUN_ERROR
+
+    def apply_plan(self, plan_path):
+        """
+        Applique un plan de mouvements enregistré par une simulation, sans relire les fichiers scannés.
+
+        Le plan est relu et son empreinte vérifiée, puis ses écarts sont appliqués par lots
+        par apply_stock_plan() : seuls les articles dont le stock est encore celui du plan
+        sont mis à jour, les autres sont signalés comme conflits (D003). L'application est
+        journalisée sous l'identifiant de l'exécution qui a produit le plan : une application
+        interrompue reprend au premier lot non validé, et un plan déjà appliqué ne l'est pas
+        une seconde fois.
+
+        Args:
+            plan_path (str | list): Le chemin du plan de mouvements (fichier JSON), ou une liste le contenant.
+
+        Returns:
+            int: RUN_SUCCESS ou RUN_ERROR.
+        """
+        if isinstance(plan_path, (list, tuple)):
+            plan_path = plan_path[0] if len(plan_path) == 1 else None
+        if not plan_path:
+            error_code = "F001"
+            self.events.ask("error", f"Erreur [{error_code}]", f"[{error_code}] Veuillez sélectionner un seul plan de mouvements.")
+            return RUN_ERROR
+
+        log_and_display(f"Chargement du plan de mouvements {plan_path}...", self.events)
+        try:
+            checksum, plan = load_movement_file(plan_path)
+        except (OSError, ValueError) as e:
+            error_code = "F005"
+            self.events.ask("error", f"Erreur [{error_code}]", f"[{error_code}] Plan de mouvements invalide : {str(e)}")
+            write_log(f"[ERREUR] [{error_code}] {str(e)}")
+            return RUN_ERROR
+
+        try:
+            self.run_id = plan["run_id"]
+            log_and_display(f"Plan de l'exécution {self.run_id} : {len(plan['mouvements'])} mouvement(s) pour l'inventaire du {plan['date']}", self.events)
+
+            journal_path = os.path.join(STOCK_JOURNAL_DIRECTORY, f"journal_{self.run_id}.jsonl")
+            journal = StockJournal.load(journal_path) if os.path.exists(journal_path) else None
+            if journal is None:
+                # Journal d'application de plan : il n'est jamais repris ni abandonné par un traitement complet
+                journal = StockJournal.create(STOCK_JOURNAL_DIRECTORY, dict(
+                    plan,
+                    empreinte=checksum,
+                    plan_mouvements=os.path.abspath(plan_path),
+                    taille_lot=STOCK_BATCH_SIZE,
+                ), kind=PLAN_JOURNAL)
+            elif journal.status == "termine":
+                log_and_display("Ce plan de mouvements a déjà été appliqué, aucune modification effectuée.", self.events)
+                return RUN_SUCCESS
+            else:
+                log_and_display(f"Reprise de l'application du plan ({len(journal.applied_batches)} lot(s) déjà validé(s))", self.events)
+
+            self.stage("stock")
+            self.apply_stock_plan(journal, datetime.strptime(plan["date"], "%Y-%m-%d"))
+
+            conflicts = [error for error in self.report_data["errors"] if error.startswith("[D003]")]
+            log_and_display(f"Plan de mouvements appliqué, {len(conflicts)} article(s) en conflit non mis à jour.", self.events)
+            return RUN_SUCCESS
+
+        except Exception as e:
+            error_code = "F004"
+            self.events.ask("error",
+                f"Erreur [{error_code}]",
+                f"[{error_code}] Erreur lors de l'application du plan de mouvements : {str(e)}"
+            )
+            write_log(f"[ERREUR] [{error_code}] {str(e)}")
+            return RUN_ERROR
+
+    def process(self, file_path):
+        """
+        Lance le processus complet d'inventaire.
+        
+        Cette méthode principale gère l'ensemble du processus d'inventaire:
+        
+        1. Validation du fichier d'entrée et préparation:
+        - Vérification du format et de l'existence du fichier
+        - Création des structures de dossiers
+        
+        2. Traitement des articles:
+        - Lecture simultanée des fichiers de chaque douchette et fusion des quantités
+        - Vérification de l'existence de chaque article dans la base
+        - Gestion des articles inconnus ou sans famille
+        - Construction du dictionnaire des quantités par article
+        
+        3. Organisation par famille:
+        - Identification des familles présentes dans l'inventaire
+        - Création des fichiers CSV par famille
+        
+        4. Mise à jour du stock:
+        - Application par lots des écarts planifiés (apply_stock_plan), avec journal de reprise
+        
+        5. Gestion des dossiers d'inventaire:
+        - Vérification d'inventaires existants à la même date
+        - Suppression ou contournement des inventaires existants
+        - Finalisation du dossier d'inventaire
+        
+        6. Génération des rapports:
+        - Création des rapports PDF par famille
+        - Génération du rapport d'exécution global
+        
+        Tout au long du processus, des demandes de décision sont transmises à
+        l'utilisateur au travers du canal d'événements en cas de problème.
+
+        Args:
+            file_path (str | list): Le chemin du fichier d'inventaire, d'un dossier de fichiers,
+                ou les chemins des fichiers de plusieurs douchettes (liste ou chemins séparés
+                par SCAN_FILES_SEPARATOR).
+
+        Returns:
+            int: RUN_SUCCESS, RUN_ERROR ou RUN_CANCELLED.
+        """
+        file_paths = self.scan_files(file_path)
+        if file_paths is None:
+            return RUN_ERROR
+
+        # Affichage du message de lecture du fichier d'inventaire
+        log_and_display("Lecture du fichier d'inventaire...", self.events)
+
+        # Lecture du fichier d'inventaire
+        temp_inventory_directory = None
+        try:
+            inventories_directory = ".\\inventaires"
+            if not os.path.exists(inventories_directory):
+                log_and_display(f"Création du dossier {inventories_directory}...", self.events)
+                os.makedirs(inventories_directory)
+
+            # Affichage du message de création du fichier d'inventaire
+            log_and_display("Création du dossier d'inventaire à la date correcte", self.events)
+
+            current_date = datetime.now().strftime("%Y-%m-%d")
+            inventory_date = find_closest_date().strftime("%Y-%m-%d")
+            log_and_display(f"Date du jour : {current_date}", self.events)
+            log_and_display(f"Date d'inventaire : {inventory_date}", self.events)
+            this_inventory_directory = os.path.join(inventories_directory, f"inventaire_{inventory_date}")
+            temp_inventory_directory = os.path.join(inventories_directory, f"temp_inventaire_{inventory_date}")
+
+            inventory_exists = os.path.exists(this_inventory_directory)
+            previous_snapshot = None
+            
+            # Suppression du dossier temporaire laissé par une exécution interrompue
+            if os.path.exists(temp_inventory_directory):
+                log_and_display(f"Suppression du dossier temporaire {temp_inventory_directory} d'une exécution interrompue...", self.events)
+                shutil.rmtree(temp_inventory_directory)
+
+            # Création du dossier temporaire pour préparer le nouvel inventaire
+            log_and_display(f"Création du dossier temporaire {temp_inventory_directory}...", self.events)
+            os.makedirs(temp_inventory_directory)
+
+            if inventory_exists:
+                error_code = "S001"
+                log_and_display(f"[{error_code}] Le dossier {this_inventory_directory} existe déjà", self.events)
+                overwrite = self.events.ask("yesno", 
+                    f"[{error_code}] {ERROR_CODES[error_code]}", 
+                    f"[{error_code}] Le dossier {this_inventory_directory} existe déjà. Voulez-vous l'écraser ?",
+                    decision="existing_inventory"
+                )
+                if not overwrite:
+                    log_and_display("Annulation de l'opération.", self.events)
+
+                    # Nettoyage du dossier temporaire
+                    shutil.rmtree(temp_inventory_directory)
+                    return RUN_CANCELLED
+
+            # Reprise d'une mise à jour du stock interrompue, pour le même fichier
+            journal = StockJournal.find_unfinished(STOCK_JOURNAL_DIRECTORY, inventory_date)
+            if journal is not None:
+                resume = False
+                if journal.plan["empreinte"] == files_checksum(file_paths):
+                    batches_count = len(journal.batches())
+                    resume = self.events.ask("yesno",
+                        "Reprise de l'inventaire",
+                        f"La mise à jour du stock de l'exécution {journal.plan['run_id']} a été interrompue "
+                        f"({len(journal.applied_batches)}/{batches_count} lot(s) validé(s)).\n\n Voulez-vous la reprendre ?",
+                        decision="resume_run"
+                    )
+                if resume:
+                    self.run_id = journal.plan["run_id"]
+                    log_and_display(f"Reprise de l'exécution {self.run_id}", self.events)
+                else:
+                    log_and_display(f"Abandon de la mise à jour interrompue de l'exécution {journal.plan['run_id']}", self.events)
+                    journal.abandon()
+                    journal = None
+
+            # Reprise incrémentale à partir de l'instantané de l'exécution précédente
+            if inventory_exists and journal is None:
+                if INCREMENTAL_REINVENTORY:
+                    previous_snapshot = load_snapshot(this_inventory_directory, inventory_date)
+                if previous_snapshot is not None:
+                    log_and_display("Instantané de l'exécution précédente trouvé : seuls les articles modifiés seront traités.", self.events)
+                    shutil.copytree(this_inventory_directory, temp_inventory_directory, dirs_exist_ok=True)
+
+            # Chargement du catalogue d'articles en une seule requête
+            self.stage("catalogue")
+            log_and_display("Chargement du catalogue d'articles...", self.events)
+            self.catalogue.refresh()
+
+            if journal is None:
+                scanned = self.read_inventory(file_paths, temp_inventory_directory)
+                if scanned is None:
+                    return RUN_CANCELLED
+                articles_dictionnary, families, devices_counts = scanned
+            else:
+                # Reprise : les quantités et familles retenues sont celles du plan journalisé
+                articles_dictionnary = Counter(journal.plan["quantites"])
+                families = journal.plan["familles"]
+                devices_counts = journal.plan.get("appareils", {})
+                self.report_data["errors"] = journal.plan["erreurs"]
+
+            # Familles à régénérer : toutes, ou seulement celles des articles modifiés
+            changed_families = set(families)
+            if previous_snapshot is not None:
+                changes = changed_counts(previous_snapshot["quantites"], articles_dictionnary)
+                changed_families = set()
+                for code in changes:
+                    family = self.catalogue.get_family(code)
+                    if family is not None:
+                        changed_families.add(family[0].replace(".", ""))
+                log_and_display(f"{len(changes)} article(s) modifié(s) depuis l'exécution précédente, {len(changed_families)} famille(s) concernée(s)", self.events)
+            removed_families = changed_families.difference(families)
+
+            # Copie des fichiers bruts pour en garder une trace, un par douchette
+            for name in os.listdir(temp_inventory_directory):
+                if name.startswith("inventaire_brut_") or name.startswith("inventaire_appareils_"):
+                    os.remove(os.path.join(temp_inventory_directory, name))
+            if len(file_paths) == 1:
+                raw_file = os.path.join(temp_inventory_directory, f"inventaire_brut_{inventory_date}.txt")
+                shutil.copyfile(file_paths[0], raw_file)
+            else:
+                for path, device in zip(file_paths, device_names(file_paths)):
+                    raw_file = os.path.join(temp_inventory_directory, f"inventaire_brut_{inventory_date}_{device}.txt")
+                    shutil.copyfile(path, raw_file)
+
+            # Création du fichier code;quantite dans le dossier temporaire
+            output_file = os.path.join(temp_inventory_directory, f"inventaire_trie_{inventory_date}.csv")
+            with open(output_file, 'w', encoding='utf-8') as file:
+                # Ajouter un en-tête au CSV
+                file.write("Code;Quantité\n")
+                for key, value in articles_dictionnary.items():
+                    file.write(f"{key};{value}\n")
+
+            # Création du fichier des quantités de chaque douchette, si plusieurs ont été utilisées
+            if len(devices_counts) > 1:
+                devices_file = os.path.join(temp_inventory_directory, f"inventaire_appareils_{inventory_date}.csv")
+                with open(devices_file, 'w', encoding='utf-8') as file:
+                    file.write(";".join(["Code", *devices_counts, "Total"]) + "\n")
+                    for key, value in articles_dictionnary.items():
+                        quantities = [str(device_counts.get(key, 0)) for device_counts in devices_counts.values()]
+                        file.write(";".join([key, *quantities, str(value)]) + "\n")
+
+            # Création du dossier pour les familles dans le dossier temporaire
+            self.stage("export")
+            families_directory = os.path.join(temp_inventory_directory, "familles")
+            if not os.path.exists(families_directory):
+                log_and_display(f"Création du dossier {families_directory}...", self.events)
+                os.makedirs(families_directory)
+
+            # Suppression des fichiers des familles qui ne sont plus scannées
+            for family in removed_families:
+                family_file = os.path.join(families_directory, f"{family}.csv")
+                if os.path.exists(family_file):
+                    os.remove(family_file)
+
+            # Création de chaque fichier d'inventaire par famille, en une seule passe sur les articles
+            self.export_families(families_directory, articles_dictionnary, [family for family in families if family in changed_families])
+
+            # Mise à jour du stock, par lots journalisés
+            self.stage("stock")
+            log_and_display("Lancement de la mise à jour des stocks", self.events)
+            if journal is None:
+                stock_plan = self.plan_stock_update(articles_dictionnary, previous_snapshot)
+
+                # Valorisation de l'inventaire par famille, à partir des quantités retenues
+                log_and_display("Valorisation de l'inventaire par famille...", self.events)
+                self.report_data["families_values"] = value_families(articles_dictionnary, self.catalogue)
+
+                # Écarts cumulés depuis la première exécution, pour l'instantané
+                cumulated_deltas = dict(previous_snapshot["ecarts"]) if previous_snapshot is not None else {}
+                for code, delta in stock_plan["ecarts"].items():
+                    cumulated_deltas[code] = cumulated_deltas.get(code, 0) + delta
+
+                # Journalisation du plan avant toute écriture en base de données
+                journal = StockJournal.create(STOCK_JOURNAL_DIRECTORY, {
+                    "run_id": self.run_id,
+                    "date": inventory_date,
+                    "fichier": [os.path.abspath(path) for path in file_paths],
+                    "empreinte": files_checksum(file_paths),
+                    "quantites": articles_dictionnary,
+                    "appareils": devices_counts,
+                    "familles": families,
+                    "erreurs": self.report_data["errors"],
+                    "valeurs_familles": self.report_data["families_values"],
+                    "ecarts_cumules": cumulated_deltas,
+                    "mouvements": stock_plan["mouvements"],
+                    "taille_lot": STOCK_BATCH_SIZE,
+                })
+            else:
+                self.report_data["families_values"] = {
+                    family_code: {"libelle": datas["libelle"], "value": to_amount(datas["value"])}
+                    for family_code, datas in journal.plan["valeurs_familles"].items()
+                }
+            self.apply_stock_plan(journal, datetime.strptime(journal.plan["date"], "%Y-%m-%d"))
+
+            # Instantané de l'exécution, pour une éventuelle reprise incrémentale
+            write_snapshot(temp_inventory_directory, inventory_date, articles_dictionnary, self.report_data["families_values"], journal.plan["ecarts_cumules"])
+
+            # Remplacer l'ancien inventaire si nécessaire
+            self.stage("dossier")
+            if inventory_exists:
+                log_and_display("Tout s'est bien passé, remplacement de l'ancien inventaire...", self.events)
+                
+                # Essayer de supprimer l'ancien dossier d'inventaire avec une gestion d'erreur
+                files_locked = True
+                retry_count = 0
+                max_retries = 3
+                
+                while files_locked and retry_count < max_retries:
+                    try:
+                        # Essayer de supprimer l'ancien dossier d'inventaire
+                        log_and_display(f"Tentative de suppression de l'ancien inventaire {this_inventory_directory}...", self.events)
+                        shutil.rmtree(this_inventory_directory)
+                        files_locked = False  # La suppression a fonctionné
+                        log_and_display(f"Ancien inventaire supprimé avec succès.", self.events)
+                        
+                    except PermissionError:
+                        retry_count += 1
+                        error_code = "S002"
+                        log_and_display(f"[{error_code}] Des fichiers sont ouverts dans le dossier d'inventaire.", self.events)
+                        
+                        # Demander à l'utilisateur de fermer les fichiers
+                        retry = self.events.ask("retrycancel", 
+                            f"Fichiers ouverts [{error_code}]", 
+                            f"[{error_code}] Certains fichiers du dossier d'inventaire sont actuellement ouverts.\n\n"
+                            f"Veuillez fermer tous les fichiers PDF ou HTML qui pourraient être ouverts "
+                            f"dans le dossier '{this_inventory_directory}' et cliquer sur 'Recommencer'.\n\n"
+                            f"Tentative {retry_count}/{max_retries}",
+                            decision="retry_locked"
+                        )
+                        
+                        if not retry:
+                            log_and_display("Opération annulée par l'utilisateur.", self.events)
+                            # Nettoyer le dossier temporaire
+                            shutil.rmtree(temp_inventory_directory)
+                            return RUN_CANCELLED
+                    
+                    except Exception as e:
+                        # En cas d'autre erreur
+                        error_code = "S003"
+                        error_msg = str(e)
+                        log_and_display(f"[{error_code}] Erreur lors de la suppression de l'ancien inventaire: {error_msg}", self.events)
+                        
+                        # Proposer des alternatives à l'utilisateur
+                        response = self.events.ask("question", 
+                            f"Erreur de suppression [{error_code}]",
+                            f"[{error_code}] Une erreur est survenue lors de la suppression de l'ancien inventaire:\n{error_msg}\n\n"
+                            f"Souhaitez-vous tout de même créer un nouveau dossier d'inventaire ?",
+                            decision="locked_inventory"
+                        )
+                        
+                        if response == "yes":
+                            # Renommer le dossier temporaire avec un suffixe pour éviter les conflits
+                            new_inventory_name = f"{this_inventory_directory}_new"
+                            log_and_display(f"Création d'un nouveau dossier d'inventaire: {new_inventory_name}", self.events)
+                            # Renommer le temporaire en nouveau dossier final
+                            shutil.move(temp_inventory_directory, new_inventory_name)
+                            self.output_directory = new_inventory_name
+                            log_and_display(f"Nouvel inventaire créé dans {new_inventory_name}", self.events)
+                            self.events.ask("info", 
+                                "Inventaire terminé", 
+                                f"L'inventaire a été créé dans un nouveau dossier: {os.path.basename(new_inventory_name)}.\n\n"
+                                f"L'ancien inventaire n'a pas été remplacé en raison d'une erreur."
+                            )
+                            return RUN_SUCCESS
+                        else:
+                            log_and_display("Opération annulée par l'utilisateur.", self.events)
+                            # Nettoyer le dossier temporaire
+                            shutil.rmtree(temp_inventory_directory)
+                            return RUN_CANCELLED
+                
+                # Si trop de tentatives ont échoué
+                if files_locked:
+                    error_code = "S004"
+                    log_and_display(f"[{error_code}] Impossible de supprimer l'ancien inventaire après {max_retries} tentatives.", self.events)
+                    
+                    # Demander à l'utilisateur ce qu'il souhaite faire
+                    response = self.events.ask("question", 
+                        f"Maximum de tentatives atteint [{error_code}]",
+                        f"[{error_code}] Après {max_retries} tentatives, impossible de supprimer l'ancien inventaire.\n\n"
+                        f"Souhaitez-vous créer un nouveau dossier d'inventaire sans supprimer l'ancien ?",
+                        decision="locked_inventory"
+                    )
+                    
+                    if response == "yes":
+                        # Créer un nouveau dossier avec un suffixe
+                        new_inventory_name = f"{this_inventory_directory}_new"
+                        log_and_display(f"Création d'un nouveau dossier d'inventaire: {new_inventory_name}", self.events)
+                        shutil.move(temp_inventory_directory, new_inventory_name)
+                        self.output_directory = new_inventory_name
+                        log_and_display(f"Nouvel inventaire créé dans {new_inventory_name}", self.events)
+                        self.events.ask("info", 
+                            "Inventaire terminé", 
+                            f"L'inventaire a été créé dans un nouveau dossier: {os.path.basename(new_inventory_name)}.\n\n"
+                            f"L'ancien inventaire n'a pas été remplacé car des fichiers sont toujours ouverts."
+                        )
+                        return RUN_SUCCESS
+                    else:
+                        log_and_display("Opération annulée par l'utilisateur.", self.events)
+                        # Nettoyer le dossier temporaire
+                        shutil.rmtree(temp_inventory_directory)
+                        return RUN_CANCELLED
+            
+            # Renommer le dossier temporaire en dossier final
+            log_and_display(f"Finalisation de l'inventaire...", self.events)
+            shutil.move(temp_inventory_directory, this_inventory_directory)
+            self.output_directory = this_inventory_directory
+
+            # Après avoir finalisé l'inventaire
+            log_and_display("Inventaire terminé.", self.events)
+
+            # Génération des rapports HTML par famille
+            self.stage("rapports")
+            log_and_display("Génération des rapports par famille...", self.events)
+
+            # Regroupement en une seule passe des articles en stock par famille
+            reports_data = self.catalogue.family_reports_data()
+
+            # Suppression des rapports des familles qui ne sont plus scannées
+            for family in removed_families:
+                family_report = os.path.join(self.output_directory, "familles_rapports", f"{family}.pdf")
+                if os.path.exists(family_report):
+                    os.remove(family_report)
+
+            # Construction de l'ensemble des documents HTML avant leur conversion ;
+            # un document combiné regroupe toujours toutes les familles
+            combined = self.render_pdf and PDF_OUTPUT_MODE != "separe"
+            family_documents = []
+            for family in families:
+                if family not in changed_families and not combined:
+                    continue
+                family_data = reports_data.get(family)
+
+                # Préparer le rapport pour cette famille si des articles sont présents
+                if family_data and family_data["articles"]:
+                    family_documents.append(build_family_report(family, family_data["libelle"], family_data["articles"], bookmark=combined))
+
+            if not self.render_pdf:
+                # Mesures de performance : les documents HTML sont construits sans être convertis
+                log_and_display("Conversion des rapports en PDF désactivée.", self.events)
+                self.stage("rapport")
+                self.report_data["performances"] = metrics.to_dict()
+                build_report(self.report_data)
+                return RUN_SUCCESS
+
+            report = None
+            if combined:
+                report = self.render_combined_reports(family_documents, inventory_date)
+            else:
+                self.render_family_reports(family_documents)
+
+            # Génération du rapport d'exécution global, s'il ne fait pas partie du document combiné
+            if report is None:
+                self.stage("rapport")
+                log_and_display("Génération du rapport d'exécution...", self.events)
+                self.report_data["performances"] = metrics.to_dict()
+                report = generate_report(self.report_data)
+
+            log_and_display(f"Rapport d'exécution généré : {report}", self.events)
+            user_wants_open = self.events.ask("yesno", "Rapport généré", f"Le rapport d'exécution d'inventaire a été généré à l'emplacement {report}.\n\n Souhaitez-vous l'ouvrir ?", decision="open_report")
+            if user_wants_open:
+                log_and_display(f"Ouverture du rapport d'exécution...", self.events)
+                webbrowser.open(f"file:///{os.path.abspath(report)}")
+
+            return RUN_SUCCESS
+
+        except Exception as e:
+            error_code = "F004"
+            self.events.ask("error", 
+                f"Erreur [{error_code}]", 
+                f"[{error_code}] Erreur lors du traitement du fichier: {str(e)}"
+            )
+            write_log(f"[ERREUR] [{error_code}] {str(e)}")
+            # En cas d'erreur, nettoyer le dossier temporaire s'il existe
+            if temp_inventory_directory and os.path.exists(temp_inventory_directory):
+                try:
+                    shutil.rmtree(temp_inventory_directory)
+                    log_and_display(f"Nettoyage du dossier temporaire suite à une erreur", self.events)
+                except:
+                    pass
+            return RUN_ERROR
+
+    def read_inventory(self, file_paths, temp_inventory_directory):
+        """
+        Lit les fichiers d'inventaire et résout la famille de chaque article scanné.
+
+        Les fichiers de plusieurs douchettes sont lus simultanément et leurs quantités
+        fusionnées. Une pré-validation relève ensuite en une seule passe tous les codes
+        inexistants (A001) et les articles sans famille (A002) : ils sont enregistrés dans
+        un rapport de tri, avec les articles proches de chaque code inexistant, puis une
+        seule décision est demandée par type d'anomalie pour les ignorer ou interrompre
+        le traitement.
+
+        Args:
+            file_paths (list): Les chemins des fichiers d'inventaire.
+            temp_inventory_directory (str): Le dossier temporaire, supprimé en cas d'annulation.
+
+        Returns:
+            tuple: Les quantités retenues par numéro commercial (Counter), la liste des familles
+            scannées (codes sans point final) et les quantités retenues de chaque douchette
+            (dict de dict, indexé par nom de douchette), ou None si le traitement est annulé.
+        """
+        # Affichage du message de récupération des articles
+        self.stage("lecture")
+        log_and_display("Récupération des articles...", self.events)
+
+        # Lecture simultanée des fichiers de chaque douchette, puis fusion des quantités
+        scanned_counts, devices_counts, first_lines = read_scan_files(
+            file_paths, on_file_read=lambda done, total: self.progress("lecture", done, total)
+        )
+        if len(file_paths) > 1:
+            log_and_display(f"{len(file_paths)} fichier(s) lu(s), {sum(scanned_counts.values())} scan(s) au total", self.events)
+
+        # Pré-validation : codes inexistants (différence avec le catalogue) et articles sans famille, en une seule passe
+        unknown = scanned_counts.keys() - self.catalogue.codes()
+        unknown_codes = [code for code in scanned_counts if code in unknown]
+        familyless_codes = [code for code in scanned_counts if code not in unknown and self.catalogue.get_family(code) is None]
+
+        # Rapport de tri des anomalies, avec les articles proches de chaque code inexistant
+        suggestions = {}
+        triage_file = os.path.join(os.path.dirname(temp_inventory_directory), f"tri_codes_{find_closest_date().strftime('%Y-%m-%d')}.csv")
+        if os.path.exists(triage_file):
+            os.remove(triage_file)
+        if unknown_codes or familyless_codes:
+            self.stage("tri")
+            suggestions = self.write_triage_report(triage_file, scanned_counts, first_lines, unknown_codes, familyless_codes, len(file_paths) > 1)
+            log_and_display(f"Rapport de tri des codes enregistré : {triage_file}", self.events)
+
+        # Décision unique pour l'ensemble des articles inexistants
+        if unknown_codes:
+            error_code = "A001"
+            for code in unknown_codes:
+                log_and_display(f"[{error_code}] L'article {code} n'existe pas dans la base de données{self.format_suggestions(suggestions[code])}", self.events)
+            skip = self.events.ask("yesno",
+                f"[{error_code}] {ERROR_CODES[error_code]}",
+                f"[{error_code}] {len(unknown_codes)} article(s) scanné(s) n'existe(nt) pas dans la base de données :\n\n"
+                f"{self.format_triage_list(unknown_codes, suggestions)}\n\n Voulez-vous les ignorer et continuer ?",
+                decision="unknown_article"
+            )
+            if not skip:
+                log_and_display("Annulation de l'opération.", self.events)
+
+                # Nettoyage du dossier temporaire
+                shutil.rmtree(temp_inventory_directory)
+                return None
+            for code in unknown_codes:
+                log_and_display(f"Article {code} ignoré.", self.events)
+                error_name = f"[{error_code}] Article {code} inexistant"
+                device, scan_line = first_lines[code]
+                self.report_data["errors"][error_name] = self.format_article_error_message(scan_line, device if len(file_paths) > 1 else None)
+
+        # Décision unique pour l'ensemble des articles sans famille
+        self.stage("familles")
+        if familyless_codes:
+            error_code = "A002"
+            for code in familyless_codes:
+                log_and_display(f"[{error_code}] L'article {code} n'a pas de famille valide associée", self.events)
+            skip = self.events.ask("yesno",
+                f"[{error_code}] {ERROR_CODES[error_code]}",
+                f"[{error_code}] {len(familyless_codes)} article(s) scanné(s) n'ont pas de famille valide associée :\n\n"
+                f"{self.format_triage_list(familyless_codes)}\n\n Voulez-vous les ignorer et continuer ?",
+                decision="article_without_family"
+            )
+            if not skip:
+                log_and_display("Annulation de l'opération.", self.events)
+
+                # Nettoyage du dossier temporaire
+                shutil.rmtree(temp_inventory_directory)
+                return None
+            for code in familyless_codes:
+                log_and_display(f"Article {code} ignoré.", self.events)
+                error_name = f"[{error_code}] Famille invalide pour l'article {code}"
+                self.report_data["errors"][error_name] = f"L'article {code} n'a pas de famille valide associée. Ignoré, opération reprise."
+
+        # Quantités retenues et familles scannées, dans l'ordre des fichiers
+        rejected = unknown.union(familyless_codes)
+        articles_dictionnary = Counter()
+        families = []
+        for code, count in scanned_counts.items():
+            if code in rejected:
+                continue
+            articles_dictionnary[code] = count
+            family = self.catalogue.get_family(code)[0].replace(".", "")
+            if family not in families:
+                families.append(family)
+
+        # Quantités de chaque douchette, limitées aux articles retenus
+        devices_counts = {
+            device: {code: count for code, count in device_counts.items() if code in articles_dictionnary}
+            for device, device_counts in devices_counts.items()
+        }
+
+        return articles_dictionnary, families, devices_counts
+
+    def export_families(self, families_directory, articles_dictionnary, families):
+        """
+        Crée le fichier code;quantité de chaque famille, en une seule passe sur les articles retenus.
+
+        Les articles sont d'abord regroupés par famille, en ne résolvant qu'une fois la
+        famille de chacun, puis chaque fichier est écrit d'un seul bloc. Les lignes d'une
+        famille suivent l'ordre des articles retenus.
+
+        Args:
+            families_directory (str): Le dossier des fichiers par famille.
+            articles_dictionnary (dict): Les quantités retenues, indexées par numéro commercial.
+            families (list): Les familles (codes sans point final) dont le fichier doit être créé.
+        """
+        # Regroupement des lignes de chaque famille demandée
+        family_lines = {family: ["Code;Quantité\n"] for family in families}
+        for code, quantity in articles_dictionnary.items():
+            family = self.catalogue.get_family(code)
+            if family is None:
+                continue
+            lines = family_lines.get(family[0].replace(".", ""))
+            if lines is not None:
+                lines.append(f"{code};{quantity}\n")
+
+        for index, (family, lines) in enumerate(family_lines.items()):
+            log_and_display(f"Création du fichier d'inventaire pour la famille {family}...", self.events)
+            with open(os.path.join(families_directory, f"{family}.csv"), 'w', encoding='utf-8') as file:
+                file.write("".join(lines))
+            self.progress("export", index + 1, len(family_lines))
+
+    def write_triage_report(self, path, scanned_counts, first_lines, unknown_codes, familyless_codes, several_devices=False):
+        """
+        Enregistre le rapport de tri des codes scannés en anomalie, avec les articles proches
+        de chaque code inexistant, proposés par l'index de similarité du catalogue.
+
+        Args:
+            path (str): Le chemin du rapport CSV.
+            scanned_counts (dict): Les quantités scannées, indexées par code.
+            first_lines (dict): La douchette et la première ligne (ScanLine) de chaque code.
+            unknown_codes (list): Les codes inexistants (A001).
+            familyless_codes (list): Les codes des articles sans famille (A002).
+            several_devices (bool, optional): Indiquer la douchette de chaque code. Par défaut, False.
+
+        Returns:
+            dict: Les suggestions (liste de numéros commerciaux) de chaque code inexistant.
+        """
+        suggestions = {}
+        if unknown_codes:
+            index = self.catalogue.barcode_index()
+            suggestions = {code: index.suggest(code) for code in unknown_codes}
+
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write("Code;Anomalie;Quantité;Douchette;Ligne;Suggestions\n")
+            for error_code, codes in (("A001", unknown_codes), ("A002", familyless_codes)):
+                for code in codes:
+                    device, scan_line = first_lines[code]
+                    proposals = " ".join(
+                        f"{proposal} ({self.catalogue.get_article_name(proposal)})" for proposal in suggestions.get(code, ())
+                    )
+                    file.write(
+                        f"{code};{error_code} {ERROR_CODES[error_code]};{scanned_counts[code]};"
+                        f"{device if several_devices else ''};{scan_line.line_number};{proposals}\n"
+                    )
+        return suggestions
+
+    def format_suggestions(self, proposals):
+        """
+        Formate les articles proches d'un code inexistant, pour un message.
+
+        Args:
+            proposals (list): Les numéros commerciaux proposés.
+
+        Returns:
+            str: Les propositions précédées de " (proche de : ...)", ou une chaîne vide s'il n'y en a aucune.
+        """
+        if not proposals:
+            return ""
+        return f" (proche de : {', '.join(f'{proposal} {self.catalogue.get_article_name(proposal)}' for proposal in proposals)})"
+
+    def format_triage_list(self, codes, suggestions=None):
+        """
+        Formate la liste des codes en anomalie affichée dans la demande de décision, limitée
+        à TRIAGE_DIALOG_LIMIT codes (la liste complète figure dans le rapport de tri).
+
+        Args:
+            codes (list): Les codes en anomalie.
+            suggestions (dict, optional): Les articles proches de chaque code. Par défaut, aucun.
+
+        Returns:
+            str: Un code par ligne, avec ses suggestions éventuelles.
+        """
+        suggestions = suggestions or {}
+        lines = [f"- {code}{self.format_suggestions(suggestions.get(code))}" for code in codes[:TRIAGE_DIALOG_LIMIT]]
+        if len(codes) > TRIAGE_DIALOG_LIMIT:
+            lines.append(f"... et {len(codes) - TRIAGE_DIALOG_LIMIT} autre(s), voir le rapport de tri des codes")
+        return "\n".join(lines)
+
+    def plan_stock_update(self, correct_stock, previous_snapshot=None):
+        """
+        Planifie la mise à jour du stock des articles, sans rien écrire en base de données.
+
+        L'écart entre la quantité théorique et la quantité scannée de chaque article est
+        calculé en une seule requête par plan_stock(). Lors d'une reprise incrémentale, seuls
+        les articles dont la quantité scannée a changé depuis l'instantané précédent sont
+        rapprochés. Les valeurs d'inventaire par famille sont calculées séparément par
+        value_families().
+
+        Args:
+            correct_stock (dict): Dictionnaire contenant les numéros commerciaux des articles comme clés et les quantités comme valeurs.
+            previous_snapshot (dict, optional): L'instantané de l'exécution précédente, pour une reprise incrémentale. Par défaut, None.
+
+        Returns:
+            dict: Les écarts à appliquer ("mouvements", sous la forme [CodeElem, Stock, Reel, PAMP])
+            et l'écart (réel - théorique) de chaque article modifié ("ecarts"), indexé par numéro commercial.
+
+        Raises:
+            Exception: Si les écarts n'ont pas pu être calculés.
+        """
+        if previous_snapshot is not None:
+            correct_stock = changed_counts(previous_snapshot["quantites"], correct_stock)
+
+        log_and_display("Calcul des écarts de stock...", self.events)
+        with self.pool.repository() as repository:
+            deltas = repository.plan_stock(correct_stock, scanned_only=previous_snapshot is not None)
+        if deltas is None:
+            error_code = "D001"
+            log_and_display(f"[{error_code}] Échec du rapprochement des quantités scannées avec le stock", self.events)
+            error_code = "D002"
+            raise Exception(f"[{error_code}] La mise à jour du stock a échoué, aucune modification effectuée.")
+
+        movements = []
+        stock_deltas = {}
+        for delta in deltas:
+            code = delta.CodeElem.replace(".", "")
+            # Vérifier si la famille existe
+            if self.catalogue.get_family(delta.NumCommercialGlobal) is None:
+                # Gérer le cas d'une famille inexistante
+                error_code = "A002"
+                log_and_display(f"[{error_code}] L'article {code} n'a pas de famille valide associée", self.events)
+                error_name = f"[{error_code}] Famille inexistante pour l'article {code}"
+                self.report_data["errors"][error_name] = f"L'article {code} n'a pas de famille valide associée. Mis à jour, mais ne figurera dans aucun inventaire par famille, opération reprise."
+
+            if delta.Stock != delta.Reel:
+                movements.append([delta.CodeElem, delta.Stock, delta.Reel, delta.PAMP])
+                stock_deltas[delta.NumCommercialGlobal] = float(delta.Reel - delta.Stock)
+                write_log(f"Mise à jour de l'article {code} à sa nouvelle quantité : {delta.Reel}")
+
+        log_and_display(f"{len(movements)} mouvement(s) de stock à créer sur {len(deltas)} article(s)", self.events)
+        return {"mouvements": movements, "ecarts": stock_deltas}
+
+    def apply_stock_plan(self, journal, inventory_date):
+        """
+        Applique les écarts de stock journalisés, par lots validés séparément.
+
+        Les lots déjà validés d'après le journal sont ignorés. Chaque lot est appliqué
+        dans sa propre transaction par apply_movements(), qui n'applique que les écarts
+        dont le stock n'a pas encore été modifié : rejouer un lot validé juste avant une
+        interruption ne crée donc aucun mouvement en double. Si un lot échoue, il est
+        annulé et l'exécution pourra être reprise à partir de ce lot.
+
+        Args:
+            journal (StockJournal): Le journal de l'exécution.
+            inventory_date (datetime): La date d'inventaire des mouvements.
+
+        Raises:
+            Exception: Si un lot n'a pas pu être appliqué.
+        """
+        batches = journal.batches()
+        log_and_display(f"Mise à jour du stock de l'exécution {journal.plan['run_id']} en {len(batches)} lot(s)...", self.events)
+
+        with self.pool.repository() as repository:
+            for index, batch in enumerate(batches):
+                if index in journal.applied_batches:
+                    continue
+                try:
+                    result = repository.apply_movements(batch, inventory_date)
+                    if result is None:
+                        error_code = "D001"
+                        log_and_display(f"[{error_code}] Échec de la mise à jour du lot {index + 1}/{len(batches)}", self.events)
+                        error_code = "D002"
+                        raise Exception(f"[{error_code}] Le lot {index + 1}/{len(batches)} a été annulé, l'exécution pourra être reprise.")
+                    repository.commit()
+
+                except Exception:
+                    log_and_display("Annulation des modifications du lot en cours...", self.events)
+                    repository.rollback()
+                    raise
+
+                journal.record_batch(index, result)
+                for code in result["conflits"]:
+                    error_code = "D003"
+                    log_and_display(f"[{error_code}] Le stock de l'article {code} a changé depuis le calcul des écarts, il n'a pas été mis à jour", self.events)
+                    error_name = f"[{error_code}] Stock modifié pour l'article {code}"
+                    self.report_data["errors"][error_name] = f"Le stock de l'article {code} a été modifié pendant l'inventaire. Aucun mouvement n'a été créé, opération reprise."
+                self.progress("stock", index + 1, len(batches))
+
+        journal.finish()
+        log_and_display("Mises à jour validées avec succès!", self.events)
+
+        # Les quantités en stock ont changé : le catalogue doit être rechargé
+        self.catalogue.invalidate()
+
+    def render_family_reports(self, family_documents):
+        """
+        Convertit les rapports par famille en PDF, un fichier et un processus wkhtmltopdf par famille.
+        Les échecs sont ajoutés aux erreurs du rapport d'exécution (R001).
+
+        Args:
+            family_documents (list): Les documents des rapports par famille (voir build_family_report).
+        """
+        log_and_display(f"Conversion de {len(family_documents)} rapport(s) par famille en PDF...", self.events)
+        family_reports, family_reports_errors = render_pdfs(family_documents)
+        for family_report in family_reports:
+            log_and_display(f"Rapport généré pour la famille {os.path.splitext(os.path.basename(family_report))[0]}: {os.path.basename(family_report)}", self.events)
+        for family_report, error_msg in family_reports_errors.items():
+            error_code = "R001"
+            log_and_display(f"[{error_code}] Échec de la génération du rapport {os.path.basename(family_report)} : {error_msg}", self.events)
+            error_name = f"[{error_code}] Rapport {os.path.basename(family_report)} non généré"
+            self.report_data["errors"][error_name] = f"La génération du rapport {os.path.basename(family_report)} a échoué : {error_msg}"
+
+    def render_combined_reports(self, family_documents, inventory_date):
+        """
+        Convertit les rapports par famille, et éventuellement le rapport d'exécution, en un
+        seul document PDF avec un signet par rapport, en une seule exécution de wkhtmltopdf.
+
+        En mode "combine_decoupe", le document est ensuite découpé en un fichier par rapport,
+        aux emplacements habituels. Si la conversion ou le découpage échoue, les rapports
+        par famille sont convertis séparément, comme en mode "separe".
+
+        Args:
+            family_documents (list): Les documents des rapports par famille (voir build_family_report).
+            inventory_date (str): La date d'inventaire (AAAA-MM-JJ).
+
+        Returns:
+            str: Le chemin du rapport d'exécution s'il a été produit avec le document combiné, None sinon.
+        """
+        if not family_documents:
+            return None
+
+        documents = list(family_documents)
+        report_document = None
+        if PDF_COMBINED_WITH_REPORT:
+            # Le rapport d'exécution est construit avant la conversion, sans la mesure de l'étape des rapports
+            self.stage("rapport")
+            self.report_data["performances"] = metrics.to_dict()
+            report_document = build_report(self.report_data)
+            documents.insert(0, report_document)
+
+        # Le document combiné est placé dans le dossier d'inventaire, à côté du dossier des rapports par famille
+        inventory_directory = os.path.dirname(os.path.dirname(family_documents[0]["path"]))
+        combined_path = os.path.join(inventory_directory, f"rapports_{inventory_date}.pdf")
+        try:
+            log_and_display(f"Conversion de {len(documents)} rapport(s) en un seul document PDF...", self.events)
+            # Marges des rapports par famille pour tout le document, pied de page propre à chaque rapport
+            render_combined_pdf(documents, combined_path, options=family_documents[0]["options"])
+            log_and_display(f"Document combiné généré : {combined_path}", self.events)
+            if PDF_OUTPUT_MODE == "combine_decoupe":
+                split_combined_pdf(combined_path, documents)
+                log_and_display(f"Document combiné découpé en {len(documents)} fichier(s)", self.events)
+                return report_document["path"] if report_document is not None else None
+            return combined_path if report_document is not None else None
+
+        except Exception as e:
+            error_code = "R001"
+            log_and_display(f"[{error_code}] Échec de la génération du document combiné : {str(e)}", self.events)
+            self.report_data["errors"][f"[{error_code}] Document combiné non généré"] = f"La génération du document combiné a échoué : {str(e)}. Rapports générés séparément."
+            self.render_family_reports(family_documents)
+            return None
+
+    def format_article_error_message(self, scan_line, device=None):
+        """
+        Formate le message d'erreur pour un article absent dans la base de données.
+
+        Args:
+            scan_line (ScanLine): Le code absent, avec sa ligne et ses voisins dans le fichier d'inventaire.
+            device (str, optional): Le nom de la douchette du fichier, lorsque plusieurs fichiers sont traités.
+
+        Returns:
+            str: Le message d'erreur formaté.
+        """
+        code = scan_line.code
+        prev_code = scan_line.prev_code
+        next_code = scan_line.next_code
+        if device is not None:
+            code = f"{code} (douchette {device})"
+        if prev_code is None and next_code is None:
+            return f"Article {code} absent en base de données. Seul article du fichier, à la ligne {scan_line.line_number}. Ignoré, opération reprise"
+        elif prev_code is None:
+            article_suivant = self.catalogue.get_article_name(next_code)
+            return f"Article {code} absent en base de données. Situé en première position, avant {next_code} ({article_suivant}). Ignoré, opération reprise"
+        elif next_code is None:
+            article_precedent = self.catalogue.get_article_name(prev_code)
+            return f"Article {code} absent en base de données. Situé en dernière position, après {prev_code} ({article_precedent}). Ignoré, opération reprise"
+        else:
+            article_precedent = self.catalogue.get_article_name(prev_code)
+            article_suivant = self.catalogue.get_article_name(next_code)
+            return f"Article {code} absent en base de données. Situé entre {prev_code} ({article_precedent}) et {next_code} ({article_suivant}) à la ligne {scan_line.line_number}. Ignoré, opération reprise"
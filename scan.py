@@ -0,0 +1,213 @@
+"""
+    But : Ce fichier contient les méthodes de lecture des fichiers extraits de la douchette
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import codecs
+import os
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from constantes import *
+
+# Taille des blocs lus lors de la détection de l'encodage
+DETECTION_CHUNK_SIZE = 64 * 1024
+
+# Encodage utilisé lorsque le fichier n'est pas un fichier UTF-8 valide
+FALLBACK_ENCODING = "cp1252"
+
+# Séparateur des chemins lorsque plusieurs fichiers sont sélectionnés dans un même champ
+SCAN_FILES_SEPARATOR = ";"
+
+# Code scanné, avec sa ligne dans le fichier et ses voisins non vides
+ScanLine = namedtuple("ScanLine", ["code", "line_number", "prev_code", "next_code"])
+
+def detect_encoding(file_path):
+    """
+    Détermine l'encodage d'un fichier d'inventaire.
+
+    Le fichier est décodé par blocs, sans être chargé entièrement en mémoire :
+    s'il s'agit d'un UTF-8 valide (avec ou sans BOM), il est lu en UTF-8,
+    sinon avec l'encodage Windows de repli.
+
+    Args:
+        file_path (str): Le chemin du fichier d'inventaire.
+
+    Returns:
+        str: L'encodage à utiliser pour lire le fichier.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    with open(file_path, 'rb') as file:
+        try:
+            while True:
+                chunk = file.read(DETECTION_CHUNK_SIZE)
+                if not chunk:
+                    decoder.decode(b"", final=True)
+                    return "utf-8-sig"
+                decoder.decode(chunk)
+        except UnicodeDecodeError:
+            return FALLBACK_ENCODING
+
+def read_scan_file(file_path):
+    """
+    Lit un fichier d'inventaire en flux, ligne par ligne.
+
+    Les codes sont normalisés (espaces et fins de ligne Windows ou Unix retirés)
+    et les lignes vides sont ignorées. Chaque code est accompagné de son numéro
+    de ligne dans le fichier et des codes qui le précèdent et le suivent, ce qui
+    ne nécessite de conserver que trois lignes en mémoire.
+
+    Args:
+        file_path (str): Le chemin du fichier d'inventaire.
+
+    Yields:
+        ScanLine: Chaque code scanné, avec son numéro de ligne et ses voisins
+        (None en début ou en fin de fichier).
+    """
+    prev_code = None
+    current = None
+    with open(file_path, 'r', encoding=detect_encoding(file_path), newline=None) as file:
+        for line_number, line in enumerate(file, start=1):
+            code = line.strip()
+            if code == "":
+                continue
+            if current is not None:
+                yield ScanLine(current[0], current[1], prev_code, code)
+                prev_code = current[0]
+            current = (code, line_number)
+
+    if current is not None:
+        yield ScanLine(current[0], current[1], prev_code, None)
+
+def count_scan_file(file_path):
+    """
+    Compte le nombre de scans de chaque code d'un fichier d'inventaire.
+
+    Args:
+        file_path (str): Le chemin du fichier d'inventaire.
+
+    Returns:
+        Counter: Le nombre de scans par code, dans l'ordre de première apparition.
+    """
+    counts = Counter()
+    for scan_line in read_scan_file(file_path):
+        counts[scan_line.code] += 1
+    return counts
+
+def is_scan_file(path):
+    """
+    Indique si un chemin désigne un fichier texte d'inventaire, quelle que soit la casse de
+    son extension (les douchettes sous Windows produisent souvent des noms en majuscules).
+
+    Args:
+        path (str): Le chemin ou le nom du fichier.
+
+    Returns:
+        bool: True si le fichier a l'extension .txt, False sinon.
+    """
+    return path.lower().endswith(".txt")
+
+def resolve_scan_files(selection):
+    """
+    Renvoie la liste des fichiers d'inventaire désignés par une sélection.
+
+    Args:
+        selection (str | list): Un chemin de fichier ou de dossier, plusieurs chemins séparés
+            par SCAN_FILES_SEPARATOR, ou une liste de chemins. Les dossiers sont remplacés
+            par les fichiers texte (.txt) qu'ils contiennent, par ordre alphabétique.
+
+    Returns:
+        list: Les chemins sélectionnés, dans l'ordre de la sélection.
+    """
+    if isinstance(selection, str):
+        selection = selection.split(SCAN_FILES_SEPARATOR)
+
+    file_paths = []
+    for path in selection:
+        path = path.strip()
+        if not path:
+            continue
+        if os.path.isdir(path):
+            file_paths.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if is_scan_file(name))
+        else:
+            file_paths.append(path)
+    return file_paths
+
+def device_names(file_paths):
+    """
+    Associe à chaque fichier d'inventaire le nom de la douchette dont il est extrait :
+    le nom du fichier sans extension, suffixé si plusieurs fichiers portent le même nom.
+
+    Args:
+        file_paths (list): Les chemins des fichiers d'inventaire.
+
+    Returns:
+        list: Le nom de la douchette de chaque fichier, dans le même ordre.
+    """
+    names = []
+    for file_path in file_paths:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        unique_name = name
+        suffix = 2
+        while unique_name in names:
+            unique_name = f"{name}_{suffix}"
+            suffix += 1
+        names.append(unique_name)
+    return names
+
+def summarize_scan_file(file_path):
+    """
+    Compte les scans de chaque code d'un fichier et retient la première occurrence de chaque code.
+
+    Args:
+        file_path (str): Le chemin du fichier d'inventaire.
+
+    Returns:
+        tuple: Le nombre de scans par code (Counter, dans l'ordre de première apparition)
+        et la première ligne (ScanLine) de chaque code.
+    """
+    counts = Counter()
+    first_lines = {}
+    for scan_line in read_scan_file(file_path):
+        if scan_line.code not in first_lines:
+            first_lines[scan_line.code] = scan_line
+        counts[scan_line.code] += 1
+    return counts, first_lines
+
+def read_scan_files(file_paths, max_workers=SCAN_WORKERS, on_file_read=None):
+    """
+    Lit simultanément plusieurs fichiers d'inventaire et fusionne leurs comptages.
+
+    Les comptages sont fusionnés dans l'ordre des fichiers, comme si ceux-ci avaient
+    été concaténés : l'ordre de première apparition des codes est conservé.
+
+    Args:
+        file_paths (list): Les chemins des fichiers d'inventaire.
+        max_workers (int, optional): Le nombre maximal de fichiers lus simultanément. Par défaut, SCAN_WORKERS.
+        on_file_read (callable, optional): Fonction appelée avec le nombre de fichiers lus
+            et le nombre total de fichiers, après la lecture de chaque fichier.
+
+    Returns:
+        tuple: Le nombre total de scans par code (Counter), le nombre de scans par code
+        de chaque douchette (dict de Counter, indexé par nom de douchette) et la première
+        occurrence de chaque code (dict de tuples (nom de douchette, ScanLine)).
+    """
+    names = device_names(file_paths)
+    summaries = [None] * len(file_paths)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(file_paths)))) as executor:
+        futures = {executor.submit(summarize_scan_file, file_path): index for index, file_path in enumerate(file_paths)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            summaries[futures[future]] = future.result()
+            if on_file_read is not None:
+                on_file_read(done, len(file_paths))
+
+    counts = Counter()
+    devices_counts = {}
+    first_lines = {}
+    for name, (device_counts, device_first_lines) in zip(names, summaries):
+        devices_counts[name] = device_counts
+        for code, count in device_counts.items():
+            if code not in first_lines:
+                first_lines[code] = (name, device_first_lines[code])
+            counts[code] += count
+    return counts, devices_counts, first_lines
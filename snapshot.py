@@ -0,0 +1,94 @@
+"""
+    But : Ce fichier contient l'enregistrement et la comparaison des instantanés d'inventaire, utilisés pour les reprises incrémentales
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import json
+import os
+from utils import *
+
+# Version du format des instantanés, incrémentée à chaque changement incompatible
+SNAPSHOT_VERSION = 1
+
+def snapshot_path(inventory_directory, inventory_date):
+    """
+    Renvoie le chemin de l'instantané d'un dossier d'inventaire.
+
+    Args:
+        inventory_directory (str): Le dossier d'inventaire.
+        inventory_date (str): La date d'inventaire (AAAA-MM-JJ).
+
+    Returns:
+        str: Le chemin du fichier d'instantané.
+    """
+    return os.path.join(inventory_directory, f"instantane_{inventory_date}.json")
+
+def load_snapshot(inventory_directory, inventory_date):
+    """
+    Charge l'instantané laissé par la dernière exécution réussie d'un inventaire.
+
+    Args:
+        inventory_directory (str): Le dossier d'inventaire.
+        inventory_date (str): La date d'inventaire (AAAA-MM-JJ).
+
+    Returns:
+        dict: L'instantané, ou None s'il est absent, illisible ou d'une autre version ou date.
+    """
+    path = snapshot_path(inventory_directory, inventory_date)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        write_log(f"[ERREUR] Instantané {path} illisible : {str(e)}")
+        return None
+
+    if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("date") != inventory_date:
+        write_log(f"Instantané {path} ignoré : version ou date différente")
+        return None
+    return snapshot
+
+def write_snapshot(inventory_directory, inventory_date, counts, families_values, deltas):
+    """
+    Enregistre l'instantané d'une exécution : quantités scannées, valeurs par famille
+    et écart cumulé appliqué au stock de chaque article.
+
+    Args:
+        inventory_directory (str): Le dossier d'inventaire.
+        inventory_date (str): La date d'inventaire (AAAA-MM-JJ).
+        counts (dict): Les quantités retenues, indexées par numéro commercial.
+        families_values (dict): Les valeurs d'inventaire par famille.
+        deltas (dict): L'écart cumulé (réel - théorique) appliqué à chaque article, indexé par numéro commercial.
+    """
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "date": inventory_date,
+        "quantites": dict(counts),
+        "valeurs_familles": families_values,
+        "ecarts": {code: delta for code, delta in deltas.items() if delta != 0},
+    }
+    with open(snapshot_path(inventory_directory, inventory_date), 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"), default=float)
+
+def changed_counts(previous_counts, counts):
+    """
+    Compare les quantités scannées avec celles de l'instantané précédent.
+
+    Args:
+        previous_counts (dict): Les quantités de l'instantané, indexées par numéro commercial.
+        counts (dict): Les nouvelles quantités, indexées par numéro commercial.
+
+    Returns:
+        dict: La nouvelle quantité (0 pour un article qui n'est plus scanné) de chaque
+        article dont la quantité a changé.
+    """
+    changes = {}
+    for code, quantity in counts.items():
+        if previous_counts.get(code, 0) != quantity:
+            changes[code] = quantity
+    for code in previous_counts:
+        if code not in counts and previous_counts[code] != 0:
+            changes[code] = 0
+    return changes
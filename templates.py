@@ -0,0 +1,113 @@
+"""
+    But : Ce fichier contient le moteur de gabarits HTML des rapports, compilés une seule fois par processus
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import html
+import re
+from functools import lru_cache
+
+# Emplacement d'une valeur dans un gabarit : {{nom}}
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+class Markup(str):
+    """
+    Fragment HTML déjà construit (et échappé), inséré tel quel dans un gabarit.
+    """
+
+def escape(value):
+    """
+    Échappe une valeur pour l'insérer dans un document HTML.
+
+    Args:
+        value: La valeur à insérer. Un fragment Markup est conservé tel quel, None donne une chaîne vide.
+
+    Returns:
+        str: La valeur échappée.
+    """
+    if isinstance(value, Markup):
+        return value
+    if value is None:
+        return ""
+    return html.escape(str(value))
+
+class Template:
+    """
+    Gabarit HTML compilé.
+
+    Le texte du gabarit est découpé une seule fois autour de ses emplacements {{nom}}.
+    Le rendu assemble ensuite les morceaux fixes et les valeurs échappées en une seule
+    jointure, sans remplacements successifs sur le document complet.
+
+    Attributes:
+        names (tuple): Les noms des emplacements, dans l'ordre du gabarit.
+    """
+
+    def __init__(self, source):
+        """
+        Compile un gabarit.
+
+        Args:
+            source (str): Le texte du gabarit.
+        """
+        # Morceaux fixes aux index pairs, noms des emplacements aux index impairs
+        self._parts = PLACEHOLDER_PATTERN.split(source)
+        self.names = tuple(self._parts[1::2])
+
+    def _pieces(self, values):
+        """
+        Produit les morceaux du rendu, dans l'ordre du gabarit.
+
+        Args:
+            values (dict): Les valeurs des emplacements.
+
+        Yields:
+            str: Chaque morceau fixe ou valeur échappée.
+
+        Raises:
+            KeyError: Si la valeur d'un emplacement n'est pas fournie.
+        """
+        for index, part in enumerate(self._parts):
+            yield escape(values[part]) if index % 2 else part
+
+    def render(self, values):
+        """
+        Rend le gabarit avec les valeurs fournies, échappées sauf s'il s'agit de fragments Markup.
+
+        Args:
+            values (dict): Les valeurs des emplacements.
+
+        Returns:
+            Markup: Le document rendu.
+
+        Raises:
+            KeyError: Si la valeur d'un emplacement n'est pas fournie.
+        """
+        return Markup("".join(self._pieces(values)))
+
+    def render_many(self, rows):
+        """
+        Rend le gabarit pour chaque ligne, et assemble le tout en une seule jointure.
+
+        Args:
+            rows (iterable): Les valeurs des emplacements de chaque ligne.
+
+        Returns:
+            Markup: Les lignes rendues, à la suite.
+        """
+        return Markup("".join(piece for values in rows for piece in self._pieces(values)))
+
+@lru_cache(maxsize=None)
+def load_template(path):
+    """
+    Charge et compile un gabarit depuis le disque, une seule fois par processus et par chemin.
+
+    Args:
+        path (str): Le chemin du fichier de gabarit.
+
+    Returns:
+        Template: Le gabarit compilé.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return Template(f.read())
@@ -0,0 +1,35 @@
+"""
+    But : Ce fichier contient la configuration commune des tests et la base de substitution à Batigest Connect qu'ils utilisent
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import os
+import sys
+import pytest
+
+# Les modules de l'application et la base de substitution des mesures de performance
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT_DIRECTORY, os.path.join(ROOT_DIRECTORY, "benchmarks")]
+
+# Nombre d'articles du catalogue synthétique des tests
+STANDIN_ARTICLES = 400
+
+@pytest.fixture
+def standin_database(tmp_path):
+    """
+    Crée une base SQLite de substitution remplie d'un catalogue synthétique.
+
+    Returns:
+        tuple: Le chemin de la base et les numéros commerciaux des articles générés.
+    """
+    from standin import standin_connection, create_schema, generate_catalogue
+
+    database = str(tmp_path / "batigest.db")
+    connection = standin_connection(database)
+    try:
+        create_schema(connection)
+        codes = generate_catalogue(connection, STANDIN_ARTICLES)
+    finally:
+        connection.close()
+    return database, codes
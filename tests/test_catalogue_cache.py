@@ -0,0 +1,74 @@
+"""
+    But : Ce fichier vérifie la validité du cache local du catalogue d'articles face aux modifications de la base
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import pytest
+
+from catalogue import *
+
+def loaded_catalogue(pool, cache_path):
+    """
+    Charge un nouveau catalogue, comme au démarrage de l'application.
+
+    Args:
+        pool (ConnectionPool): La réserve de connexions à la base de substitution.
+        cache_path (str): Le chemin du cache local.
+
+    Returns:
+        Catalogue: Le catalogue chargé.
+    """
+    catalogue = Catalogue(pool, cache_path)
+    catalogue.refresh()
+    return catalogue
+
+@pytest.fixture
+def catalogue_reads(monkeypatch):
+    """
+    Compte les lectures complètes du catalogue en base, c'est-à-dire les défauts de cache.
+    """
+    reads = []
+    catalogue = Repository.catalogue
+    monkeypatch.setattr(Repository, "catalogue", lambda repository: reads.append(1) or catalogue(repository))
+    return reads
+
+def test_cache_hit_and_miss_after_same_length_edit(standin_database, tmp_path, monkeypatch, catalogue_reads):
+    database, codes = standin_database
+    monkeypatch.chdir(tmp_path)
+    cache_path = str(tmp_path / "catalogue.cache")
+    pool = ConnectionPool("sqlite", sqlite_database=database)
+    connection = sqlite_connection(database)
+    try:
+        loaded_catalogue(pool, cache_path)
+        assert len(catalogue_reads) == 1
+
+        # Base inchangée : le catalogue est relu depuis le cache
+        loaded_catalogue(pool, cache_path)
+        assert len(catalogue_reads) == 1
+
+        # Un mouvement de stock ne rend pas le cache obsolète, mais la quantité relue est à jour
+        article = connection.execute(
+            "SELECT ED.Code, ED.NumCommercialGlobal, ES.QttAppro - ES.QttConso AS Stock "
+            "FROM ElementDef ED JOIN ElementStock ES ON ES.CodeElem = ED.Code ORDER BY ED.Code"
+        ).fetchone()
+        connection.execute("UPDATE ElementStock SET QttAppro = QttAppro + 7 WHERE CodeElem = ?", [article.Code])
+        connection.commit()
+        catalogue = loaded_catalogue(pool, cache_path)
+        assert len(catalogue_reads) == 1
+        assert catalogue.get_article_stock(article.NumCommercialGlobal).stock == article.Stock + 7
+
+        # Un libellé modifié sans changer de longueur ni le nombre de lignes rend le cache obsolète
+        label = catalogue.get_article_name(article.NumCommercialGlobal)
+        edited_label = label[:-1] + ("X" if label[-1] != "X" else "Y")
+        connection.execute("UPDATE ElementDef SET LibelleStd = ? WHERE Code = ?", [edited_label, article.Code])
+        connection.commit()
+        catalogue = loaded_catalogue(pool, cache_path)
+        assert len(catalogue_reads) == 2
+        assert catalogue.get_article_name(article.NumCommercialGlobal) == edited_label
+
+        loaded_catalogue(pool, cache_path)
+        assert len(catalogue_reads) == 2
+    finally:
+        connection.close()
+        pool.close()
@@ -0,0 +1,171 @@
+"""
+    But : Ce fichier vérifie qu'une nouvelle exécution à la même date ne traite que les articles modifiés, avec le même résultat qu'une exécution complète
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import os
+import shutil
+import pytest
+
+pytest.importorskip("pdfkit", exc_type=ImportError)
+from cli import *
+import pipeline as pipeline_module
+
+# Décisions de la nouvelle exécution : l'inventaire du jour existe déjà et doit être remplacé
+RERUN_POLICY = dict(DEFAULT_POLICY, existing_inventory=True)
+
+# Gabarits nécessaires au traitement, à la racine du dépôt, copiés dans le dossier de chaque exécution
+TEMPLATES_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_FILES = ["report_template.html", "family_inventory_template.html"]
+
+def write_scan_file(path, counts):
+    """
+    Écrit un fichier extrait de la douchette : une ligne par article scanné.
+
+    Args:
+        path (str): Le chemin du fichier à écrire.
+        counts (dict): Les quantités scannées, indexées par numéro commercial.
+    """
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for code, quantity in counts.items():
+            f.write(f"{code}\r\n" * quantity)
+
+def scan_counts(database, codes):
+    """
+    Construit les quantités de la première exécution et les trois modifications de la seconde :
+    une quantité modifiée, un article qui n'est plus scanné et un article nouvellement scanné.
+
+    Args:
+        database (str): Le chemin de la base de substitution.
+        codes (list): Les numéros commerciaux du catalogue.
+
+    Returns:
+        tuple: Les quantités des deux exécutions (dict) et les familles des articles modifiés
+        (codes sans point final).
+    """
+    connection = sqlite_connection(database)
+    try:
+        families = dict(connection.execute("SELECT NumCommercialGlobal, Famille FROM ElementDef WHERE Famille IS NOT NULL").fetchall())
+    finally:
+        connection.close()
+
+    scanned = [code for code in codes if code in families][:len(codes) // 2]
+    first = {code: index % 5 + 1 for index, code in enumerate(scanned)}
+    scanned_families = [families[code] for code in scanned]
+    # Articles modifiés choisis dans des familles qui restent scannées par ailleurs
+    increased, removed = [code for code in scanned if scanned_families.count(families[code]) > 1][:2]
+    added = next(code for code in codes if code in families and code not in first and families[code] in scanned_families)
+
+    second = dict(first)
+    second[increased] += 2
+    del second[removed]
+    second[added] = 4
+    changed_families = {families[code].replace(".", "") for code in (increased, removed, added)}
+    return first, second, changed_families
+
+def run_inventory(directory, database, scan_file, monkeypatch):
+    """
+    Exécute le traitement d'inventaire complet dans un dossier, sans conversion des rapports en PDF.
+
+    Args:
+        directory (str): Le dossier de travail de l'exécution.
+        database (str): Le chemin de la base de substitution.
+        scan_file (str): Le chemin du fichier scanné.
+        monkeypatch: L'outil de substitution de pytest.
+
+    Returns:
+        InventoryPipeline: Le traitement exécuté.
+    """
+    monkeypatch.chdir(directory)
+    pool = ConnectionPool("sqlite", sqlite_database=database)
+    try:
+        pipeline = InventoryPipeline(pool, Catalogue(pool), PolicyChannel(RERUN_POLICY, quiet=True), render_pdf=False)
+        assert pipeline.run(scan_file) == RUN_SUCCESS
+        return pipeline
+    finally:
+        pool.close()
+
+def families_files(directory):
+    """
+    Relit les fichiers par famille de l'inventaire du jour.
+
+    Args:
+        directory (str): Le dossier de travail de l'exécution.
+
+    Returns:
+        dict: Le contenu de chaque fichier, indexé par nom de fichier.
+    """
+    inventory_date = find_closest_date().strftime("%Y-%m-%d")
+    families_directory = os.path.join(directory, ".\\inventaires", f"inventaire_{inventory_date}", "familles")
+    files = {}
+    for name in os.listdir(families_directory):
+        with open(os.path.join(families_directory, name), 'r', encoding='utf-8') as f:
+            files[name] = f.read()
+    return files
+
+def database_rows(database):
+    """
+    Relit le stock et les mouvements de la base de substitution.
+
+    Args:
+        database (str): Le chemin de la base de substitution.
+
+    Returns:
+        tuple: Les lignes de ElementStock et de ElementMvtStock, triées.
+    """
+    connection = sqlite_connection(database)
+    try:
+        stock = [tuple(row) for row in connection.execute("SELECT CodeElem, QttAppro, QttConso, PAMP FROM ElementStock ORDER BY CodeElem")]
+        movements = [tuple(row) for row in connection.execute(
+            "SELECT CodeElem, TypeMvt, Provenance, Date, Quantite, PA, Info FROM ElementMvtStock ORDER BY CodeElem, rowid"
+        )]
+        return stock, movements
+    finally:
+        connection.close()
+
+def test_incremental_rerun_matches_full_rerun(standin_database, tmp_path, monkeypatch):
+    database, codes = standin_database
+    first, second, changed_families = scan_counts(database, codes)
+
+    # Deux dossiers identiques : nouvelle exécution incrémentale dans l'un, complète dans l'autre
+    directories = {}
+    for name in ("incrementale", "complete"):
+        directory = tmp_path / name
+        directory.mkdir()
+        for template in TEMPLATE_FILES:
+            shutil.copy(os.path.join(TEMPLATES_DIRECTORY, template), directory)
+        shutil.copy(database, directory / "batigest.db")
+        write_scan_file(str(directory / "inventaire_1.txt"), first)
+        write_scan_file(str(directory / "inventaire_2.txt"), second)
+        directories[name] = (str(directory), str(directory / "batigest.db"))
+        run_inventory(str(directory), str(directory / "batigest.db"), str(directory / "inventaire_1.txt"), monkeypatch)
+
+    # Articles rapprochés, fichiers par famille écrits et rapports par famille construits par la seconde exécution
+    reconciled, exported, reported = [], [], []
+    plan_stock = Repository.plan_stock
+    export_families = InventoryPipeline.export_families
+    build_family_report = pipeline_module.build_family_report
+    monkeypatch.setattr(Repository, "plan_stock", lambda self, correct_stock, scanned_only=False: reconciled.append((set(correct_stock), scanned_only)) or plan_stock(self, correct_stock, scanned_only))
+    monkeypatch.setattr(InventoryPipeline, "export_families", lambda self, directory, counts, families: exported.append(set(families)) or export_families(self, directory, counts, families))
+    monkeypatch.setattr(pipeline_module, "build_family_report", lambda family, *args, **options: reported.append(family) or build_family_report(family, *args, **options))
+
+    directory, incremental_database = directories["incrementale"]
+    run_inventory(directory, incremental_database, os.path.join(directory, "inventaire_2.txt"), monkeypatch)
+    changed_codes = {code for code in set(first) | set(second) if first.get(code, 0) != second.get(code, 0)}
+    assert reconciled == [(changed_codes, True)]
+    assert exported == [changed_families]
+    assert set(reported) == changed_families
+
+    reconciled.clear()
+    exported.clear()
+    reported.clear()
+    monkeypatch.setattr(pipeline_module, "INCREMENTAL_REINVENTORY", False)
+    directory, full_database = directories["complete"]
+    run_inventory(directory, full_database, os.path.join(directory, "inventaire_2.txt"), monkeypatch)
+    assert reconciled == [(set(second), False)]
+    assert exported[0] > changed_families
+
+    # Même stock, mêmes mouvements et mêmes fichiers par famille qu'une exécution complète
+    assert database_rows(incremental_database) == database_rows(full_database)
+    assert families_files(directories["incrementale"][0]) == families_files(directories["complete"][0])
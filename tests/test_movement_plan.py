@@ -0,0 +1,146 @@
+"""
+    But : Ce fichier vérifie l'enregistrement vérifiable des plans de mouvements et leur application unique
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import glob
+import json
+import os
+import stat
+from decimal import Decimal
+import pytest
+
+pytest.importorskip("pdfkit", exc_type=ImportError)
+from cli import *
+
+# Écarts enregistrés : quantités et PAMP décimaux, dont un PAMP non représentable exactement en binaire
+MOVEMENTS = [
+    ["ART0000001", Decimal("12.00000000"), Decimal("7.00000000"), Decimal("1.23456789")],
+    ["ART0000002", 3, 0, Decimal("0.10000000")],
+]
+
+def plan_contents():
+    """
+    Construit le contenu d'un fichier de mouvements.
+
+    Returns:
+        dict: Le contenu, tel qu'enregistré par une simulation.
+    """
+    return {"run_id": new_run_id(), "date": "2026-10-18", "mouvements": [list(movement) for movement in MOVEMENTS]}
+
+def tamper(path, change):
+    """
+    Modifie le contenu d'un fichier de mouvements sans mettre à jour son empreinte.
+
+    Args:
+        path (str): Le chemin du fichier, en lecture seule.
+        change (callable): La modification appliquée au contenu relu du JSON.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    change(data["plan"])
+    os.chmod(path, stat.S_IREAD | stat.S_IWRITE)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+
+def run_pipeline(database, file_path, **options):
+    """
+    Exécute le traitement d'inventaire sur la base de substitution.
+
+    Args:
+        database (str): Le chemin de la base de substitution.
+        file_path (str): Le fichier scanné ou le plan de mouvements.
+        **options: Le mode d'exécution (dry_run ou apply, voir InventoryPipeline.run).
+
+    Returns:
+        int: Le statut de l'exécution.
+    """
+    pool = ConnectionPool("sqlite", sqlite_database=database)
+    try:
+        pipeline = InventoryPipeline(pool, Catalogue(pool), PolicyChannel(DEFAULT_POLICY, quiet=True), render_pdf=False)
+        return pipeline.run(file_path, **options)
+    finally:
+        pool.close()
+
+def movement_counts(database):
+    """
+    Compte les mouvements de stock de chaque article.
+
+    Args:
+        database (str): Le chemin de la base de substitution.
+
+    Returns:
+        dict: Le nombre de mouvements, indexé par code d'article.
+    """
+    connection = sqlite_connection(database)
+    try:
+        return dict(connection.execute("SELECT CodeElem, COUNT(*) FROM ElementMvtStock GROUP BY CodeElem").fetchall())
+    finally:
+        connection.close()
+
+def simulated_plan(database, codes):
+    """
+    Simule un inventaire de la base de substitution et renvoie le plan de mouvements enregistré.
+
+    Args:
+        database (str): Le chemin de la base de substitution.
+        codes (list): Les numéros commerciaux du catalogue.
+
+    Returns:
+        str: Le chemin du plan de mouvements (fichier JSON).
+    """
+    with open("inventaire.txt", 'w', encoding='utf-8', newline='') as file:
+        for index, code in enumerate(codes[:len(codes) // 2]):
+            file.write(f"{code}\r\n" * (index % 4 + 1))
+    assert run_pipeline(database, "inventaire.txt", dry_run=True) == RUN_SUCCESS
+    plans = glob.glob(os.path.join(DRY_RUN_DIRECTORY, "plan_mouvements_*.json"))
+    assert len(plans) == 1
+    assert glob.glob(os.path.join(DRY_RUN_DIRECTORY, "metriques_*.json"))
+    return plans[0]
+
+def test_movement_file_round_trip_keeps_exact_decimals(tmp_path):
+    path = str(tmp_path / "plan.json")
+    contents = plan_contents()
+    checksum = save_movement_file(path, contents)
+
+    loaded_checksum, loaded = load_movement_file(path)
+
+    assert loaded_checksum == checksum
+    assert loaded["mouvements"] == MOVEMENTS
+    assert [type(value) for value in loaded["mouvements"][0]] == [str, Decimal, Decimal, Decimal]
+    assert str(loaded["mouvements"][0][3]) == "1.23456789"
+    assert os.stat(path).st_mode & stat.S_IWRITE == 0
+
+def test_tampered_movement_file_is_rejected(standin_database, tmp_path, monkeypatch, capsys):
+    database, codes = standin_database
+    monkeypatch.chdir(tmp_path)
+    path = simulated_plan(database, codes)
+    tamper(path, lambda plan: plan["mouvements"][0].__setitem__(2, plan["mouvements"][0][2] + 1))
+
+    with pytest.raises(ValueError):
+        load_movement_file(path)
+    assert run_pipeline(database, path, apply=True) == RUN_ERROR
+    assert "[F005]" in capsys.readouterr().err
+    assert movement_counts(database) == {}
+
+def test_applied_plan_is_never_applied_twice(standin_database, tmp_path, monkeypatch):
+    database, codes = standin_database
+    monkeypatch.chdir(tmp_path)
+    path = simulated_plan(database, codes)
+    movements = load_movement_file(path)[1]["mouvements"]
+    assert movements
+
+    assert run_pipeline(database, path, apply=True) == RUN_SUCCESS
+    applied = movement_counts(database)
+    assert applied == {movement[0]: 1 for movement in movements}
+
+    # Plan déjà appliqué selon son journal
+    assert run_pipeline(database, path, apply=True) == RUN_SUCCESS
+    assert movement_counts(database) == applied
+
+    # Journal perdu : les écarts déjà appliqués sont reconnus en base de données
+    for journal in glob.glob(os.path.join(STOCK_JOURNAL_DIRECTORY, "journal_*.jsonl")):
+        os.remove(journal)
+    assert run_pipeline(database, path, apply=True) == RUN_SUCCESS
+    assert movement_counts(database) == applied
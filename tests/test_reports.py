@@ -0,0 +1,71 @@
+"""
+    But : Ce fichier vérifie les options et les signets des rapports PDF regroupés en un seul document
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import os
+import shutil
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("pdfkit", exc_type=ImportError)
+import utils
+from utils import *
+
+# Gabarit du rapport par famille, à la racine du dépôt
+FAMILY_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "family_inventory_template.html")
+
+# Options des documents, comme celles de build_report() et build_family_report()
+REPORT_OPTIONS = {"margin-bottom": "1.5cm", "footer-right": "[page]/[topage]", "footer-font-size": "8"}
+FAMILY_OPTIONS = {"margin-left": "1.5cm", "footer-right": "[page]/[topage]", "footer-font-size": "10"}
+
+def family_report(tmp_path, monkeypatch, bookmark):
+    """
+    Construit le rapport d'une famille dans un dossier temporaire.
+
+    Args:
+        tmp_path: Le dossier temporaire du test.
+        monkeypatch: L'outil de substitution de pytest.
+        bookmark (bool): Ajouter le titre invisible du signet de la famille.
+
+    Returns:
+        str: Le HTML du rapport.
+    """
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(FAMILY_TEMPLATE_PATH, tmp_path)
+    articles = {"3000000000000": {"nom": "Vis", "quantite": 2, "prix": 1.5}}
+    return build_family_report("F001.", "Quincaillerie", articles, bookmark=bookmark)["html"]
+
+def test_family_report_bookmark_only_when_requested(tmp_path, monkeypatch):
+    assert "<h1" not in family_report(tmp_path, monkeypatch, bookmark=False)
+    assert '<h1 class="bookmark">F001. - Quincaillerie</h1>' in family_report(tmp_path, monkeypatch, bookmark=True)
+
+def test_combined_pdf_keeps_page_options_of_each_document(tmp_path, monkeypatch):
+    commands = []
+    monkeypatch.setattr(utils.pdfkit, "configuration", lambda wkhtmltopdf: SimpleNamespace(wkhtmltopdf=wkhtmltopdf))
+    monkeypatch.setattr(utils.subprocess, "run", lambda command, **options: commands.append(command) or SimpleNamespace(returncode=0, stderr=b""))
+    documents = [
+        {"html": "<h1>Rapport</h1>", "path": "rapport.pdf", "options": REPORT_OPTIONS},
+        {"html": "<h1>Famille</h1>", "path": "F001..pdf", "options": FAMILY_OPTIONS},
+    ]
+
+    render_combined_pdf(documents, str(tmp_path / "rapports.pdf"), options=FAMILY_OPTIONS)
+
+    command = commands[0]
+    report_page, family_page = [index for index, argument in enumerate(command) if argument == "page"]
+    global_arguments = command[1:report_page]
+    assert global_arguments[global_arguments.index("--margin-left") + 1] == "1.5cm"
+    assert "--margin-bottom" not in command
+    assert "--outline" in global_arguments
+    assert command[report_page + 2:family_page] == ["--footer-right", "[page]/[topage]", "--footer-font-size", "8"]
+    assert command[family_page + 2:-1] == ["--footer-right", "[page]/[topage]", "--footer-font-size", "10"]
+    assert command[-1] == str(tmp_path / "rapports.pdf")
+
+def test_combined_pdf_reports_wkhtmltopdf_failure(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils.pdfkit, "configuration", lambda wkhtmltopdf: SimpleNamespace(wkhtmltopdf=wkhtmltopdf))
+    monkeypatch.setattr(utils.subprocess, "run", lambda command, **options: SimpleNamespace(returncode=1, stderr=b"Exit with code 1"))
+    documents = [{"html": "<h1>Famille</h1>", "path": "F001..pdf", "options": FAMILY_OPTIONS}]
+
+    with pytest.raises(IOError):
+        render_combined_pdf(documents, str(tmp_path / "rapports.pdf"))
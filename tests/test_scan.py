@@ -0,0 +1,17 @@
+"""
+    But : Ce fichier vérifie la sélection des fichiers d'inventaire des douchettes
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+from scan import *
+
+def test_directory_selection_accepts_upper_case_extension(tmp_path):
+    for name in ("INVENT.TXT", "b.txt", "notes.csv"):
+        (tmp_path / name).write_text("3000000000000\n", encoding="utf-8")
+
+    file_paths = resolve_scan_files(str(tmp_path))
+
+    assert [os.path.basename(path) for path in file_paths] == ["INVENT.TXT", "b.txt"]
+    assert all(is_scan_file(path) for path in file_paths)
+    assert not is_scan_file("notes.csv")
@@ -0,0 +1,170 @@
+"""
+    But : Ce fichier vérifie la reprise d'une mise à jour du stock interrompue entre deux lots
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+from datetime import datetime
+from decimal import Decimal
+import pytest
+
+pytest.importorskip("pdfkit", exc_type=ImportError)
+from cli import *
+
+INVENTORY_DATE = datetime(2026, 10, 18)
+
+# Taille des lots des tests : le catalogue synthétique donne plusieurs lots
+TEST_BATCH_SIZE = 50
+
+class Interruption(Exception):
+    """
+    Interruption simulée de l'exécution (arrêt du poste, coupure réseau...).
+    """
+
+def planned_journal(database, directory):
+    """
+    Planifie la mise à jour du stock de la base de substitution et crée son journal.
+
+    Chaque article en stock est scanné avec une quantité différente de son stock théorique.
+
+    Args:
+        database (str): Le chemin de la base de substitution.
+        directory (str): Le dossier du journal.
+
+    Returns:
+        StockJournal: Le journal de l'exécution, aucun lot n'étant encore appliqué.
+    """
+    connection = sqlite_connection(database)
+    try:
+        counts = dict(connection.execute(
+            "SELECT ED.NumCommercialGlobal, ES.QttAppro - ES.QttConso + 1 FROM ElementStock ES JOIN ElementDef ED ON ES.CodeElem = ED.Code"
+        ).fetchall())
+        deltas = plan_stock(connection, counts)
+    finally:
+        connection.close()
+    movements = [[delta.CodeElem, delta.Stock, delta.Reel, delta.PAMP] for delta in deltas]
+    return StockJournal.create(directory, {
+        "run_id": new_run_id(),
+        "date": INVENTORY_DATE.strftime("%Y-%m-%d"),
+        "mouvements": movements,
+        "taille_lot": TEST_BATCH_SIZE,
+    })
+
+def apply_journal(database, journal):
+    """
+    Applique les lots d'un journal avec le traitement d'inventaire.
+
+    Args:
+        database (str): Le chemin de la base de substitution.
+        journal (StockJournal): Le journal de l'exécution.
+
+    Returns:
+        InventoryPipeline: Le traitement, dont report_data contient les erreurs signalées.
+    """
+    pool = ConnectionPool("sqlite", sqlite_database=database)
+    try:
+        pipeline = InventoryPipeline(pool, Catalogue(pool), PolicyChannel(DEFAULT_POLICY, quiet=True), render_pdf=False)
+        pipeline.apply_stock_plan(journal, INVENTORY_DATE)
+        return pipeline
+    finally:
+        pool.close()
+
+def movement_counts(database):
+    """
+    Compte les mouvements de stock de chaque article.
+
+    Args:
+        database (str): Le chemin de la base de substitution.
+
+    Returns:
+        dict: Le nombre de mouvements, indexé par code d'article.
+    """
+    connection = sqlite_connection(database)
+    try:
+        return dict(connection.execute("SELECT CodeElem, COUNT(*) FROM ElementMvtStock GROUP BY CodeElem").fetchall())
+    finally:
+        connection.close()
+
+def test_resume_after_interruption_creates_no_duplicate_movement(standin_database, tmp_path, monkeypatch):
+    database, codes = standin_database
+    monkeypatch.chdir(tmp_path)
+    journal = planned_journal(database, str(tmp_path))
+    batches = journal.batches()
+    assert len(batches) > 2
+
+    # Interruption juste après la validation du deuxième lot, avant son inscription au journal
+    record_batch = StockJournal.record_batch
+    def interrupted_record_batch(self, index, result):
+        if index == 1:
+            raise Interruption()
+        record_batch(self, index, result)
+    monkeypatch.setattr(StockJournal, "record_batch", interrupted_record_batch)
+    with pytest.raises(Interruption):
+        apply_journal(database, journal)
+    monkeypatch.setattr(StockJournal, "record_batch", record_batch)
+
+    resumed = StockJournal.load(journal.path)
+    assert resumed.applied_batches == {0}
+    pipeline = apply_journal(database, resumed)
+
+    assert StockJournal.load(journal.path).status == "termine"
+    assert movement_counts(database) == {movement[0]: 1 for movement in journal.plan["mouvements"]}
+    assert not pipeline.report_data["errors"]
+
+def test_stock_changed_between_batches_is_reported_as_conflict(standin_database, tmp_path, monkeypatch):
+    database, codes = standin_database
+    monkeypatch.chdir(tmp_path)
+    journal = planned_journal(database, str(tmp_path))
+    changed_code = journal.batches()[1][0][0]
+
+    # Interruption pendant le deuxième lot, qui est annulé
+    apply_movements = Repository.apply_movements
+    def interrupted_apply_movements(self, movements, inventory_date):
+        if movements[0][0] == changed_code:
+            raise Interruption()
+        return apply_movements(self, movements, inventory_date)
+    monkeypatch.setattr(Repository, "apply_movements", interrupted_apply_movements)
+    with pytest.raises(Interruption):
+        apply_journal(database, journal)
+    monkeypatch.setattr(Repository, "apply_movements", apply_movements)
+    assert movement_counts(database).get(changed_code) is None
+
+    # Le stock d'un article du lot annulé change avant la reprise
+    connection = sqlite_connection(database)
+    try:
+        connection.execute("UPDATE ElementStock SET QttAppro = QttAppro + 5 WHERE CodeElem = ?", [changed_code])
+        connection.commit()
+        stock_before = connection.execute("SELECT QttAppro - QttConso FROM ElementStock WHERE CodeElem = ?", [changed_code]).fetchone()[0]
+    finally:
+        connection.close()
+
+    pipeline = apply_journal(database, StockJournal.load(journal.path))
+
+    assert f"[D003] Stock modifié pour l'article {changed_code}" in pipeline.report_data["errors"]
+    counts = movement_counts(database)
+    assert changed_code not in counts
+    assert counts == {movement[0]: 1 for movement in journal.plan["mouvements"] if movement[0] != changed_code}
+    connection = sqlite_connection(database)
+    try:
+        assert connection.execute("SELECT QttAppro - QttConso FROM ElementStock WHERE CodeElem = ?", [changed_code]).fetchone()[0] == stock_before
+    finally:
+        connection.close()
+
+def test_journal_keeps_exact_decimal_movements(tmp_path):
+    movements = [["ART1", Decimal("12.00000000"), Decimal("7.00000000"), Decimal("1.23456789")], ["ART2", 3, 0, 0.1]]
+    journal = StockJournal.create(str(tmp_path), {"run_id": new_run_id(), "date": "2026-10-18", "mouvements": movements, "taille_lot": 1})
+
+    resumed = StockJournal.load(journal.path)
+
+    assert resumed.plan["mouvements"] == movements
+    assert [type(value) for value in resumed.plan["mouvements"][0]] == [str, Decimal, Decimal, Decimal]
+    assert str(resumed.plan["mouvements"][0][3]) == "1.23456789"
+
+def test_full_run_ignores_interrupted_plan_application(tmp_path):
+    plan_journal = StockJournal.create(str(tmp_path), {"run_id": new_run_id(), "date": "2026-10-18", "mouvements": [], "taille_lot": 1}, kind=PLAN_JOURNAL)
+
+    assert StockJournal.find_unfinished(str(tmp_path), "2026-10-18") is None
+    assert StockJournal.find_unfinished(str(tmp_path), "2026-10-18", kind=PLAN_JOURNAL).path == plan_journal.path
+
+    run_journal = StockJournal.create(str(tmp_path), {"run_id": new_run_id(), "date": "2026-10-18", "mouvements": [], "taille_lot": 1})
+    assert StockJournal.find_unfinished(str(tmp_path), "2026-10-18").path == run_journal.path
@@ -0,0 +1,145 @@
+"""
+    But : Ce fichier vérifie que la mise à jour ensembliste du stock produit les mêmes mouvements que la mise à jour article par article d'origine
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import random
+import shutil
+from datetime import datetime
+from db import *
+
+INVENTORY_DATE = datetime(2026, 10, 18)
+
+def update_stock_per_article(connection, correct_stock, inventory_date):
+    """
+    Met à jour le stock article par article, comme le faisait update_stock() avant le passage
+    aux requêtes ensemblistes : chaque article en stock est relu par son numéro commercial,
+    puis corrigé par un mouvement et une mise à jour de ElementStock. Sert de référence.
+
+    Args:
+        connection (sqlite3.Connection): La connexion à la base de substitution.
+        correct_stock (dict): Les quantités scannées, indexées par numéro commercial.
+        inventory_date (datetime): La date d'inventaire des mouvements.
+    """
+    cursor = connection.cursor()
+    all_articles = cursor.execute(
+        "SELECT ED.NumCommercialGlobal FROM ElementStock ES JOIN ElementDef ED ON ES.CodeElem = ED.Code"
+    ).fetchall()
+    info = f"Inventaire manuel du {inventory_date.strftime('%d/%m/%Y')}"
+    for article in all_articles:
+        commercial_num = article.NumCommercialGlobal
+        real_quantity = correct_stock.get(commercial_num, 0)
+        bd_article = cursor.execute(
+            "SELECT ES.CodeElem, ES.QttAppro, ES.QttConso, ES.PAMP FROM ElementStock ES "
+            "JOIN ElementDef ED ON ES.CodeElem = ED.Code WHERE ED.NumCommercialGlobal = ?",
+            [commercial_num]
+        ).fetchone()
+        stock_qty = bd_article.QttAppro - bd_article.QttConso
+        if stock_qty == real_quantity:
+            continue
+        movement_type = 'S' if stock_qty > real_quantity else 'E'
+        diff = abs(stock_qty - real_quantity)
+        cursor.execute(
+            "INSERT INTO ElementMvtStock (CodeElem, TypeMvt, Provenance, Date, Quantite, PA, Info) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [bd_article.CodeElem, movement_type, 'M', inventory_date.isoformat(" "), diff, bd_article.PAMP, info]
+        )
+        column = "QttAppro" if movement_type == 'E' else "QttConso"
+        cursor.execute(f"UPDATE ElementStock SET {column} = {column} + ? WHERE CodeElem = ?", [diff, bd_article.CodeElem])
+    connection.commit()
+
+def update_stock_set_based(connection, correct_stock, inventory_date):
+    """
+    Met à jour le stock par plan_stock() puis apply_movements(), par lots, comme le traitement d'inventaire.
+
+    Args:
+        connection (sqlite3.Connection): La connexion à la base de substitution.
+        correct_stock (dict): Les quantités scannées, indexées par numéro commercial.
+        inventory_date (datetime): La date d'inventaire des mouvements.
+    """
+    deltas = plan_stock(connection, correct_stock)
+    assert deltas is not None
+    movements = [[delta.CodeElem, delta.Stock, delta.Reel, delta.PAMP] for delta in deltas if delta.Stock != delta.Reel]
+    for start in range(0, len(movements), 50):
+        result = apply_movements(connection, movements[start:start + 50], inventory_date)
+        assert result is not None and not result["conflits"]
+        connection.commit()
+
+def scanned_counts(connection, codes):
+    """
+    Construit des quantités scannées couvrant chaque cas du rapprochement : articles non scannés
+    (quantité réelle nulle), inchangés ou modifiés, avec et sans famille, et articles sans stock.
+
+    Args:
+        connection (sqlite3.Connection): La connexion à la base de substitution.
+        codes (list): Les numéros commerciaux du catalogue.
+
+    Returns:
+        tuple: Les quantités scannées (dict) et les numéros commerciaux des articles en stock
+        non scannés et des articles sans famille.
+    """
+    rng = random.Random(1)
+    counts = {}
+    unscanned = []
+    without_family = []
+    rows = connection.execute(
+        "SELECT ED.NumCommercialGlobal, ED.Famille, ES.QttAppro - ES.QttConso AS Stock "
+        "FROM ElementDef ED LEFT JOIN ElementStock ES ON ES.CodeElem = ED.Code ORDER BY ED.Code"
+    ).fetchall()
+    for row in rows:
+        if row.Famille is None:
+            without_family.append(row.NumCommercialGlobal)
+        draw = rng.random()
+        if row.Stock is None:
+            counts[row.NumCommercialGlobal] = rng.randint(1, 20)
+        elif draw < 0.25 and row.Famille is not None:
+            unscanned.append(row.NumCommercialGlobal)
+        elif draw < 0.5:
+            counts[row.NumCommercialGlobal] = row.Stock
+        else:
+            counts[row.NumCommercialGlobal] = row.Stock + rng.choice([-3, -1, 1, 2, 10])
+    return counts, unscanned, without_family
+
+def table_rows(connection, query):
+    """
+    Relit les lignes d'une table sous forme de tuples comparables.
+
+    Args:
+        connection (sqlite3.Connection): La connexion à la base de substitution.
+        query (str): La requête de lecture, triée.
+
+    Returns:
+        list: Les lignes lues.
+    """
+    return [tuple(row) for row in connection.execute(query).fetchall()]
+
+def test_set_based_update_matches_per_article_update(standin_database, tmp_path):
+    database, codes = standin_database
+    reference_database = str(tmp_path / "reference.db")
+    shutil.copy(database, reference_database)
+
+    reference = sqlite_connection(reference_database)
+    candidate = sqlite_connection(database)
+    try:
+        counts, unscanned, without_family = scanned_counts(candidate, codes)
+        assert unscanned and without_family
+
+        update_stock_per_article(reference, counts, INVENTORY_DATE)
+        update_stock_set_based(candidate, counts, INVENTORY_DATE)
+
+        movements_query = "SELECT CodeElem, TypeMvt, Provenance, Date, Quantite, PA, Info FROM ElementMvtStock ORDER BY CodeElem"
+        stock_query = "SELECT CodeElem, Depot, QttAppro, QttConso, QttReservee, PAMP FROM ElementStock ORDER BY CodeElem"
+        expected_movements = table_rows(reference, movements_query)
+        assert expected_movements
+        assert table_rows(candidate, movements_query) == expected_movements
+        assert table_rows(candidate, stock_query) == table_rows(reference, stock_query)
+
+        # Les articles non scannés sont ramenés à zéro, les articles sans famille mis à jour
+        stock_by_number = dict(candidate.execute(
+            "SELECT ED.NumCommercialGlobal, ES.QttAppro - ES.QttConso FROM ElementStock ES JOIN ElementDef ED ON ES.CodeElem = ED.Code"
+        ).fetchall())
+        assert all(stock_by_number[code] == 0 for code in unscanned)
+        assert all(stock_by_number[code] == counts[code] for code in without_family if code in stock_by_number)
+    finally:
+        reference.close()
+        candidate.close()
@@ -0,0 +1,52 @@
+"""
+    But : Ce fichier vérifie l'échappement des valeurs insérées dans les gabarits HTML des rapports
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import os
+import pytest
+from templates import *
+
+# Libellé d'article contenant les caractères spéciaux du HTML
+LABEL = 'Vis <M6> & écrou "inox"'
+ESCAPED_LABEL = "Vis &lt;M6&gt; &amp; écrou &quot;inox&quot;"
+
+# Gabarit du rapport par famille, à la racine du dépôt
+FAMILY_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "family_inventory_template.html")
+
+def test_escape_special_characters():
+    assert escape(LABEL) == ESCAPED_LABEL
+    assert escape(None) == ""
+    assert escape(12) == "12"
+
+def test_escape_keeps_markup():
+    fragment = Markup('<tr><td class="right-align">1 &amp; 2</td></tr>')
+    assert escape(fragment) is fragment
+
+def test_render_escapes_values():
+    template = Template('<td title="{{nom}}">{{nom}}</td><td>{{quantite}}</td>')
+    rendered = template.render({"nom": LABEL, "quantite": 3})
+    assert isinstance(rendered, Markup)
+    assert rendered == f'<td title="{ESCAPED_LABEL}">{ESCAPED_LABEL}</td><td>3</td>'
+
+def test_render_inserts_markup_unescaped():
+    template = Template("<table>{{details_html}}</table>")
+    rows = Template("<tr><td>{{nom}}</td></tr>").render_many([{"nom": LABEL}, {"nom": "A & B"}])
+    assert template.render({"details_html": rows}) == f"<table><tr><td>{ESCAPED_LABEL}</td></tr><tr><td>A &amp; B</td></tr></table>"
+
+def test_render_missing_value():
+    with pytest.raises(KeyError):
+        Template("{{nom}}").render({})
+
+def test_family_report_template_escapes_family_name():
+    template = load_template(FAMILY_TEMPLATE_PATH)
+    rendered = template.render({
+        "date_str": "18/10/2026",
+        "famille": f"F001. - {LABEL}",
+        "bookmark_html": "",
+        "details_html": Markup("<tr><td>ligne</td></tr>"),
+    })
+    assert LABEL not in rendered
+    assert f"F001. - {ESCAPED_LABEL}" in rendered
+    assert "<tr><td>ligne</td></tr>" in rendered
@@ -0,0 +1,82 @@
+"""
+    But : Ce fichier vérifie les suggestions de l'index de similarité des codes-barres
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+import triage
+from triage import *
+
+# Catalogue de codes à 13 chiffres, comme ceux de la base de substitution
+CATALOGUE_CODES = [f"{3000000000000 + index * 7919:013d}" for index in range(2000)]
+KNOWN_CODE = CATALOGUE_CODES[1234]
+
+def compared_candidates(monkeypatch):
+    """
+    Enregistre les codes du catalogue comparés par distance d'édition lors des suggestions.
+
+    Returns:
+        list: Les codes comparés, complétés à chaque appel de suggest().
+    """
+    compared = []
+    distance = triage.edit_distance
+    monkeypatch.setattr(triage, "edit_distance", lambda code, candidate, max_distance: compared.append(candidate) or distance(code, candidate, max_distance))
+    return compared
+
+def test_edit_distance():
+    assert edit_distance("1234567", "1234567", 2) == 0
+    assert edit_distance("1234567", "1234967", 2) == 1
+    assert edit_distance("1234567", "1243567", 2) == 1
+    assert edit_distance("1234567", "123567", 2) == 1
+    assert edit_distance("1234567", "12345678", 2) == 1
+    assert edit_distance("1234567", "2143657", 2) is None
+    assert edit_distance("1234567", "12345", 1) is None
+
+def test_suggest_substitution():
+    index = BarcodeIndex(CATALOGUE_CODES)
+    unknown = KNOWN_CODE[:6] + str((int(KNOWN_CODE[6]) + 1) % 10) + KNOWN_CODE[7:]
+    assert unknown not in CATALOGUE_CODES
+    assert KNOWN_CODE in index.suggest(unknown)
+
+def test_suggest_transposition():
+    index = BarcodeIndex(CATALOGUE_CODES)
+    position = next(position for position in range(5, 12) if KNOWN_CODE[position] != KNOWN_CODE[position + 1])
+    unknown = KNOWN_CODE[:position] + KNOWN_CODE[position + 1] + KNOWN_CODE[position] + KNOWN_CODE[position + 2:]
+    assert unknown not in CATALOGUE_CODES
+    assert KNOWN_CODE in index.suggest(unknown)
+
+def test_suggest_deletion():
+    index = BarcodeIndex(CATALOGUE_CODES)
+    unknown = KNOWN_CODE[:8] + KNOWN_CODE[9:]
+    suggestions = index.suggest(unknown)
+    assert KNOWN_CODE in suggestions
+    assert all(edit_distance(unknown, suggestion, SUGGESTION_MAX_DISTANCE) is not None for suggestion in suggestions)
+
+def test_suggest_orders_and_limits_suggestions():
+    index = BarcodeIndex(["ABCDEFGH", "ABCDEFGX", "ABCDEFXX", "ZZZZZZZZ"])
+    assert index.suggest("ABCDEFGH") == ["ABCDEFGH", "ABCDEFGX", "ABCDEFXX"]
+    assert index.suggest("ABCDEFGH", limit=1) == ["ABCDEFGH"]
+    assert index.suggest("QQQQQQQQ") == []
+
+def test_frequent_ngrams_are_not_used_for_candidates(monkeypatch):
+    # 100 codes : "XYZ" apparaît dans 5 % des codes (conservé), "QRS" dans 6 % (trop commun)
+    xyz_codes = [f"XYZ{index}" for index in range(5)]
+    qrs_codes = [f"QRS{index}" for index in range(6)]
+    index = BarcodeIndex(xyz_codes + qrs_codes + [f"{index:03d}" for index in range(89)])
+    assert NGRAM_MAX_FREQUENCY == 0.05
+
+    compared = compared_candidates(monkeypatch)
+    index.suggest("XYZQRS")
+
+    assert sorted(compared) == xyz_codes
+
+def test_only_frequent_ngrams_fall_back_to_all_candidates(monkeypatch):
+    # Tous les n-grammes du code inconnu sont trop communs : ils sont tout de même utilisés
+    qrs_codes = [f"QRS{index}" for index in range(6)]
+    index = BarcodeIndex(qrs_codes + [f"{index:03d}" for index in range(94)])
+
+    compared = compared_candidates(monkeypatch)
+    suggestions = index.suggest("QRS")
+
+    assert sorted(compared) == qrs_codes
+    assert suggestions == qrs_codes[:3]
@@ -0,0 +1,125 @@
+"""
+    But : Ce fichier contient l'index de similarité des codes-barres, qui propose des articles proches d'un code inconnu
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+from array import array
+from collections import Counter
+
+# Taille des n-grammes indexés
+NGRAM_SIZE = 3
+
+# Caractère ajouté au début et à la fin de chaque code, pour indexer ses extrémités
+NGRAM_PADDING = "#"
+
+# Nombre de codes partageant le plus de n-grammes qui sont comparés par distance d'édition
+SUGGESTION_CANDIDATES = 50
+
+# Part des codes au-delà de laquelle un n-gramme, trop commun (préfixe partagé...), n'est pas utilisé pour la recherche
+NGRAM_MAX_FREQUENCY = 0.05
+
+# Distance d'édition maximale d'une suggestion (substitution, insertion, suppression ou inversion de deux caractères)
+SUGGESTION_MAX_DISTANCE = 2
+
+# Nombre maximal de codes en anomalie listés dans une demande de décision (tous figurent dans le rapport de tri)
+TRIAGE_DIALOG_LIMIT = 20
+
+def ngrams(code):
+    """
+    Découpe un code en n-grammes, en marquant son début et sa fin.
+
+    Args:
+        code (str): Le code à découper.
+
+    Returns:
+        set: Les n-grammes distincts du code.
+    """
+    padded = f"{NGRAM_PADDING * (NGRAM_SIZE - 1)}{code}{NGRAM_PADDING * (NGRAM_SIZE - 1)}"
+    return {padded[start:start + NGRAM_SIZE] for start in range(len(padded) - NGRAM_SIZE + 1)}
+
+def edit_distance(first, second, max_distance):
+    """
+    Calcule la distance d'édition entre deux codes, en comptant l'inversion de deux
+    caractères voisins comme une seule erreur (erreurs de saisie ou de lecture courantes).
+
+    Le calcul s'arrête dès que la distance dépasse max_distance.
+
+    Args:
+        first (str): Le premier code.
+        second (str): Le second code.
+        max_distance (int): La distance au-delà de laquelle les codes ne sont plus comparés.
+
+    Returns:
+        int: La distance d'édition, ou None si elle dépasse max_distance.
+    """
+    if abs(len(first) - len(second)) > max_distance:
+        return None
+    previous_row = None
+    row = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        before_row, previous_row = previous_row, row
+        row = [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = 0 if first[i - 1] == second[j - 1] else 1
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if i > 1 and j > 1 and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]:
+                row[j] = min(row[j], before_row[j - 2] + 1)
+        if min(row) > max_distance:
+            return None
+    return row[-1] if row[-1] <= max_distance else None
+
+class BarcodeIndex:
+    """
+    Index de similarité des numéros commerciaux (codes-barres) du catalogue.
+
+    Chaque code est découpé en n-grammes, et chaque n-gramme renvoie à la liste des codes
+    qui le contiennent. Pour un code inconnu, seuls les codes partageant le plus de
+    n-grammes avec lui sont ensuite comparés par distance d'édition, au lieu de
+    l'ensemble du catalogue.
+
+    Attributes:
+        codes (list): Les codes indexés.
+    """
+
+    def __init__(self, codes):
+        """
+        Construit l'index d'une liste de codes.
+
+        Args:
+            codes (iterable): Les codes à indexer.
+        """
+        self.codes = list(codes)
+        self._postings = {}
+        for index, code in enumerate(self.codes):
+            for gram in ngrams(code):
+                postings = self._postings.get(gram)
+                if postings is None:
+                    postings = self._postings[gram] = array("I")
+                postings.append(index)
+
+    def suggest(self, code, limit=3):
+        """
+        Propose les codes du catalogue les plus proches d'un code inconnu.
+
+        Args:
+            code (str): Le code inconnu.
+            limit (int, optional): Le nombre maximal de suggestions. Par défaut, 3.
+
+        Returns:
+            list: Les codes proches, du plus proche au plus éloigné (au plus SUGGESTION_MAX_DISTANCE erreurs).
+        """
+        # Les n-grammes communs à une grande partie du catalogue ne distinguent aucun code
+        postings = [self._postings[gram] for gram in ngrams(code) if gram in self._postings]
+        rare_postings = [codes for codes in postings if len(codes) <= NGRAM_MAX_FREQUENCY * len(self.codes)]
+        shared = Counter()
+        for codes in rare_postings or postings:
+            shared.update(codes)
+
+        suggestions = []
+        for index, count in shared.most_common(SUGGESTION_CANDIDATES):
+            candidate = self.codes[index]
+            distance = edit_distance(code, candidate, SUGGESTION_MAX_DISTANCE)
+            if distance is not None:
+                suggestions.append((distance, -count, candidate))
+        return [candidate for distance, count, candidate in sorted(suggestions)[:limit]]
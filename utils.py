@@ -4,52 +4,218 @@
     Date : 11/04/2025
 """
  
-import tkinter as tk
-import time
 from datetime import datetime
 from constantes import *
+import atexit
 import os
+import queue
+import shutil
+import subprocess
 import sys
+import tempfile
+import threading
 import pdfkit
+from metrics import *
+from valuation import *
+from templates import *
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+class LogWriter:
+    """
+    Écriture du fichier de log en arrière-plan.
+
+    Les lignes de log sont placées dans une file, puis écrites par lots par un
+    thread dédié qui garde le fichier ouvert entre deux lots. Lorsque le fichier
+    dépasse la taille maximale, il est renommé avec un suffixe numérique (.1, .2...)
+    et un nouveau fichier est créé. Les lignes en attente sont écrites à la
+    fermeture du programme, y compris après une exception non gérée.
+
+    Attributes:
+        log_file (str): Le chemin du fichier de log.
+        max_bytes (int): La taille au-delà de laquelle le fichier est renouvelé (0 pour ne jamais le renouveler).
+        backup_count (int): Le nombre d'anciens fichiers de log conservés.
+    """
+
+    # Nombre maximal de lignes écrites en un seul lot
+    BATCH_SIZE = 1000
+
+    def __init__(self, log_file, max_bytes=0, backup_count=0):
+        """
+        Initialise l'écriture du log, sans démarrer le thread.
+
+        Args:
+            log_file (str): Le chemin du fichier de log.
+            max_bytes (int, optional): La taille maximale du fichier de log. Par défaut, 0.
+            backup_count (int, optional): Le nombre d'anciens fichiers conservés. Par défaut, 0.
+        """
+        self.log_file = log_file
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def write(self, line):
+        """
+        Place une ligne dans la file d'écriture, en démarrant le thread si nécessaire.
+
+        Args:
+            line (str): La ligne à écrire, retour à la ligne compris.
+        """
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+                    self._thread.start()
+        self._queue.put(line)
+
+    def flush(self):
+        """
+        Attend que toutes les lignes en file soient écrites dans le fichier.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def _run(self):
+        """
+        Boucle du thread d'écriture : regroupe les lignes en attente et les écrit par lots.
+        """
+        file = None
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                if file is None:
+                    file = open(self.log_file, 'a', encoding='utf-8')
+                file.write("".join(batch))
+                file.flush()
+                if self.max_bytes and file.tell() >= self.max_bytes:
+                    file.close()
+                    file = None
+                    self._rotate()
+            except OSError as e:
+                print(f"Erreur lors de l'écriture du fichier de log : {e}", file=sys.stderr)
+                if file is not None:
+                    file.close()
+                    file = None
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _rotate(self):
+        """
+        Renomme le fichier de log courant et décale les anciens fichiers conservés.
+        """
+        if self.backup_count <= 0:
+            os.remove(self.log_file)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.log_file}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.log_file}.{index + 1}")
+        os.replace(self.log_file, f"{self.log_file}.1")
+
+# Écriture du fichier de log partagée par l'ensemble du module
+log_writer = LogWriter(LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT)
+atexit.register(log_writer.flush)
+
+def _flush_log_on_thread_crash(args):
+    """
+    Écrit les lignes de log en attente lorsqu'un thread se termine sur une exception non gérée.
+
+    Args:
+        args (threading.ExceptHookArgs): Les informations sur l'exception.
+    """
+    write_log(f"[ERREUR] Exception non gérée dans le thread {args.thread.name if args.thread else ''}: {args.exc_value}")
+    log_writer.flush()
+    _default_thread_excepthook(args)
+
+_default_thread_excepthook = threading.excepthook
+threading.excepthook = _flush_log_on_thread_crash
 
 def write_log(message):
     """
     Écrit un message dans le fichier de log avec la date et l'heure actuelles.
+
+    L'écriture effective est réalisée en arrière-plan par log_writer.
     
     Args:
         message (str): Le message à écrire dans le fichier de log.
     """
-    log_file = LOG_FILE
-    with open(log_file, 'a', encoding='utf-8') as f:
-        f.write(f"{datetime.now()} - {message}\n")
+    log_writer.write(f"{datetime.now()} - {message}\n")
 
-def log_and_display(message, text_box, root, delay=0):
+def log_and_display(message, events):
     """
-    Affiche un message dans une zone de texte et l'enregistre dans un fichier de log.
+    Transmet un message à afficher à l'interface et l'enregistre dans un fichier de log.
     
     Args:
         message (str): Le message à afficher et à enregistrer.
-        text_box (tk.Text): La zone de texte dans laquelle afficher le message.
-        root (tk.Tk): La fenêtre principale de l'application.
-        delay (int, optional): Délai en secondes avant d'afficher le message. Par défaut, 0.
+        events (EventChannel): Le canal d'événements par lequel le message est transmis à l'interface.
     """
-    if delay:
-        time.sleep(delay)
-    text_box.insert(tk.END, message + "\n")
-    text_box.see(tk.END)
-    root.update()
+    events.post("log", message=message)
     write_log(message)
 
-def generate_report(report_data):
+# Fragments des rapports, compilés une seule fois
+ERROR_CARD_TEMPLATE = Template("""
+            <div class="error-card">
+                <h3>Erreur {{code}}</h3>
+                <p><strong>Message:</strong> {{message}}</p>
+            </div>
+            """)
+FAMILY_VALUE_ROW_TEMPLATE = Template("""
+        <tr>
+            <td>{{code}}</td>
+            <td>{{libelle}}</td>
+            <td class="right-align">{{value}}</td>
+        </tr>
+        """)
+FAMILY_TOTAL_ROW_TEMPLATE = Template("""
+    <tr class="total-row">
+        <td colspan="2" style="text-align: right;">Valeur totale de l'inventaire :</td>
+        <td class="right-align">{{value}}</td>
+    </tr>
+    """)
+PERFORMANCE_ROW_TEMPLATE = Template("""
+        <tr>
+            <td>{{libelle}}</td>
+            <td class="right-align">{{duree}}</td>
+            <td class="right-align">{{requetes}}</td>
+            <td class="right-align">{{lignes}}</td>
+            <td class="right-align">{{memoire}}</td>
+        </tr>
+        """)
+ARTICLE_ROW_TEMPLATE = Template("""
+        <tr>
+            <td>{{code}}</td>
+            <td>{{nom}}</td>
+            <td class="right-align">{{quantite}}</td>
+            <td class="right-align">{{prix}}</td>
+            <td class="right-align">{{total}}</td>
+        </tr>
+        """)
+FAMILY_BOOKMARK_TEMPLATE = Template("""<h1 class="bookmark">{{famille}}</h1>""")
+ARTICLE_TOTAL_ROW_TEMPLATE = Template("""
+    <tr>
+        <td colspan="4" class="right-align" style="font-weight: bold; padding-top: 10px; border-top: 1px solid #000;">TOTAL:</td>
+        <td class="right-align" style="font-weight: bold; padding-top: 10px; border-top: 1px solid #000;">{{value}}</td>
+    </tr>
+    """)
+
+def build_report(report_data):
     """
-    Génère un rapport d'exécution au format HTML et le convertit en PDF.
+    Construit le document HTML du rapport d'exécution, sans le convertir en PDF.
 
     Args:
         report_data (dict): Les données du rapport, y compris les erreurs et les valeurs des familles.
 
     Returns:
-        report_path (str): Le chemin du fichier PDF généré.    
-    
+        dict: Le document à rendre, sous la forme attendue par render_pdf().
+
     Raises:
         TypeError: Si report_data n'est pas un dictionnaire.
     """
@@ -75,181 +241,324 @@ def generate_report(report_data):
     errors = report_data.get("errors", {})
     errors_count = len(errors)
     families_values = report_data.get("families_values", {})
+    performances = report_data.get("performances", {})
 
     # Génération du contenu HTML pour les erreurs
-    errors_html = ""
     if errors:
-        for error_code, error_details in errors.items():
-            if isinstance(error_details, dict):
-                message = error_details.get('message', 'N/A')
-            else:
-                message = str(error_details)
-
-            errors_html += f"""
-            <div class="error-card">
-                <h3>Erreur {error_code}</h3>
-                <p><strong>Message:</strong> {message}</p>
-            </div>
-            """
+        errors_html = ERROR_CARD_TEMPLATE.render_many(
+            {
+                "code": error_code,
+                "message": error_details.get('message', 'N/A') if isinstance(error_details, dict) else str(error_details),
+            }
+            for error_code, error_details in errors.items()
+        )
     else:
-        errors_html = '<p>Aucune erreur n\'a été enregistrée durant l\'exécution.</p>'
+        errors_html = Markup('<p>Aucune erreur n\'a été enregistrée durant l\'exécution.</p>')
     
     # Génération du contenu HTML pour les détails des articles
-    details_families_html = ""
-    families_values["COCC."] = {
-        "libelle": "Copieur d'occasion",
-        "value": "",
-    }
-    families_values["MO."] = {
-        "libelle": "Matériel d\'occasion",
-        "value": "",
-    }
-    families_values["INFOC."] = {
-        "libelle": "Informatique d\'occasion",
-        "value": "",
-    }
-    families_values["MOB."] = {
-        "libelle": "Mobilier",
-        "value": "",
-    }
-    sorted_items = sorted(families_values.items(), key=lambda x: x[0])
-    filtered_items = []
-
-    for code, datas in sorted_items:
-        if code in stock_families:
-            filtered_items.append((code, datas))
-
-    for code, datas in filtered_items:
-
-        # Formatage avec deux décimales fixes
-        if not isinstance(datas["value"], str):
-            value_fmt = f"{round(datas['value'], 2):.2f}".replace('.', ',')
-        else :
-            value_fmt = datas["value"]
-        
-        details_families_html += f"""
-        <tr>
-            <td>{code}</td>
-            <td>{datas["libelle"]}</td>
-            <td class="right-align">{value_fmt}</td>
-        </tr>
-        """
-    
-    # Ajouter la ligne de total à la fin du tableau
-    details_families_html += f"""
-    <tr class="total-row">
-        <td colspan="2" style="text-align: right;">Valeur totale de l'inventaire :</td>
-        <td class="right-align"></td>
-    </tr>
-    """
-
-    # Charger le template
-    template_path = resource_path("report_template.html")
-    with open(template_path, "r", encoding="utf-8") as f:
-        template = f.read()
-
-    # Remplacer les variables dans le template
-    html_content = template.replace("{{inventory_date_str}}", inventory_date_str)
-    html_content = html_content.replace("{{execution_date_str}}", execution_date_str)
-    html_content = html_content.replace("{{report_id}}", report_id)
-    html_content = html_content.replace("{{errors_count}}", str(errors_count))
-    html_content = html_content.replace("{{errors_html}}", errors_html)
-    html_content = html_content.replace("{{details_families}}", details_families_html)
+    filtered_items = [(code, datas) for code, datas in sorted(families_values.items(), key=lambda x: x[0]) if code in stock_families]
+    details_families_html = Markup(
+        FAMILY_VALUE_ROW_TEMPLATE.render_many(
+            {"code": code, "libelle": datas["libelle"], "value": format_amount(datas["value"])}
+            for code, datas in filtered_items
+        )
+        # Ajouter la ligne de total à la fin du tableau
+        + FAMILY_TOTAL_ROW_TEMPLATE.render({"value": format_amount(inventory_total(dict(filtered_items)))})
+    )
+
+    # Génération du contenu HTML pour les performances de chaque étape
+    performances_html = PERFORMANCE_ROW_TEMPLATE.render_many(
+        {
+            "libelle": datas["libelle"],
+            "duree": f"{datas['duree_s']:.2f}".replace('.', ','),
+            "requetes": datas["requetes_sql"],
+            "lignes": datas["lignes_lues"],
+            "memoire": "-" if datas["pic_memoire_octets"] is None else f"{datas['pic_memoire_octets'] / (1024 * 1024):.1f}".replace('.', ','),
+        }
+        for datas in performances.get("etapes", {}).values()
+    )
+    if not performances_html:
+        performances_html = Markup('<tr><td colspan="5">Aucune mesure disponible.</td></tr>')
+
+    # Rendu du gabarit, compilé au premier rapport
+    html_content = load_template(resource_path("report_template.html")).render({
+        "date_str": inventory_date_str,
+        "inventory_date_str": inventory_date_str,
+        "execution_date_str": execution_date_str,
+        "report_id": report_id,
+        "errors_count": errors_count,
+        "errors_html": errors_html,
+        "details_families": details_families_html,
+        "performances_html": performances_html,
+    })
 
     # Enregistrer le fichier
     output_dir = f"inventaires/inventaire_{inventory_date_str_ymd}"
     os.makedirs(output_dir, exist_ok=True)
     report_path = os.path.join(output_dir, report_filename)
     
-    config = pdfkit.configuration(wkhtmltopdf=r'./wkhtmltopdf.exe')
     options = {
         'margin-bottom': '1.5cm',
         'footer-right': '[page]/[topage]',
         'footer-font-size': '8',
     }
-    pdfkit.from_string(html_content, report_path, options=options, configuration=config)
+    metrics.count("documents_html")
     
-    return report_path
+    return {"html": html_content, "path": report_path, "options": options}
 
-def generate_family_report(family_code, family_name, articles_data):
+def generate_report(report_data):
     """
-    Génère un rapport de stock HTML pour une famille d'articles et le convertit en PDF.
+    Génère un rapport d'exécution au format HTML et le convertit en PDF.
+
+    Args:
+        report_data (dict): Les données du rapport, y compris les erreurs et les valeurs des familles.
+
+    Returns:
+        report_path (str): Le chemin du fichier PDF généré.    
+    
+    Raises:
+        TypeError: Si report_data n'est pas un dictionnaire.
+    """
+    return render_pdf(build_report(report_data))
+
+def build_family_report(family_code, family_name, articles_data, bookmark=False):
+    """
+    Construit le document HTML du rapport de stock d'une famille d'articles, sans le convertir en PDF.
     
     Args:
         family_code (str): Le code de la famille d'articles.
         family_name (str): Le nom de la famille d'articles.
         articles_data (dict): Les données des articles, y compris le code, le nom, la quantité et le prix.
+        bookmark (bool, optional): Ajouter le titre invisible qui forme le signet de la famille dans
+            un document combiné (voir render_combined_pdf). Par défaut, False.
         
     Returns:
-        report_path (str): Le chemin du fichier PDF généré.
-        
-    Raises:
-        TypeError: Si articles_data n'est pas un dictionnaire.
+        dict: Le document à rendre, sous la forme attendue par render_pdf().
     """
     # Préparation des données
     inventory_date = find_closest_date()
     date_str = inventory_date.strftime("%d/%m/%Y")
     date_path = inventory_date.strftime("%Y-%m-%d")
     
-    # Génération du contenu HTML pour les détails des articles
-    details_html = ""
+    # Montants exacts au centime, calculés comme la valorisation par famille du rapport d'exécution
+    rows = []
     total_value = 0
-    
-    # Formatage des montants avec deux décimales fixes
     for code, article_data in articles_data.items():
         quantite = article_data.get("quantite", 0)
-        unit_price = round(article_data.get("prix", 0), 2)
-        total_price = round(quantite * unit_price, 2)
+        unit_price = to_amount(article_data.get("prix", 0))
+        total_price = line_value(quantite, unit_price)
         total_value += total_price
-        
-        # Formatage avec deux décimales fixes
-        unit_price_fmt = f"{unit_price:.2f}".replace('.', ',')
-        total_price_fmt = f"{total_price:.2f}".replace('.', ',')
-        
-        details_html += f"""
-        <tr>
-            <td>{code}</td>
-            <td>{article_data.get("nom", "")}</td>
-            <td class="right-align">{quantite}</td>
-            <td class="right-align">{unit_price_fmt}</td>
-            <td class="right-align">{total_price_fmt}</td>
-        </tr>
-        """
-
-    # Formatage du total avec deux décimales fixes
-    total_value_fmt = f"{round(total_value, 2):.2f}".replace('.', ',')
-
-    # Ajout de la ligne de total
-    details_html += f"""
-    <tr>
-        <td colspan="4" class="right-align" style="font-weight: bold; padding-top: 10px; border-top: 1px solid #000;">TOTAL:</td>
-        <td class="right-align" style="font-weight: bold; padding-top: 10px; border-top: 1px solid #000;">{total_value_fmt}</td>
-    </tr>
-    """
-    
-    # Charger le template
-    template_path = resource_path("family_inventory_template.html")
-    with open(template_path, "r", encoding="utf-8") as f:
-        template = f.read()
+        rows.append({
+            "code": code,
+            "nom": article_data.get("nom", ""),
+            "quantite": quantite,
+            "prix": format_amount(unit_price),
+            "total": format_amount(total_price),
+        })
+
+    # Génération du contenu HTML pour les détails des articles, suivi de la ligne de total
+    details_html = Markup(
+        ARTICLE_ROW_TEMPLATE.render_many(rows)
+        + ARTICLE_TOTAL_ROW_TEMPLATE.render({"value": format_amount(total_value)})
+    )
     
-    # Remplacer les variables dans le template
-    html_content = template.replace("{{date_str}}", date_str)
-    html_content = html_content.replace("{{famille}}", f"{family_code} - {family_name}")
-    html_content = html_content.replace("{{details_html}}", details_html)
+    # Rendu du gabarit, compilé au premier rapport
+    family = f"{family_code} - {family_name}"
+    html_content = load_template(resource_path("family_inventory_template.html")).render({
+        "date_str": date_str,
+        "famille": family,
+        "bookmark_html": FAMILY_BOOKMARK_TEMPLATE.render({"famille": family}) if bookmark else "",
+        "details_html": details_html,
+    })
 
     output_dir = f"inventaires/inventaire_{date_path}/familles_rapports"
     os.makedirs(output_dir, exist_ok=True)
     report_path = os.path.join(output_dir, f"{family_code}.pdf")
     
-    config = pdfkit.configuration(wkhtmltopdf=r'./wkhtmltopdf.exe')
     options = {
         'margin-left': '1.5cm',
         'footer-right': '[page]/[topage]',
         'footer-font-size': '10',
     }
-    pdfkit.from_string(html_content, report_path, options=options, configuration=config)
+    metrics.count("documents_html")
+    
+    return {"html": html_content, "path": report_path, "options": options}
+
+def generate_family_report(family_code, family_name, articles_data):
+    """
+    Génère un rapport de stock HTML pour une famille d'articles et le convertit en PDF.
     
-    return report_path
+    Args:
+        family_code (str): Le code de la famille d'articles.
+        family_name (str): Le nom de la famille d'articles.
+        articles_data (dict): Les données des articles, y compris le code, le nom, la quantité et le prix.
+        
+    Returns:
+        report_path (str): Le chemin du fichier PDF généré.
+    """
+    return render_pdf(build_family_report(family_code, family_name, articles_data))
+
+def render_pdf(document):
+    """
+    Convertit un document HTML en PDF à l'aide de wkhtmltopdf.
+
+    Args:
+        document (dict): Le document à rendre, contenant le HTML ("html"), le chemin
+        du PDF à produire ("path") et les options de wkhtmltopdf ("options").
+
+    Returns:
+        str: Le chemin du fichier PDF généré.
+    """
+    config = pdfkit.configuration(wkhtmltopdf=r'./wkhtmltopdf.exe')
+    pdfkit.from_string(document["html"], document["path"], options=document["options"], configuration=config)
+    metrics.count("documents_pdf")
+    return document["path"]
+
+def render_pdfs(documents, max_workers=PDF_WORKERS):
+    """
+    Convertit plusieurs documents HTML en PDF de manière concurrente.
+
+    Chaque conversion lance son propre processus wkhtmltopdf : un pool de threads
+    borné suffit donc à les exécuter en parallèle. Une erreur sur un document
+    n'interrompt pas la conversion des autres.
+
+    Args:
+        documents (list): Les documents à rendre, sous la forme attendue par render_pdf().
+        max_workers (int, optional): Le nombre maximal de conversions simultanées. Par défaut, PDF_WORKERS.
+
+    Returns:
+        tuple: La liste des chemins des PDF générés, et un dictionnaire des erreurs
+        rencontrées, indexées par chemin du PDF.
+    """
+    report_paths = []
+    errors = {}
+    if not documents:
+        return report_paths, errors
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(render_pdf, document): document["path"] for document in documents}
+        for future in as_completed(futures):
+            try:
+                report_paths.append(future.result())
+            except Exception as e:
+                errors[futures[future]] = str(e)
+
+    return sorted(report_paths), errors
+
+# Options globales de wkhtmltopdf, qui s'appliquent à toutes les pages d'un document combiné
+WKHTMLTOPDF_GLOBAL_OPTIONS = {
+    "margin-top", "margin-bottom", "margin-left", "margin-right", "page-size", "page-width",
+    "page-height", "orientation", "dpi", "grayscale", "lowquality", "title", "outline", "outline-depth",
+}
+
+def _wkhtmltopdf_arguments(options):
+    """
+    Convertit des options de wkhtmltopdf en arguments de ligne de commande.
+
+    Args:
+        options (dict): Les options, sans leurs tirets (None pour une option sans valeur).
+
+    Returns:
+        list: Les arguments correspondants.
+    """
+    arguments = []
+    for key, value in options.items():
+        arguments.append(f"--{key}")
+        if value is not None:
+            arguments.append(str(value))
+    return arguments
+
+def render_combined_pdf(documents, path, options=None):
+    """
+    Convertit plusieurs documents HTML en un seul PDF, en une seule exécution de wkhtmltopdf.
+
+    Chaque document devient une suite de pages du PDF combiné, avec ses propres options de
+    page (pied de page...). Les options globales de wkhtmltopdf (marges, format...) ne peuvent
+    en revanche pas varier d'une page à l'autre et sont communes à tout le document. Les titres
+    (h1 à h6) de chaque document forment les signets du PDF : le premier titre de premier
+    niveau de chaque document marque son début, ce qui permet de le découper ensuite avec
+    split_combined_pdf().
+
+    Args:
+        documents (list): Les documents à regrouper, sous la forme attendue par render_pdf().
+        path (str): Le chemin du PDF combiné à produire.
+        options (dict, optional): Les options dont sont tirées les options globales (voir
+            WKHTMLTOPDF_GLOBAL_OPTIONS). Par défaut, celles du premier document.
+
+    Returns:
+        str: Le chemin du fichier PDF généré.
+
+    Raises:
+        IOError: Si wkhtmltopdf a échoué.
+    """
+    if options is None:
+        options = documents[0]["options"]
+    global_options = {key: value for key, value in options.items() if key in WKHTMLTOPDF_GLOBAL_OPTIONS}
+    global_options.update({"quiet": None, "outline": None, "outline-depth": "2"})
+
+    # wkhtmltopdf ne lit plusieurs pages que depuis des fichiers
+    pages_directory = tempfile.mkdtemp(prefix="rapports_")
+    try:
+        pages = []
+        for index, document in enumerate(documents):
+            page = os.path.join(pages_directory, f"page_{index:04d}.html")
+            with open(page, "w", encoding="utf-8") as f:
+                f.write(document["html"])
+            pages.append(page)
+
+        # pdfkit n'applique ses options qu'au document entier : chaque page reçoit ici les siennes
+        config = pdfkit.configuration(wkhtmltopdf=r'./wkhtmltopdf.exe')
+        command = [os.fsdecode(config.wkhtmltopdf), *_wkhtmltopdf_arguments(global_options)]
+        for page, document in zip(pages, documents):
+            page_options = {key: value for key, value in document["options"].items() if key not in WKHTMLTOPDF_GLOBAL_OPTIONS}
+            command += ["page", page, *_wkhtmltopdf_arguments(page_options)]
+        command.append(path)
+        result = subprocess.run(command, capture_output=True, creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        errors = result.stderr.decode("utf-8", errors="replace")
+        if result.returncode != 0 or "Error" in errors:
+            raise IOError(f"wkhtmltopdf a échoué (code {result.returncode}) : {errors}")
+    finally:
+        shutil.rmtree(pages_directory, ignore_errors=True)
+
+    metrics.count("documents_pdf")
+    return path
+
+def split_combined_pdf(path, documents):
+    """
+    Découpe un PDF produit par render_combined_pdf() en un fichier par document,
+    à partir de ses signets de premier niveau.
+
+    Args:
+        path (str): Le chemin du PDF combiné.
+        documents (list): Les documents regroupés, dans le même ordre ; chacun est
+            écrit à son propre chemin ("path").
+
+    Returns:
+        list: Les chemins des PDF générés.
+
+    Raises:
+        ImportError: Si pypdf n'est pas installé.
+        ValueError: Si les signets ne correspondent pas aux documents.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(path)
+    # Les sous-titres d'un document sont regroupés dans une liste sous son signet
+    starts = [reader.get_destination_page_number(item) for item in reader.outline if not isinstance(item, list)]
+    if len(starts) != len(documents):
+        raise ValueError(f"{len(starts)} signet(s) trouvé(s) dans {path} pour {len(documents)} document(s)")
+
+    report_paths = []
+    for index, document in enumerate(documents):
+        end = starts[index + 1] if index + 1 < len(starts) else len(reader.pages)
+        writer = PdfWriter()
+        for page_number in range(starts[index], end):
+            writer.add_page(reader.pages[page_number])
+        os.makedirs(os.path.dirname(document["path"]) or ".", exist_ok=True)
+        with open(document["path"], "wb") as f:
+            writer.write(f)
+        report_paths.append(document["path"])
+    return report_paths
 
 def resource_path(relative_path):
     """
@@ -0,0 +1,99 @@
+"""
+    But : Ce fichier contient la valorisation de l'inventaire, par article, par famille et au total
+    Par : Estéban DESESSARD - e.desessard@burographic.fr
+    Date : 18/10/2026
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+# Précision des montants : le centime
+CENT = Decimal("0.01")
+
+def to_amount(value):
+    """
+    Convertit une valeur numérique en montant décimal exact, arrondi au centime.
+
+    Les nombres à virgule flottante sont convertis à partir de leur écriture décimale
+    la plus courte (1.1 donne 1,10 et non 1,1000000000000000888...).
+
+    Args:
+        value (int | float | Decimal | str): La valeur à convertir. None vaut 0.
+
+    Returns:
+        Decimal: Le montant, arrondi au centime (arrondi commercial, au plus proche, 0,005 vers le haut).
+    """
+    if value is None:
+        return Decimal(0).quantize(CENT)
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+def line_value(quantity, unit_price):
+    """
+    Calcule la valeur d'une ligne d'inventaire : quantité multipliée par le prix unitaire
+    arrondi au centime, tel qu'il figure dans les rapports.
+
+    Args:
+        quantity (int): La quantité.
+        unit_price (int | float | Decimal): Le prix unitaire (PAMP).
+
+    Returns:
+        Decimal: La valeur de la ligne, au centime.
+    """
+    return to_amount(unit_price) * int(quantity)
+
+def value_families(counts, catalogue):
+    """
+    Valorise en une seule passe les quantités retenues de l'inventaire, par famille.
+
+    Chaque article géré en stock est valorisé à son PAMP arrondi au centime, comme dans
+    les rapports par famille, puis sa valeur est ajoutée à celle de sa famille. Les
+    articles non scannés ont une quantité nulle : leur famille figure tout de même
+    dans le résultat.
+
+    Args:
+        counts (dict): Les quantités retenues, indexées par numéro commercial.
+        catalogue (Catalogue): Le catalogue d'articles.
+
+    Returns:
+        dict: Pour chaque code de famille (avec point final), un dictionnaire contenant
+        son libellé ("libelle") et sa valeur ("value", Decimal).
+    """
+    totals = {}
+    for article in catalogue.stock_articles():
+        if article.family is None:
+            continue
+        value = line_value(counts.get(article.num_commercial, 0), article.pamp)
+        totals[article.family] = totals.get(article.family, 0) + value
+
+    return {
+        family_code: {
+            "libelle": catalogue.get_family_name(family_code.replace(".", "")),
+            "value": to_amount(value),
+        }
+        for family_code, value in sorted(totals.items())
+    }
+
+def inventory_total(families_values):
+    """
+    Calcule la valeur totale de l'inventaire.
+
+    Args:
+        families_values (dict): Les valeurs par famille (voir value_families).
+
+    Returns:
+        Decimal: La somme des valeurs des familles, au centime.
+    """
+    return to_amount(sum((to_amount(datas["value"]) for datas in families_values.values()), Decimal(0)))
+
+def format_amount(amount):
+    """
+    Met en forme un montant avec deux décimales et une virgule, comme dans les rapports.
+
+    Args:
+        amount (int | float | Decimal): Le montant.
+
+    Returns:
+        str: Le montant mis en forme (ex : "1234,50").
+    """
+    return f"{to_amount(amount):.2f}".replace('.', ',')